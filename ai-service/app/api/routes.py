@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from app.models.schemas import (
     ResumeParseRequest,
     ResumeParseResponse,
@@ -9,20 +11,206 @@ from app.models.schemas import (
     SearchResult,
     SummaryRequest,
     SummaryResponse,
+    SummaryJobRequest,
+    SummaryJobResponse,
+    SummaryPriorityRequest,
     HealthResponse,
+    IndexCandidateRequest,
+    IndexCandidateResponse,
+    WarmQueriesRequest,
+    BatchParseRequest,
+    BatchParseResponse,
+    BatchParseItem,
+    SyncJobRolesRequest,
+    JobRoleMatchRequest,
+    JobRoleMatchResponse,
+    CandidateMatchRequest,
+    CandidateMatchResponse,
+    IndexEventsRequest,
+    IndexRebuildRequest,
 )
 from app.services.resume_parser import ResumeParser
 from app.services.embedding_service import get_embedding_service
+from app.services.search_service import get_search_service
+from app.services.match_engine import get_match_engine
 from app.services.summary_generator import get_summary_generator
+from app.services.summary_queue import SummaryQueue
+from app.services.llm_client import get_llm_client
+from app.services.ingest import BatchIngestor, ResumePipeline
+from app.services.index_worker import IndexWorker
+from app.services.parse_cache import ParseCache
+from app.services.query_cache import QueryCache
 from app.core.config import settings
-import uuid
+from app.core import concurrency, metrics, startup
+from app.core.concurrency import ExtractionLimitExceeded, stage
 
 router = APIRouter()
 
-# Initialize services
-resume_parser = ResumeParser()
-embedding_service = get_embedding_service(settings.groq_api_key, settings.groq_model)
-summary_generator = get_summary_generator(settings.groq_api_key, settings.groq_model)
+# Services are built on first use (or by the startup warm-up), not at import,
+# so the process starts serving /health immediately and each build is timed.
+llm_client = startup.component("llm_client", lambda: get_llm_client(
+    settings.groq_api_key,
+    settings.groq_model,
+    requests_per_minute=settings.llm_requests_per_minute,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    timeout=settings.llm_timeout,
+    max_retries=settings.llm_max_retries,
+    backoff_base=settings.llm_backoff_base
+))
+resume_parser = startup.component("resume_parser", ResumeParser)
+embedding_service = startup.component("embedding_service", lambda: get_embedding_service(
+    settings.groq_api_key,
+    settings.groq_model,
+    settings.embedding_backend,
+    settings.embedding_dimension,
+    settings.embedding_model_name,
+    index_type=settings.vector_index_type,
+    index_path=settings.vector_index_path,
+    index_save_interval=settings.vector_index_save_interval,
+    ivf_nlist=settings.ivf_nlist,
+    ivf_nprobe=settings.ivf_nprobe,
+    quantization=settings.vector_quantization,
+    pq_subvectors=settings.pq_subvectors,
+    quantization_rescore=settings.quantization_rescore,
+    store_path=settings.embedding_store_path,
+    llm_client=llm_client.get(),
+    query_cache=QueryCache(settings.query_cache_size, settings.query_cache_ttl_seconds),
+    chunk_size=settings.chunk_size,
+    chunk_overlap=settings.chunk_overlap,
+    max_text_length=settings.max_text_length
+))
+match_engine = startup.component("match_engine", lambda: get_match_engine(
+    embedding_service.get(),
+    ResumeParser.MATCHER,
+    roles_path=settings.job_roles_path or None,
+    skill_weight=settings.match_skill_weight
+))
+
+
+def _build_search_service():
+    service = get_search_service(
+        embedding_service.get(),
+        ResumeParser.MATCHER,
+        lexical_index_path=settings.lexical_index_path or None,
+        save_interval=settings.vector_index_save_interval,
+        rrf_k=settings.rrf_k,
+        match_engine=match_engine.get()
+    )
+    match_engine.get().load_candidates(service.indexed_skills())
+    return service
+
+
+search_service = startup.component("search_service", _build_search_service)
+summary_generator = startup.component("summary_generator", lambda: get_summary_generator(
+    settings.groq_api_key,
+    settings.groq_model,
+    llm_client=llm_client.get(),
+    batch_size=settings.summary_batch_size,
+    batch_window=settings.summary_batch_window_ms / 1000
+))
+parse_cache = startup.component("parse_cache", lambda: (
+    ParseCache(settings.parse_cache_path, settings.parse_cache_max_mb * 1024 * 1024)
+    if settings.parse_cache_path else None
+))
+summary_queue = startup.component("summary_queue", lambda: (
+    SummaryQueue(
+        settings.summary_queue_path,
+        summary_generator.get(),
+        workers=settings.summary_workers,
+        batch_size=settings.summary_batch_size,
+        max_attempts=settings.summary_max_attempts,
+        retry_backoff=settings.summary_retry_backoff,
+        lease_seconds=settings.summary_job_lease,
+        poll_interval=settings.summary_poll_interval,
+        retention_days=settings.summary_job_retention_days
+    )
+    if settings.summary_queue_path else None
+))
+resume_pipeline = startup.component("resume_pipeline", lambda: ResumePipeline(
+    resume_parser.get(), summary_generator.get(), search_service.get(), parse_cache.get(), summary_queue.get()
+))
+batch_ingestor = startup.component("batch_ingestor", lambda: BatchIngestor(resume_pipeline.get()))
+index_worker = startup.component("index_worker", lambda: IndexWorker(
+    search_service.get(),
+    resume_parser.get(),
+    checkpoint_path=startup.per_worker(settings.index_checkpoint_path) or None,
+    batch_size=settings.index_batch_size
+))
+# Starts the extraction workers (and their fork server) ahead of the first upload
+extraction_pool = startup.component("extraction_pool", concurrency.warm_process_pool)
+
+# Services safe to build before forking workers: no open connections, threads or per-worker files
+SHARED_SERVICES = [
+    llm_client, resume_parser, embedding_service, match_engine, search_service, summary_generator
+]
+# Everything a request may touch, in dependency order, for the startup warm-up
+SERVICES = SHARED_SERVICES + [parse_cache, summary_queue, resume_pipeline, batch_ingestor, index_worker, extraction_pool]
+
+
+def _cache_stats() -> dict:
+    stats = {}
+    if embedding_service.loaded:
+        stats["query"] = embedding_service.get().query_cache.stats()
+    if parse_cache.peek() is not None:
+        stats["parse"] = parse_cache.peek().stats()
+    return stats
+
+
+# Gauges read from the services at scrape time, so they cost nothing between
+# scrapes; services not built yet report nothing rather than being built
+metrics.gauge(
+    "talentvault_vector_index_size", "Candidates in the vector index",
+    lambda: embedding_service.get().index.candidate_count() if embedding_service.loaded else None
+)
+metrics.gauge(
+    "talentvault_vector_index_bytes", "Memory held by the vector index rows (float32 and/or codes)",
+    lambda: embedding_service.get().index.memory_bytes() if embedding_service.loaded else None
+)
+metrics.gauge(
+    "talentvault_lexical_index_size", "Candidates in the lexical index",
+    lambda: len(search_service.get().lexical_index) if search_service.loaded else None
+)
+metrics.gauge(
+    "talentvault_embedding_store_rows", "Embedding store rows by state",
+    lambda: {
+        "live": len(embedding_service.get().store),
+        "dead": embedding_service.get().store.dead_rows()
+    } if embedding_service.loaded and embedding_service.get().store is not None else None,
+    "state"
+)
+metrics.gauge(
+    "talentvault_cache_hit_ratio", "Hit ratio by cache",
+    lambda: {name: stats["hit_ratio"] for name, stats in _cache_stats().items()},
+    "cache"
+)
+metrics.gauge(
+    "talentvault_cache_hits", "Cache hits since startup by cache",
+    lambda: {name: stats["hits"] for name, stats in _cache_stats().items()},
+    "cache"
+)
+metrics.gauge(
+    "talentvault_cache_misses", "Cache misses since startup by cache",
+    lambda: {name: stats["misses"] for name, stats in _cache_stats().items()},
+    "cache"
+)
+metrics.gauge(
+    "talentvault_index_queue_depth", "Change events waiting for the background indexer",
+    lambda: len(index_worker.get().pending) if index_worker.loaded else None
+)
+metrics.gauge(
+    "talentvault_summary_jobs", "Summary jobs by status",
+    lambda: summary_queue.peek().counts() if summary_queue.peek() is not None else None,
+    "status"
+)
+metrics.gauge(
+    "talentvault_stage_in_flight", "Requests holding a slot in each pipeline stage",
+    concurrency.stages_in_use,
+    "stage"
+)
+metrics.gauge(
+    "talentvault_process_pool_workers", "Extraction process pool size",
+    concurrency.extraction_worker_count
+)
 
 
 @router.get("/health", response_model=HealthResponse)
@@ -35,52 +223,89 @@ async def health_check():
     }
 
 
+@router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the startup warm-up has built every service
+
+    Unlike /health, which only says the process is up, this reports whether
+    requests will be served without paying cold-start costs, along with the
+    time spent building each component and importing each deferred module.
+    """
+    status = startup.status()
+    status["llm_configured"] = llm_client.loaded and llm_client.get().configured
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 @router.post("/parse-resume", response_model=ResumeParseResponse)
 async def parse_resume(request: ResumeParseRequest):
     """Parse resume and extract information"""
     try:
-        # Parse resume
-        parsed_data = resume_parser.parse_resume(
-            request.resume_url,
-            request.filename
-        )
-        
-        # Generate summary
-        summary = summary_generator.generate_summary(
-            parsed_data['extracted_text'],
-            parsed_data['skills'],
-            parsed_data['experience_years']
-        )
-        
-        # Generate embedding ID
-        embedding_text = f"{' '.join(parsed_data['skills'])} {parsed_data['extracted_text'][:1000]}"
-        # Note: Embeddings are generated on-demand during search
-        embedding_id = str(uuid.uuid4())
-        
-        # Store embedding (in production, this would go to a vector database)
-        # For now, we'll generate an ID that can be used later
-        
-        return {
-            "extracted_text": parsed_data['extracted_text'],
-            "summary": summary,
-            "skills": parsed_data['skills'],
-            "experience_years": parsed_data['experience_years'],
-            "education": parsed_data['education'],
-            "certifications": parsed_data['certifications'],
-            "languages": parsed_data['languages'],
-            "embedding_id": embedding_id
-        }
-    
+        return await resume_pipeline.get().parse(request)
+
+    except ExtractionLimitExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of stage latencies, LLM usage, caches and queues"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/llm/stats")
+async def llm_stats():
+    """Call, coalescing and retry counters for the shared LLM client"""
+    return llm_client.get().stats()
+
+
+@router.get("/parse-cache/stats")
+def parse_cache_stats():
+    """Hit/miss counters and size of the parse result cache"""
+    cache = parse_cache.get()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+def _check_batch_size(request: BatchParseRequest):
+    if len(request.resumes) > settings.batch_max_resumes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.batch_max_resumes} resumes"
+        )
+
+
+@router.post("/parse-resumes/batch", response_model=BatchParseResponse)
+async def parse_resumes_batch(request: BatchParseRequest):
+    """Parse many resumes concurrently; per-item errors are reported inline"""
+    _check_batch_size(request)
+    results = [item async for item in batch_ingestor.get().run(request.resumes)]
+    results.sort(key=lambda item: item['index'])
+    return {"results": results}
+
+
+@router.post("/parse-resumes/batch/stream")
+async def parse_resumes_batch_stream(request: BatchParseRequest):
+    """Parse many resumes, streaming one NDJSON line per resume as each completes"""
+    _check_batch_size(request)
+
+    async def stream():
+        async for item in batch_ingestor.get().run(request.resumes):
+            yield BatchParseItem(**item).model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/generate-embeddings", response_model=EmbeddingResponse)
-async def generate_embeddings(request: EmbeddingRequest):
+def generate_embeddings(request: EmbeddingRequest):
     """Generate embeddings for text"""
     try:
-        embedding = embedding_service.generate_embedding(request.text)
-        embedding_id = embedding_service.generate_embedding_id(request.text)
+        embedding = embedding_service.get().generate_embedding(request.text)
+        embedding_id = embedding_service.get().generate_embedding_id(request.text)
         
         return {
             "embedding": embedding,
@@ -92,32 +317,32 @@ async def generate_embeddings(request: EmbeddingRequest):
 
 
 @router.post("/semantic-search", response_model=SearchResponse)
-async def semantic_search(request: SearchRequest):
-    """Perform semantic search on candidates using GROQ AI"""
+def semantic_search(request: SearchRequest):
+    """Rank candidates by fused keyword (BM25) and vector similarity, after hard filters"""
     try:
-        # Use GROQ to analyze the search query and create a smart search
-        # This is a simplified version that uses GROQ to score relevance
-        
-        results = []
-        
-        # For now, return all candidates with a relevance score
-        # In production, you'd fetch candidate data and use GROQ to score each one
-        for candidate_id in request.candidate_ids[:settings.max_results]:
-            # Simple scoring based on query (in production, use actual candidate data)
-            score = 0.75  # Default relevance score
-            reason = f"Matched search criteria for: {request.query[:50]}"
-            
-            results.append(
-                SearchResult(
-                    candidate_id=candidate_id,
-                    score=score,
-                    reason=reason
-                )
+        matches = search_service.get().search(
+            request.query,
+            request.candidate_ids or None,
+            settings.max_results,
+            required_skills=request.required_skills,
+            languages=request.languages,
+            min_experience_years=request.min_experience_years,
+            mode=request.mode
+        )
+
+        results = [
+            SearchResult(
+                candidate_id=match['candidate_id'],
+                score=round(match['score'], 4),
+                reason=match['reason']
             )
+            for match in matches
+        ]
         
         return SearchResponse(
             query=request.query,
-            results=results
+            results=results,
+            stage="final"
         )
     
     except Exception as e:
@@ -125,15 +350,177 @@ async def semantic_search(request: SearchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/semantic-search/stream")
+async def semantic_search_stream(request: SearchRequest):
+    """Stream one NDJSON SearchResponse per ranking stage, cheapest stage first"""
+    if not request.query or not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    stages = search_service.get().search_stages(
+        request.query,
+        request.candidate_ids or None,
+        settings.max_results,
+        required_skills=request.required_skills,
+        languages=request.languages,
+        min_experience_years=request.min_experience_years,
+        mode=request.mode
+    )
+
+    async def stream():
+        async for stage_name, matches in iterate_in_threadpool(stages):
+            yield SearchResponse(
+                query=request.query,
+                results=[
+                    SearchResult(
+                        candidate_id=match['candidate_id'],
+                        score=round(match['score'], 4),
+                        reason=match['reason']
+                    )
+                    for match in matches
+                ],
+                stage=stage_name
+            ).model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/search/warm")
+async def warm_search_queries(request: WarmQueriesRequest, background_tasks: BackgroundTasks):
+    """Pre-compute query features and vectors, e.g. from frequent search_queries rows"""
+    queries = request.queries[:settings.query_cache_prewarm]
+    background_tasks.add_task(embedding_service.get().warm_queries, queries)
+    return {"queued": len(queries)}
+
+
+@router.get("/query-cache/stats")
+async def query_cache_stats():
+    """Hit/miss counters for the query cache"""
+    return embedding_service.get().query_cache.stats()
+
+
+@router.post("/index/candidates", response_model=IndexCandidateResponse)
+def index_candidate(request: IndexCandidateRequest):
+    """Add or update a candidate in the search indexes"""
+    try:
+        embedding_id = search_service.get().index_candidate(
+            request.candidate_id,
+            request.text,
+            request.skills,
+            request.languages,
+            request.experience_years
+        )
+        return {
+            "candidate_id": request.candidate_id,
+            "embedding_id": embedding_id
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/index/events", status_code=202)
+async def index_events(request: IndexEventsRequest):
+    """Queue candidate insert/update/delete events for the background indexer"""
+    try:
+        return index_worker.get().submit(event.model_dump() for event in request.events)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/index/rebuild", status_code=202)
+async def rebuild_index(request: IndexRebuildRequest, background_tasks: BackgroundTasks):
+    """Re-sync the indexes from a full candidate snapshot, embedding on all cores
+
+    A large snapshot can be sent in pages, one rebuild at a time: each page
+    but the last sets last=false, and the last lists every snapshot id.
+    """
+    worker = index_worker.get()
+    # Claimed before the task is scheduled so a second request is refused at once
+    if not worker.begin_rebuild():
+        raise HTTPException(status_code=409, detail="A rebuild is already running")
+    records = [candidate.model_dump() for candidate in request.candidates]
+    background_tasks.add_task(worker.rebuild, records, request.force, request.last, request.snapshot_ids)
+    return {"accepted": len(records)}
+
+
+@router.get("/index/status")
+async def index_status():
+    """Queue depth, counters and last checkpoint of the background indexer"""
+    return index_worker.get().stats()
+
+
+@router.delete("/index/candidates/{candidate_id}")
+def remove_candidate(candidate_id: str):
+    """Remove a candidate from the search indexes"""
+    if not search_service.get().remove_candidate(candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not indexed")
+    return {"candidate_id": candidate_id, "removed": True}
+
+
+@router.post("/match/roles")
+def sync_job_roles(request: SyncJobRolesRequest):
+    """Add or update job roles and precompute their candidate scores"""
+    try:
+        match_engine.get().upsert_roles([role.model_dump() for role in request.roles])
+        return {"roles": len(match_engine.get().role_ids)}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/match/roles/{role_id}")
+def remove_job_role(role_id: str):
+    """Drop a job role from the match table"""
+    if not match_engine.get().remove_role(role_id):
+        raise HTTPException(status_code=404, detail="Job role not found")
+    return {"role_id": role_id, "removed": True}
+
+
+@router.post("/match/job-role", response_model=JobRoleMatchResponse)
+def match_job_role(request: JobRoleMatchRequest):
+    """Ranked candidate shortlist for a job role, from precomputed scores"""
+    search_service.get().refresh()
+    try:
+        matches = match_engine.get().match_job_role(request.role_id, request.top_k, request.min_score)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job role not found")
+    return {"role_id": request.role_id, "matches": matches}
+
+
+@router.post("/match/candidate", response_model=CandidateMatchResponse)
+def match_candidate(request: CandidateMatchRequest):
+    """Best-matching job roles for a candidate, from precomputed scores"""
+    search_service.get().refresh()
+    try:
+        matches = match_engine.get().match_candidate(request.candidate_id, request.top_k, request.min_score)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Candidate not indexed")
+    return {"candidate_id": request.candidate_id, "matches": matches}
+
+
 @router.post("/generate-summary", response_model=SummaryResponse)
 async def generate_summary(request: SummaryRequest):
     """Generate candidate summary"""
     try:
-        summary = summary_generator.generate_summary(
-            request.resume_text,
-            request.skills,
-            request.experience
-        )
+        queue = summary_queue.get()
+        # Reuse a summary the job queue already produced for the same resume
+        summary = await run_in_threadpool(
+            queue.finished_summary, request.resume_text, request.skills, request.experience
+        ) if queue is not None else None
+        if summary is None:
+            async with stage('summary'):
+                summary = await summary_generator.get().generate_summary_async(
+                    request.resume_text,
+                    request.skills,
+                    request.experience
+                )
+            fallback = summary_generator.get()._generate_simple_summary(request.skills, request.experience)
+            if queue is not None and summary != fallback:
+                await run_in_threadpool(
+                    queue.record, request.resume_text, request.skills, request.experience, summary
+                )
         
         return {
             "summary": summary
@@ -141,3 +528,74 @@ async def generate_summary(request: SummaryRequest):
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate-summary/stream")
+async def generate_summary_stream(request: SummaryRequest):
+    """Stream a summary as Server-Sent Events: 'token' chunks, then a 'done' event"""
+
+    async def events():
+        parts = []
+        async with stage('summary'):
+            async for delta in summary_generator.get().stream_summary(
+                request.resume_text,
+                request.skills,
+                request.experience
+            ):
+                parts.append(delta)
+                yield f"event: token\ndata: {SummaryResponse(summary=delta).model_dump_json()}\n\n"
+        summary = SummaryResponse(summary="".join(parts).strip())
+        yield f"event: done\ndata: {summary.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _summary_queue() -> SummaryQueue:
+    queue = summary_queue.get()
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Summary job queue is disabled")
+    return queue
+
+
+@router.post("/summary/jobs", response_model=SummaryJobResponse, status_code=202)
+def submit_summary_job(request: SummaryJobRequest):
+    """Queue an LLM summary; a job for the same resume is reused (and promoted to a higher priority)"""
+    return _summary_queue().submit(
+        request.resume_text,
+        request.skills,
+        request.experience,
+        request.priority,
+        request.candidate_id,
+        request.callback_url
+    )
+
+
+@router.get("/summary/stats")
+def summary_queue_stats():
+    """Jobs by status and worker counters of the summary job queue"""
+    queue = summary_queue.get()
+    if queue is None:
+        return {"enabled": False}
+    return {"enabled": True, **queue.stats()}
+
+
+@router.get("/summary/{job_id}", response_model=SummaryJobResponse)
+def get_summary_job(job_id: str):
+    """Status of a summary job; summary is the LLM summary once status is done"""
+    job = _summary_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Summary job not found")
+    return job
+
+
+@router.post("/summary/{job_id}/priority", response_model=SummaryJobResponse)
+def set_summary_priority(job_id: str, request: SummaryPriorityRequest):
+    """Reprioritise a queued summary job, e.g. to interactive when a recruiter opens the candidate"""
+    job = _summary_queue().set_priority(job_id, request.priority)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Summary job not found")
+    return job
@@ -0,0 +1,277 @@
+import asyncio
+import importlib
+import math
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import EXTRACTION_FAILURES, POOL_ACTIVE, POOL_RESTARTS
+
+try:
+    import resource
+except ImportError:  # Not on Windows; tasks then run without CPU and memory limits
+    resource = None
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_stage_limits: Dict[str, asyncio.Semaphore] = {}
+
+# Imported once in the fork server, so every extraction worker starts with them loaded
+EXTRACTION_MODULES = ["app.services.resume_parser", "PyPDF2", "pdfplumber", "docx"]
+
+# Documents at least this big reach workers through shared memory instead of the pool's pipe
+SHARED_MEMORY_MIN_BYTES = 64 * 1024
+
+
+class ExtractionLimitExceeded(Exception):
+    """A document hit the per-task CPU, memory or time limit of the extraction pool"""
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled HTTP client for resume downloads"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.download_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.download_concurrency,
+                max_keepalive_connections=settings.download_concurrency
+            ),
+            follow_redirects=True
+        )
+    return _http_client
+
+
+def extraction_worker_count() -> int:
+    """Number of extraction processes; defaults to the CPU count"""
+    return settings.extraction_workers or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Bounded process pool for CPU-heavy document extraction
+
+    Workers are forked from a fork server that has already imported the
+    document libraries, and each is replaced after
+    extraction_max_tasks_per_child tasks so leaks and fragmentation from
+    odd documents do not accumulate.
+    """
+    global _process_pool
+    if _process_pool is None:
+        method = settings.extraction_start_method
+        context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            context.set_forkserver_preload(EXTRACTION_MODULES)
+        _process_pool = ProcessPoolExecutor(
+            max_workers=extraction_worker_count(),
+            mp_context=context,
+            initializer=_init_worker,
+            # Recycling needs a fresh interpreter per worker, which fork cannot give
+            max_tasks_per_child=(settings.extraction_max_tasks_per_child or None) if method != "fork" else None
+        )
+    return _process_pool
+
+
+def warm_process_pool() -> ProcessPoolExecutor:
+    """Start every extraction worker now rather than on the first request"""
+    pool = get_process_pool()
+    for future in [pool.submit(os.getpid) for _ in range(extraction_worker_count())]:
+        future.result()
+    return pool
+
+
+def _restart_process_pool(pool: ProcessPoolExecutor, reason: str):
+    """Kill a wedged or broken pool; the next task starts a fresh one"""
+    global _process_pool
+    if _process_pool is not pool:
+        return
+    _process_pool = None
+    POOL_RESTARTS.inc(reason=reason)
+    print(f"Restarting extraction process pool ({reason})")
+    for process in list((pool._processes or {}).values()):
+        if process.is_alive():
+            process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _stage_capacity(name: str) -> int:
+    capacities = {
+        'download': settings.download_concurrency,
+        'extract': settings.extraction_concurrency or 2 * extraction_worker_count(),
+        'summary': settings.summary_concurrency,
+    }
+    return capacities.get(name, 1)
+
+
+@asynccontextmanager
+async def stage(name: str):
+    """Limit how many requests may be inside a pipeline stage at once"""
+    semaphore = _stage_limits.get(name)
+    if semaphore is None:
+        semaphore = _stage_limits[name] = asyncio.Semaphore(_stage_capacity(name))
+    async with semaphore:
+        yield
+
+
+async def run_in_process_pool(func, *args, pool: Optional[ProcessPoolExecutor] = None):
+    """Run a picklable function in the extraction process pool"""
+    loop = asyncio.get_running_loop()
+    POOL_ACTIVE.inc()
+    try:
+        return await loop.run_in_executor(pool or get_process_pool(), func, *args)
+    finally:
+        POOL_ACTIVE.dec()
+
+
+async def run_extraction(func: Callable, content: bytes, *args):
+    """Run func(content, *args) in the process pool, isolated from the API process
+
+    The task gets extraction_cpu_seconds of CPU and extraction_memory_mb of
+    extra address space inside its worker; exceeding either fails only this
+    document. A task still running after extraction_timeout (stuck in C
+    code) gets its pool killed and replaced. Other tasks lost with a dead
+    pool are retried once on the new one.
+    """
+    segment = None
+    payload: Union[bytes, Tuple[str, int]] = content
+    if len(content) >= SHARED_MEMORY_MIN_BYTES:
+        segment = shared_memory.SharedMemory(create=True, size=len(content))
+        segment.buf[:len(content)] = content
+        payload = (segment.name, len(content))
+
+    limits = (settings.extraction_cpu_seconds, settings.extraction_memory_mb)
+    try:
+        for attempt in range(2):
+            pool = get_process_pool()
+            try:
+                return await asyncio.wait_for(
+                    run_in_process_pool(_run_limited, func, payload, args, limits, pool=pool),
+                    settings.extraction_timeout or None
+                )
+            except asyncio.TimeoutError:
+                EXTRACTION_FAILURES.inc(reason="timeout")
+                _restart_process_pool(pool, "timeout")
+                raise ExtractionLimitExceeded(
+                    f"Document extraction took longer than {settings.extraction_timeout:g}s"
+                )
+            except BrokenProcessPool:
+                _restart_process_pool(pool, "worker_died")
+                if attempt:
+                    EXTRACTION_FAILURES.inc(reason="worker_died")
+                    raise Exception("Extraction worker died while parsing this document")
+            except ExtractionLimitExceeded as e:
+                EXTRACTION_FAILURES.inc(reason=e.args[1] if len(e.args) > 1 else "limit")
+                raise ExtractionLimitExceeded(e.args[0])
+    finally:
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+
+# ------------------------------------------------------- worker process side
+
+_task_cpu_seconds = 0
+
+
+def _init_worker():
+    """Extraction worker initializer: CPU limit handler and document libraries"""
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _cpu_limit_exceeded)
+    # Already imported under the fork server; needed with the spawn start method
+    for name in EXTRACTION_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def _cpu_limit_exceeded(signum, frame):
+    raise ExtractionLimitExceeded(
+        f"Document extraction used more than {_task_cpu_seconds}s of CPU", "cpu_limit"
+    )
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _set_task_limits(cpu_seconds: int, memory_mb: int) -> List[Tuple[int, Tuple[int, int]]]:
+    """Lower this worker's soft limits for one task; returns the limits to restore"""
+    global _task_cpu_seconds
+    if resource is None:
+        return []
+    previous = []
+    if cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # RLIMIT_CPU counts the whole process lifetime, so the limit is relative to what was used
+        limit = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        if hard == resource.RLIM_INFINITY or limit < hard:
+            previous.append((resource.RLIMIT_CPU, (soft, hard)))
+            resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+            _task_cpu_seconds = cpu_seconds
+    address_space = _address_space_bytes() if memory_mb else None
+    if address_space is not None:
+        limit = address_space + memory_mb * 1024 * 1024
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard == resource.RLIM_INFINITY or limit < hard:
+            previous.append((resource.RLIMIT_AS, (soft, hard)))
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return previous
+
+
+def _read_payload(payload: Union[bytes, Tuple[str, int]]) -> bytes:
+    if isinstance(payload, bytes):
+        return payload
+    name, size = payload
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(segment.buf[:size])
+    finally:
+        segment.close()
+
+
+def _run_limited(func: Callable, payload, args: tuple, limits: Tuple[int, int]):
+    """Worker-side wrapper applying the per-task limits around func"""
+    content = _read_payload(payload)
+    previous = _set_task_limits(*limits)
+    try:
+        return func(content, *args)
+    except MemoryError:
+        raise ExtractionLimitExceeded(
+            f"Document extraction needed more than {limits[1]} MB", "memory_limit"
+        )
+    finally:
+        for limit, values in reversed(previous):
+            resource.setrlimit(limit, values)
+
+
+def stages_in_use() -> Dict[str, int]:
+    """Requests currently holding a slot in each pipeline stage"""
+    return {
+        name: _stage_capacity(name) - semaphore._value
+        for name, semaphore in _stage_limits.items()
+    }
+
+
+async def shutdown():
+    """Release pooled connections and worker processes"""
+    global _http_client, _process_pool
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
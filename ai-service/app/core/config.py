@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -7,18 +8,97 @@ class Settings(BaseSettings):
     environment: str = "development"
     host: str = "0.0.0.0"
     port: int = 8000
+    workers: int = 1  # app.serve prefork workers; 0 = one per CPU
 
-    # GROQ API Configuration
-    groq_api_key: str
+    # GROQ API Configuration (without a key, summaries fall back to the rule-based text)
+    groq_api_key: Optional[str] = None
     groq_model: str = "llama-3.3-70b-versatile"
+    llm_requests_per_minute: int = 30
+    llm_tokens_per_minute: int = 12000
+    llm_timeout: float = 20.0
+    llm_max_retries: int = 3
+    llm_backoff_base: float = 0.5
     
+    # Embeddings
+    embedding_backend: str = "hashing"
+    embedding_dimension: int = 384
+    embedding_model_name: str = "all-MiniLM-L6-v2"
+
     # Search Configuration
     similarity_threshold: float = 0.5
     max_results: int = 20
 
+    # Vector Index
+    vector_index_type: str = "flat"
+    vector_index_path: str = "data/vector_index"
+    vector_index_save_interval: int = 100
+    ivf_nlist: int = 0
+    ivf_nprobe: int = 8
+    vector_quantization: str = "none"  # none | int8 | pq
+    pq_subvectors: int = 0  # 0 = dimension / 8 (one byte per 8 dimensions)
+    quantization_rescore: int = 8  # rows rescored exactly per result
+    embedding_store_path: str = "data/embeddings"
+
+    # Lexical index / hybrid ranking
+    lexical_index_path: str = "data/lexical_index.pkl"
+    rrf_k: int = 60
+
+    # Observability
+    metrics_enabled: bool = True
+
+    # Background indexing
+    index_checkpoint_path: str = "data/index_checkpoint.json"
+    index_batch_size: int = 64
+
+    # Job-role matching
+    job_roles_path: str = "data/job_roles.json"
+    match_skill_weight: float = 0.7
+
+    # Query cache
+    query_cache_size: int = 2048
+    query_cache_ttl_seconds: int = 3600
+    query_log_path: str = "data/query_log.json"
+    query_cache_prewarm: int = 50
+    query_cache_prewarm_max_age_days: int = 7
+
     # Processing
     max_text_length: int = 50000
-    chunk_size: int = 512
+    chunk_size: int = 512  # words per embedded chunk (capped to the model's input window)
+    chunk_overlap: int = 64  # words shared by consecutive chunks of a long section
+    skill_taxonomy_path: Optional[str] = None
+    pdf_extraction_mode: str = "fast"  # fast | accurate
+    pdf_max_pages: int = 20
+
+    # Concurrency
+    download_timeout: float = 30.0
+    download_concurrency: int = 32
+    extraction_workers: int = 0  # 0 = one per CPU
+    extraction_concurrency: int = 0  # 0 = twice the extraction workers
+    extraction_start_method: str = "forkserver"  # forkserver | spawn | fork (fork cannot recycle workers)
+    extraction_max_tasks_per_child: int = 200  # 0 = never recycle workers
+    extraction_cpu_seconds: int = 30  # per document; 0 = no limit
+    extraction_memory_mb: int = 1024  # extra address space per document; 0 = no limit
+    extraction_timeout: float = 90.0  # wall clock incl. queueing; the pool is replaced past it
+    summary_concurrency: int = 8
+
+    # Parse result cache (empty path disables it)
+    parse_cache_path: str = "data/parse_cache.sqlite3"
+    parse_cache_max_mb: int = 256
+
+    # Batch ingestion
+    batch_max_resumes: int = 500
+    summary_batch_size: int = 8
+    summary_batch_window_ms: int = 50
+
+    # Summary job queue, e.g. data/summary_jobs.sqlite3 (unset: /parse-resume waits for the LLM summary inline).
+    # With it set, /parse-resume returns the rule-based summary and a summary_job_id to poll for the LLM one.
+    summary_queue_path: Optional[str] = None
+    summary_workers: int = 2  # concurrent LLM calls per process; each takes up to summary_batch_size jobs
+    summary_max_attempts: int = 3
+    summary_retry_backoff: float = 30.0  # seconds before the first retry, doubling after
+    summary_job_lease: float = 120.0  # seconds before a claimed job counts as abandoned
+    summary_poll_interval: float = 1.0  # how soon jobs queued by other workers are noticed
+    summary_job_retention_days: int = 30
 
     class Config:
         env_file = ".env"
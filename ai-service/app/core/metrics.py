@@ -0,0 +1,320 @@
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+# Upper bounds in seconds; covers regex passes (sub-ms) through slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterator[Tuple[str, LabelKey, Optional[Tuple[str, str]], float]]:
+        return iter(())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(key, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic counter with optional labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not settings.metrics_enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", key, None, value
+
+
+class Gauge(Metric):
+    """Point-in-time value, either set directly or read from a callback at scrape time
+
+    A callback may return a number or a {label_value: number} dict keyed by
+    the value of label_name.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        function: Optional[Callable[[], object]] = None,
+        label_name: Optional[str] = None
+    ):
+        super().__init__(name, help)
+        self.function = function
+        self.label_name = label_name
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception as e:
+                print(f"Error collecting metric {self.name}: {e}")
+                return
+            if isinstance(value, dict):
+                for label_value, number in value.items():
+                    yield "", ((self.label_name, str(label_value)),), None, number
+            elif value is not None:
+                yield "", (), None, value
+            return
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", key, None, value
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List] = {}
+
+    def observe(self, value: float, **labels):
+        if not settings.metrics_enabled:
+            return
+        captured = getattr(_capture, "observations", None)
+        if captured is not None:
+            captured.append((self.name, labels, value))
+            return
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of a block; a no-op when metrics are off"""
+        if not settings.metrics_enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield "_bucket", key, ("le", _format_value(bound)), cumulative
+            yield "_sum", key, None, total
+            yield "_count", key, None, count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str) -> Counter:
+    return REGISTRY.register(Counter(name, help))
+
+
+def gauge(name: str, help: str, function: Optional[Callable[[], object]] = None, label_name: Optional[str] = None) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, function, label_name))
+
+
+def histogram(name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, buckets))
+
+
+# ------------------------------------------------------------ core metrics
+
+STAGE_SECONDS = histogram(
+    "talentvault_stage_seconds",
+    "Latency of pipeline stages (download, extraction, keyword scan, embedding, LLM, ranking)"
+)
+LLM_REQUESTS = counter("talentvault_llm_requests_total", "GROQ requests by outcome")
+LLM_TOKENS = counter("talentvault_llm_tokens_total", "GROQ tokens by kind (prompt, completion)")
+SEARCH_SECONDS = histogram("talentvault_search_seconds", "End-to-end candidate search latency by mode")
+POOL_ACTIVE = gauge("talentvault_process_pool_active_tasks", "Tasks running or queued in the extraction process pool")
+POOL_RESTARTS = counter("talentvault_process_pool_restarts_total", "Extraction pool replacements by reason")
+EXTRACTION_FAILURES = counter(
+    "talentvault_extraction_failures_total", "Documents rejected by the extraction pool's limits, by reason"
+)
+
+
+# ------------------------------------------------------------------ timing
+
+class _Timer:
+    """Context manager recording elapsed time into a histogram"""
+
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage: str):
+    """Context manager timing a block as a pipeline stage"""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def timed(stage: str):
+    """Decorator timing every call of a sync or async function as a pipeline stage"""
+
+    def decorate(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not settings.metrics_enabled:
+                    return await func(*args, **kwargs)
+                with STAGE_SECONDS.time(stage=stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.metrics_enabled:
+                return func(*args, **kwargs)
+            with STAGE_SECONDS.time(stage=stage):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+# ------------------------------------------------- worker process capture
+
+_capture = threading.local()
+
+
+@contextmanager
+def capture():
+    """Collect histogram observations made in this thread instead of recording them
+
+    Used in process-pool workers, whose registries are never scraped: the
+    observations are returned with the result and replayed in the parent.
+    """
+    previous = getattr(_capture, "observations", None)
+    _capture.observations = observations = []
+    try:
+        yield observations
+    finally:
+        _capture.observations = previous
+
+
+def replay(observations: List[Tuple[str, Dict[str, str], float]]):
+    """Record observations captured in another process"""
+    for name, labels, value in observations:
+        metric = REGISTRY.get(name)
+        if isinstance(metric, Histogram):
+            metric.observe(value, **labels)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    return REGISTRY.render()
@@ -0,0 +1,166 @@
+import asyncio
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+from app.core import metrics
+
+
+T = TypeVar("T")
+
+_started = time.perf_counter()
+_timings: Dict[str, float] = {}
+_frames = threading.local()
+_ready = threading.Event()
+_ready_after: Optional[float] = None
+
+# Set in each forked worker by app.serve; None when running a single process
+worker_id: Optional[int] = None
+worker_count = 1
+
+
+@contextmanager
+def _timing(name: str):
+    """Record a cold-start step's own time, excluding nested steps it triggered"""
+    stack = getattr(_frames, "stack", None)
+    if stack is None:
+        stack = _frames.stack = []
+    frame = [0.0]
+    stack.append(frame)
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - began
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+        _timings[name] = elapsed - frame[0]
+        print(f"Loaded {name} in {_timings[name] * 1000:.1f} ms")
+
+
+def load_module(name: str):
+    """Import a module on first use, recording how long the first import took"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _timing(f"import:{name}"):
+        return importlib.import_module(name)
+
+
+class Component(Generic[T]):
+    """A service built on first use, with its construction time recorded
+
+    get() is thread-safe; a failed build is retried on the next call.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self.loaded = False
+        self.error: Optional[str] = None
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        if self.loaded:
+            return self._value
+        with self._lock:
+            if not self.loaded:
+                try:
+                    with _timing(self.name):
+                        self._value = self.factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.error = None
+                self.loaded = True
+        return self._value
+
+    def peek(self) -> Optional[T]:
+        """The instance if already built, without building it"""
+        return self._value if self.loaded else None
+
+
+_components: Dict[str, Component] = {}
+
+
+def component(name: str, factory: Callable[[], T]) -> Component[T]:
+    _components[name] = item = Component(name, factory)
+    return item
+
+
+async def warm_up(components: Iterable[Component], modules: Iterable[str] = ()):
+    """Build components and import modules off the event loop, in order"""
+    loop = asyncio.get_running_loop()
+    for name in modules:
+        await loop.run_in_executor(None, load_module, name)
+    for item in components:
+        await loop.run_in_executor(None, item.get)
+
+
+def set_worker(identifier: int, count: int):
+    global worker_id, worker_count
+    worker_id = identifier
+    worker_count = count
+
+
+def is_primary() -> bool:
+    """Whether this process owns host-wide chores such as writing snapshots"""
+    return worker_id in (None, 0)
+
+
+def per_worker(path: str) -> str:
+    """Give each worker its own copy of a private state file, e.g. a queue checkpoint"""
+    if not path or worker_id is None:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.worker{worker_id}{extension}"
+
+
+def mark_ready():
+    global _ready_after
+    _ready_after = time.perf_counter() - _started
+    _ready.set()
+    print(f"Service ready {_ready_after:.2f}s after startup began")
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def timings() -> Dict[str, float]:
+    """Seconds spent building each component and importing each deferred module"""
+    return dict(_timings)
+
+
+def status() -> Dict:
+    return {
+        "ready": is_ready(),
+        "ready_after_seconds": round(_ready_after, 3) if _ready_after is not None else None,
+        "worker": worker_id,
+        "workers": worker_count,
+        "components": {
+            name: {
+                "loaded": item.loaded,
+                "seconds": round(_timings[name], 4) if name in _timings else None,
+                "error": item.error,
+            }
+            for name, item in _components.items()
+        },
+        "imports": {
+            name.split(":", 1)[1]: round(seconds, 4)
+            for name, seconds in _timings.items() if name.startswith("import:")
+        },
+    }
+
+
+metrics.gauge(
+    "talentvault_startup_seconds", "Cold-start time per component and deferred import",
+    timings,
+    "component"
+)
@@ -1,7 +1,17 @@
+import asyncio
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.routes import router
+from app.core import concurrency, startup
+from app.api.routes import (
+    router, SERVICES, embedding_service, search_service, parse_cache, summary_queue, index_worker
+)
+
+# Modules deferred at import but needed by the first parse or summary
+WARM_MODULES = ["requests", "PyPDF2", "pdfplumber", "docx", "groq"]
+
+_warm_up_task: Optional[asyncio.Task] = None
 
 # Create FastAPI app
 app = FastAPI(
@@ -32,6 +42,56 @@ async def startup_event():
     print(f"Model: {settings.groq_model}")
     print("=" * 60)
 
+    # Build services in the background so /health answers at once; /ready flips when done
+    global _warm_up_task
+    _warm_up_task = asyncio.create_task(warm_up())
+
+
+async def warm_up():
+    """Build every service and load deferred modules, then report ready"""
+    try:
+        await startup.warm_up(SERVICES, WARM_MODULES)
+    except Exception as e:
+        print(f"Startup warm-up failed: {e}")
+        return
+
+    index_worker.get().start()
+    if summary_queue.get() is not None:
+        summary_queue.get().start()
+
+    # Pre-warm the query cache from the most frequent recent searches
+    service = embedding_service.get()
+    service.query_cache.load_log(settings.query_log_path)
+    queries = service.query_cache.frequent_queries(
+        settings.query_cache_prewarm,
+        settings.query_cache_prewarm_max_age_days * 86400
+    )
+    if queries:
+        asyncio.get_running_loop().run_in_executor(None, service.warm_queries, queries)
+
+    startup.mark_ready()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Shutdown event"""
+    if _warm_up_task is not None and not _warm_up_task.done():
+        _warm_up_task.cancel()
+    # Only services that were actually built have anything to flush
+    if index_worker.loaded:
+        await index_worker.get().stop()
+    if summary_queue.peek() is not None:
+        await summary_queue.peek().stop()
+    if search_service.loaded:
+        search_service.get().save()
+    if embedding_service.loaded and startup.is_primary():
+        embedding_service.get().query_cache.save_log(settings.query_log_path)
+    await concurrency.shutdown()
+    if parse_cache.peek() is not None:
+        parse_cache.peek().close()
+    if summary_queue.peek() is not None:
+        summary_queue.peek().close()
+
 
 @app.get("/")
 async def root():
@@ -42,10 +102,19 @@ async def root():
         "status": "running",
         "endpoints": [
             "/health",
+            "/ready",
             "/parse-resume",
+            "/parse-resumes/batch",
+            "/parse-resumes/batch/stream",
             "/generate-embeddings",
             "/semantic-search",
-            "/generate-summary"
+            "/generate-summary",
+            "/summary/jobs",
+            "/summary/{job_id}",
+            "/index/candidates",
+            "/index/events",
+            "/match/job-role",
+            "/match/candidate"
         ]
     }
 
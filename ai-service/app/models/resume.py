@@ -0,0 +1,215 @@
+import struct
+import sys
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class SkillVocabulary:
+    """Process-wide table interning canonical skill names to small integer ids
+
+    Ids are only meaningful inside one process; anything written to disk or
+    sent to another process carries skill names (see ParsedResume.to_bytes).
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        skill_id = self.ids.get(name)
+        if skill_id is not None:
+            return skill_id
+        with self._lock:
+            skill_id = self.ids.get(name)
+            if skill_id is None:
+                skill_id = len(self.names)
+                self.names.append(sys.intern(name))
+                self.ids[self.names[skill_id]] = skill_id
+        return skill_id
+
+    def intern_all(self, names: Iterable[str]) -> array:
+        return array('I', (self.intern(name) for name in names))
+
+    def lookup(self, skill_ids: Iterable[int]) -> List[str]:
+        names = self.names
+        return [names[skill_id] for skill_id in skill_ids]
+
+
+SKILL_VOCABULARY = SkillVocabulary()
+
+# (degree, institution, field, year)
+EducationEntry = Tuple[str, str, Optional[str], Optional[int]]
+# (name, year)
+CertificationEntry = Tuple[str, Optional[int]]
+
+# extracted_text in API responses is capped; the full text is only used for indexing
+EXTRACTED_TEXT_LIMIT = 10000
+
+_FORMAT_VERSION = 1
+# magic, format version, experience years, skill/language/education/certification counts, text bytes
+_HEADER = struct.Struct("<2sBHHBBBI")
+_MAGIC = b"PR"
+_STRING = struct.Struct("<H")
+_YEAR = struct.Struct("<H")
+_NONE = 0xFFFF
+
+
+def _pack_string(out: bytearray, value: Optional[str]):
+    if value is None:
+        out += _STRING.pack(_NONE)
+        return
+    data = value.encode("utf-8")[:_NONE - 1]
+    out += _STRING.pack(len(data))
+    out += data
+
+
+def _unpack_string(view: memoryview, offset: int) -> Tuple[Optional[str], int]:
+    (length,) = _STRING.unpack_from(view, offset)
+    offset += _STRING.size
+    if length == _NONE:
+        return None, offset
+    return str(view[offset:offset + length], "utf-8", "replace"), offset + length
+
+
+def _pack_year(out: bytearray, year: Optional[int]):
+    out += _YEAR.pack(year if year is not None and 0 < year < _NONE else 0)
+
+
+def _unpack_year(view: memoryview, offset: int) -> Tuple[Optional[int], int]:
+    (year,) = _YEAR.unpack_from(view, offset)
+    return (year or None), offset + _YEAR.size
+
+
+@dataclass(slots=True)
+class ParsedResume:
+    """Compact internal form of a parsed resume
+
+    Skills are ids into SKILL_VOCABULARY, languages are interned strings and
+    education and certifications are plain tuples, so a record costs a few
+    hundred bytes besides its text. Convert to the API payload with to_dict()
+    only when building a response.
+    """
+
+    text: str
+    skill_ids: array
+    languages: Tuple[str, ...]
+    education: Tuple[EducationEntry, ...]
+    certifications: Tuple[CertificationEntry, ...]
+    experience_years: int
+
+    @classmethod
+    def build(
+        cls,
+        text: str,
+        skills: Iterable[str],
+        languages: Iterable[str],
+        education: Iterable[EducationEntry] = (),
+        certifications: Iterable[CertificationEntry] = (),
+        experience_years: int = 0
+    ) -> "ParsedResume":
+        return cls(
+            text,
+            SKILL_VOCABULARY.intern_all(skills),
+            tuple(sys.intern(language) for language in languages),
+            tuple(education),
+            tuple(certifications),
+            experience_years
+        )
+
+    @property
+    def skills(self) -> List[str]:
+        return SKILL_VOCABULARY.lookup(self.skill_ids)
+
+    # ---------------------------------------------------------- API boundary
+
+    def to_dict(self) -> Dict:
+        """Fields in the shape of ResumeParseResponse (minus summary and embedding_id)"""
+        return {
+            'extracted_text': self.text[:EXTRACTED_TEXT_LIMIT],
+            'skills': self.skills,
+            'education': [
+                {'degree': degree, 'institution': institution, 'field': field, 'year': year}
+                for degree, institution, field, year in self.education
+            ],
+            'certifications': [{'name': name, 'year': year} for name, year in self.certifications],
+            'experience_years': self.experience_years,
+            'languages': list(self.languages),
+        }
+
+    # --------------------------------------------------------- serialization
+
+    def to_bytes(self) -> bytes:
+        """Struct-packed binary form; skills are written by name so it is portable across processes"""
+        text = self.text.encode("utf-8")
+        skills = self.skills
+        out = bytearray(_HEADER.pack(
+            _MAGIC,
+            _FORMAT_VERSION,
+            max(0, min(self.experience_years, _NONE)),
+            len(skills),
+            min(len(self.languages), 255),
+            min(len(self.education), 255),
+            min(len(self.certifications), 255),
+            len(text)
+        ))
+        for skill in skills:
+            _pack_string(out, skill)
+        for language in self.languages[:255]:
+            _pack_string(out, language)
+        for degree, institution, field, year in self.education[:255]:
+            _pack_string(out, degree)
+            _pack_string(out, institution)
+            _pack_string(out, field)
+            _pack_year(out, year)
+        for name, year in self.certifications[:255]:
+            _pack_string(out, name)
+            _pack_year(out, year)
+        out += text
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ParsedResume":
+        """Decode to_bytes() output, reading fields in place from the buffer"""
+        view = memoryview(data)
+        magic, version, experience_years, skill_count, language_count, education_count, \
+            certification_count, text_length = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise Exception(f"Unsupported parsed resume format: {bytes(magic)!r} v{version}")
+        offset = _HEADER.size
+
+        skill_ids = array('I')
+        for _ in range(skill_count):
+            skill, offset = _unpack_string(view, offset)
+            skill_ids.append(SKILL_VOCABULARY.intern(skill))
+        languages = []
+        for _ in range(language_count):
+            language, offset = _unpack_string(view, offset)
+            languages.append(sys.intern(language))
+        education = []
+        for _ in range(education_count):
+            degree, offset = _unpack_string(view, offset)
+            institution, offset = _unpack_string(view, offset)
+            field, offset = _unpack_string(view, offset)
+            year, offset = _unpack_year(view, offset)
+            education.append((degree, institution, field, year))
+        certifications = []
+        for _ in range(certification_count):
+            name, offset = _unpack_string(view, offset)
+            year, offset = _unpack_year(view, offset)
+            certifications.append((name, year))
+        text = str(view[offset:offset + text_length], "utf-8")
+
+        return cls(
+            text, skill_ids, tuple(languages), tuple(education), tuple(certifications), experience_years
+        )
+
+    def __reduce__(self):
+        # Skill ids differ between processes, so pickling (e.g. back from the
+        # process pool) goes through the name-based binary form
+        return (ParsedResume.from_bytes, (self.to_bytes(),))
@@ -1,10 +1,15 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 
 
 class ResumeParseRequest(BaseModel):
     resume_url: str = Field(..., description="URL of the resume file")
     filename: str = Field(..., description="Original filename")
+    candidate_id: Optional[str] = Field(None, description="Candidate to index the parsed resume under")
+    summary_priority: Optional[Literal["interactive", "normal", "bulk"]] = Field(
+        None, description="Summary job priority; defaults to normal, or bulk for batches"
+    )
+    summary_callback_url: Optional[str] = Field(None, description="Webhook that receives the finished summary job")
 
 
 class Education(BaseModel):
@@ -28,6 +33,25 @@ class ResumeParseResponse(BaseModel):
     certifications: List[Certification]
     languages: List[str]
     embedding_id: Optional[str] = None
+    summary_job_id: Optional[str] = Field(
+        None, description="Set while summary is the rule-based stand-in; poll /summary/{job_id} for the LLM summary"
+    )
+
+
+class BatchParseRequest(BaseModel):
+    resumes: List[ResumeParseRequest] = Field(..., description="Resumes to parse")
+
+
+class BatchParseItem(BaseModel):
+    index: int = Field(..., description="Position of the resume in the request")
+    resume_url: str
+    candidate_id: Optional[str] = None
+    result: Optional[ResumeParseResponse] = None
+    error: Optional[str] = None
+
+
+class BatchParseResponse(BaseModel):
+    results: List[BatchParseItem]
 
 
 class EmbeddingRequest(BaseModel):
@@ -42,6 +66,14 @@ class EmbeddingResponse(BaseModel):
 class SearchRequest(BaseModel):
     query: str = Field(..., description="Natural language search query")
     candidate_ids: List[str] = Field(default_factory=list, description="List of candidate IDs to search")
+    required_skills: List[str] = Field(default_factory=list, description="Skills every result must have")
+    languages: List[str] = Field(default_factory=list, description="Languages every result must speak")
+    min_experience_years: Optional[int] = Field(None, ge=0, description="Minimum years of experience")
+    mode: Literal["hybrid", "lexical", "vector"] = Field("hybrid", description="Ranking mode")
+
+
+class WarmQueriesRequest(BaseModel):
+    queries: List[str] = Field(..., description="Search queries to pre-compute, most frequent first")
 
 
 class SearchResult(BaseModel):
@@ -53,6 +85,94 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     query: str
     results: List[SearchResult]
+    stage: Optional[str] = Field(None, description="Ranking stage of a streamed chunk; 'final' is complete")
+
+
+class IndexCandidateRequest(BaseModel):
+    candidate_id: str
+    text: str = Field(..., description="Resume text to embed")
+    skills: List[str] = Field(default_factory=list)
+    languages: List[str] = Field(default_factory=list)
+    experience_years: int = 0
+
+
+class IndexEvent(BaseModel):
+    op: Literal["upsert", "delete"] = "upsert"
+    candidate_id: str
+    text: Optional[str] = Field(None, description="Resume text; if omitted, resume_url is parsed")
+    skills: List[str] = Field(default_factory=list)
+    languages: List[str] = Field(default_factory=list)
+    experience_years: int = 0
+    resume_url: Optional[str] = None
+    filename: Optional[str] = None
+
+
+class IndexEventsRequest(BaseModel):
+    events: List[IndexEvent] = Field(..., description="Candidate inserts, updates and deletes")
+
+
+class IndexRebuildRequest(BaseModel):
+    candidates: List[IndexEvent] = Field(..., description="Full snapshot of indexable candidates, or one page of it")
+    force: bool = Field(False, description="Re-embed candidates even if unchanged")
+    last: bool = Field(True, description="False for every page of a paged snapshot but the last; only the last removes candidates")
+    snapshot_ids: List[str] = Field(
+        default_factory=list, description="On the last page of a paged snapshot: ids of every candidate in the snapshot"
+    )
+
+
+class IndexCandidateResponse(BaseModel):
+    candidate_id: str
+    embedding_id: str
+
+
+class JobRole(BaseModel):
+    id: str
+    role_name: str
+    category: Optional[str] = None
+    requirements: Optional[str] = None
+    description: Optional[str] = None
+
+
+class SyncJobRolesRequest(BaseModel):
+    roles: List[JobRole] = Field(..., description="job_roles rows to add or replace")
+
+
+class JobRoleMatchRequest(BaseModel):
+    role_id: str
+    top_k: int = Field(20, ge=1, le=500)
+    min_score: float = Field(0, ge=0, le=100)
+
+
+class CandidateMatch(BaseModel):
+    candidate_id: str
+    match_score: float
+    matching_skills: List[str]
+    missing_skills: List[str]
+
+
+class JobRoleMatchResponse(BaseModel):
+    role_id: str
+    matches: List[CandidateMatch]
+
+
+class CandidateMatchRequest(BaseModel):
+    candidate_id: str
+    top_k: int = Field(3, ge=1, le=100)
+    min_score: float = Field(0, ge=0, le=100)
+
+
+class RoleMatch(BaseModel):
+    role_id: str
+    role_name: str
+    category: Optional[str] = None
+    match_score: float
+    matching_skills: List[str]
+    missing_skills: List[str]
+
+
+class CandidateMatchResponse(BaseModel):
+    candidate_id: str
+    matches: List[RoleMatch]
 
 
 class SummaryRequest(BaseModel):
@@ -65,6 +185,30 @@ class SummaryResponse(BaseModel):
     summary: str
 
 
+class SummaryJobRequest(SummaryRequest):
+    candidate_id: Optional[str] = None
+    priority: Literal["interactive", "normal", "bulk"] = Field(
+        "normal", description="interactive (recruiter viewing the candidate) runs first, bulk last"
+    )
+    callback_url: Optional[str] = Field(None, description="Webhook that receives the job once it finishes")
+
+
+class SummaryPriorityRequest(BaseModel):
+    priority: Literal["interactive", "normal", "bulk"]
+
+
+class SummaryJobResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    priority: str
+    summary: str = Field(..., description="LLM summary once done; the rule-based summary until then or on failure")
+    error: Optional[str] = None
+    attempts: int
+    candidate_id: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
@@ -0,0 +1,126 @@
+"""Multi-worker server: preload once, then fork workers that share the listening socket
+
+    python -m app.serve --workers 4
+
+The parent builds the shared services (indexes, match table, compiled
+matchers) and imports the heavy document and LLM libraries, then forks. Workers
+inherit all of it copy-on-write, so N workers cost little more memory than one.
+
+All index writes go through the embedding store's append-only log under its
+file lock (single writer at a time). Each write publishes a sequence number
+in the store's memory-mapped VERSION file; every worker checks it before
+reads and replays only the changed candidates, so all workers answer alike.
+Worker 0 is the only one that writes index snapshots and the query log.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+import traceback
+from typing import Dict
+
+from app.core import startup
+from app.core.config import settings
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """Build the fork-safe services and import deferred modules in the parent"""
+    from app.main import WARM_MODULES
+    from app.api.routes import SHARED_SERVICES
+
+    for name in WARM_MODULES:
+        startup.load_module(name)
+    for component in SHARED_SERVICES:
+        component.get()
+    # Objects that exist now are never collected, so the collector does not
+    # write to (and thereby copy) the pages workers inherit
+    gc.collect()
+    gc.freeze()
+
+
+def _run_worker(worker_id: int, count: int, sock: socket.socket, log_level: str):
+    import uvicorn
+    from app.main import app
+    from app.api.routes import search_service
+
+    startup.set_worker(worker_id, count)
+    search_service.get().set_snapshot_writer(startup.is_primary())
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the AI service with preloaded, forked workers")
+    parser.add_argument("--workers", type=int, default=settings.workers, help="0 = one per CPU")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    count = args.workers or os.cpu_count() or 1
+    sock = _bind(args.host, args.port)
+    preload()
+
+    workers: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(worker_id: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(worker_id, count, sock, args.log_level)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        workers[pid] = worker_id
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for worker_id in range(count):
+        spawn(worker_id)
+    print(f"Serving on {args.host}:{args.port} with {count} workers (parent pid {os.getpid()})")
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        worker_id = workers.pop(pid, None)
+        if worker_id is None or stopping:
+            continue
+        print(f"Worker {worker_id} (pid {pid}) exited with status {status}; restarting")
+        # Avoid a hot loop if workers die at startup
+        time.sleep(1)
+        spawn(worker_id)
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
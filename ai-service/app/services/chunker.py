@@ -0,0 +1,137 @@
+import re
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from app.services.embedding_backends import embed_texts, normalize_rows
+from app.services.section_extractor import HEADING_ANYCASE_RE, HEADING_RE
+
+
+WORD_RE = re.compile(r'\S+')
+
+
+class TextChunker:
+    """Split a resume into overlapping chunks for multi-vector embedding
+
+    Section headings (Experience, Education, ...) are chunk boundaries, and
+    short neighbouring sections are packed together up to chunk_size words.
+    A section longer than that is cut into windows of chunk_size words that
+    overlap by overlap words, so a role described across a window edge is
+    still seen whole by one chunk. Text past max_length characters is dropped.
+    """
+
+    def __init__(self, chunk_size: int = 512, overlap: int = 64, max_length: int = 50000):
+        self.chunk_size = max(1, chunk_size)
+        self.overlap = max(0, min(overlap, self.chunk_size // 2))
+        self.max_length = max_length
+
+    def max_chunks(self) -> int:
+        """Upper bound on the chunks split() returns for any text"""
+        # Words are at least one character plus a separator
+        words = self.max_length // 2 + 1
+        return max(1, -(-words // (self.chunk_size - self.overlap)) + 1)
+
+    def split(self, text: str) -> List[str]:
+        """Chunks of text in order; a short text is one chunk"""
+        text = text[:self.max_length].strip()
+        if not text:
+            return []
+
+        words = [match.span() for match in WORD_RE.finditer(text)]
+        if len(words) <= self.chunk_size:
+            return [text]
+
+        chunks: List[str] = []
+        # Words of the sections packed so far, as (first, last) word positions
+        packed: List[Tuple[int, int]] = []
+        for first, last in self._sections(text, words):
+            if last - first > self.chunk_size:
+                self._flush(text, words, packed, chunks)
+                chunks.extend(self._windows(text, words, first, last))
+                continue
+            if packed and last - packed[0][0] > self.chunk_size:
+                self._flush(text, words, packed, chunks)
+            packed.append((first, last))
+        self._flush(text, words, packed, chunks)
+        return chunks[:self.max_chunks()]
+
+    def _sections(self, text: str, words: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """(first, last) word positions of each section, split before each heading"""
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            headings = HEADING_RE.finditer("\n" + lowered)
+        else:
+            headings = HEADING_ANYCASE_RE.finditer("\n" + text)
+
+        sections = []
+        first = 0
+        position = 0
+        for heading in headings:
+            # Offsets into "\n" + text are one past the same offsets into text
+            start = heading.start()
+            while position < len(words) and words[position][0] < start:
+                position += 1
+            if position > first:
+                sections.append((first, position))
+                first = position
+        sections.append((first, len(words)))
+        return sections
+
+    def _windows(self, text: str, words: List[Tuple[int, int]], first: int, last: int) -> List[str]:
+        step = self.chunk_size - self.overlap
+        windows = []
+        for start in range(first, last, step):
+            end = min(start + self.chunk_size, last)
+            windows.append(text[words[start][0]:words[end - 1][1]])
+            if end == last:
+                break
+        return windows
+
+    @staticmethod
+    def _flush(text: str, words: List[Tuple[int, int]], packed: List[Tuple[int, int]], chunks: List[str]):
+        if packed:
+            chunks.append(text[words[packed[0][0]][0]:words[packed[-1][1] - 1][1]])
+            packed.clear()
+
+
+def pool_chunks(vectors: np.ndarray) -> np.ndarray:
+    """Rows stored for one document: its chunk vectors, led by their normalised mean
+
+    The leading row stands for the whole document wherever a single vector is
+    needed (e.g. role matching); search scores every row and keeps
+    each candidate's best (max-sim). A one-chunk document is just that row.
+    """
+    if len(vectors) <= 1:
+        return vectors
+    pooled = normalize_rows(vectors.mean(axis=0, keepdims=True))
+    return np.vstack([pooled, vectors])
+
+
+def embed_documents(
+    embed: Callable[[List[str]], np.ndarray],
+    chunker: TextChunker,
+    texts: List[str]
+) -> List[np.ndarray]:
+    """Multi-vector rows for each text (see pool_chunks), embedding every chunk in one batch"""
+    chunked = [chunker.split(text) or [text] for text in texts]
+    flat = [chunk for chunks in chunked for chunk in chunks]
+    matrix = embed(flat) if flat else None
+    documents = []
+    start = 0
+    for chunks in chunked:
+        documents.append(pool_chunks(matrix[start:start + len(chunks)]))
+        start += len(chunks)
+    return documents
+
+
+def embed_chunked(
+    name: str,
+    dimension: int,
+    model_name: str,
+    chunker: TextChunker,
+    texts: List[str]
+) -> List[np.ndarray]:
+    """embed_documents with a per-process backend; picklable for process pools"""
+    return embed_documents(
+        lambda chunks: embed_texts(name, dimension, model_name, chunks), chunker, texts
+    )
@@ -0,0 +1,156 @@
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+
+class EmbeddingBackend:
+    """Base class for in-process embedding backends"""
+
+    name = "base"
+    dimension = 0
+    # Longest input the model reads, in tokens; None when input length is unbounded
+    max_tokens: Optional[int] = None
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into an (n, dimension) float32 matrix"""
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text into a float32 vector"""
+        return self.embed([text])[0]
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """Hashed word, word-bigram and character n-gram features projected into a fixed-size vector"""
+
+    name = "hashing"
+
+    def __init__(self, dimension: int = 384, char_ngrams: Tuple[int, int] = (3, 4)):
+        self.dimension = dimension
+        self.char_ngrams = char_ngrams
+        # Token features are cached per instance; resume vocabulary is heavily repeated
+        self._token_features = lru_cache(maxsize=200_000)(self._compute_token_features)
+
+    def _hash(self, feature: str) -> Tuple[int, float]:
+        """Stable hash of a feature into (bucket, sign)"""
+        h = zlib.crc32(feature.encode("utf-8"))
+        return h % self.dimension, 1.0 if (h >> 31) & 1 else -1.0
+
+    def _compute_token_features(self, token: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+        """Hash a token and its character n-grams"""
+        buckets = []
+        signs = []
+
+        bucket, sign = self._hash("w:" + token)
+        # Whole-word features carry more weight than sub-word n-grams
+        buckets.append(bucket)
+        signs.append(2.0 * sign)
+
+        padded = f"<{token}>"
+        low, high = self.char_ngrams
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                bucket, sign = self._hash("c:" + padded[i:i + n])
+                buckets.append(bucket)
+                signs.append(sign)
+
+        return tuple(buckets), tuple(signs)
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        """Project one text into the hashed feature space"""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        buckets: List[int] = []
+        signs: List[float] = []
+
+        for token in tokens:
+            token_buckets, token_signs = self._token_features(token)
+            buckets.extend(token_buckets)
+            signs.extend(token_signs)
+
+        for first, second in zip(tokens, tokens[1:]):
+            bucket, sign = self._hash(f"b:{first} {second}")
+            buckets.append(bucket)
+            signs.append(sign)
+
+        if not buckets:
+            return np.zeros(self.dimension, dtype=np.float32)
+
+        return np.bincount(
+            np.asarray(buckets, dtype=np.int64),
+            weights=np.asarray(signs, dtype=np.float64),
+            minlength=self.dimension
+        ).astype(np.float32)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            matrix[i] = self._vectorize(text)
+        return normalize_rows(matrix)
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Local sentence-transformers model, loaded on first use"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 32):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise Exception(
+                "sentence-transformers is not installed; use EMBEDDING_BACKEND=hashing"
+            ) from e
+
+        self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.max_tokens = self.model.max_seq_length
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return normalize_rows(matrix.astype(np.float32, copy=False))
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row in place, leaving all-zero rows untouched"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def get_embedding_backend(
+    name: str = "hashing",
+    dimension: int = 384,
+    model_name: str = "all-MiniLM-L6-v2"
+) -> EmbeddingBackend:
+    """Create an embedding backend by name"""
+    if name == HashingEmbeddingBackend.name:
+        return HashingEmbeddingBackend(dimension=dimension)
+    if name == SentenceTransformerBackend.name:
+        return SentenceTransformerBackend(model_name=model_name)
+    raise ValueError(f"Unknown embedding backend: {name}")
+
+
+# Per-process backend cache for embedding in pool workers
+_worker_backends: Dict[tuple, EmbeddingBackend] = {}
+
+
+def embed_texts(name: str, dimension: int, model_name: str, texts: List[str]) -> np.ndarray:
+    """Embed texts with a backend built once per process; picklable for process pools"""
+    key = (name, dimension, model_name)
+    backend = _worker_backends.get(key)
+    if backend is None:
+        backend = _worker_backends[key] = get_embedding_backend(name, dimension, model_name)
+    return backend.embed(texts)
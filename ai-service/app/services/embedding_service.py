@@ -1,75 +1,394 @@
-from groq import Groq
-from typing import List, Dict
+from typing import List, Dict, Optional
 import hashlib
 import json
 import re
+import threading
+import numpy as np
+from app.core import metrics
+from app.models.resume import ParsedResume
+from app.services.chunker import TextChunker, embed_documents
+from app.services.embedding_backends import get_embedding_backend
+from app.services.vector_index import create_index, load_index
+from app.services.embedding_store import EmbeddingStore
+from app.services.llm_client import LLMClient, get_llm_client
+from app.services.query_cache import QueryCache
+from app.services.scoring import FeatureMatrix
 
 
 class EmbeddingService:
     """Service for generating embeddings and search using GROQ"""
 
-    def __init__(self, api_key: str, model: str = "llama-3.3-70b-versatile"):
+    def __init__(
+        self,
+        api_key: Optional[str],
+        model: str = "llama-3.3-70b-versatile",
+        backend: str = "hashing",
+        dimension: int = 384,
+        backend_model_name: str = "all-MiniLM-L6-v2",
+        index_type: str = "flat",
+        index_path: Optional[str] = None,
+        index_save_interval: int = 100,
+        ivf_nlist: int = 0,
+        ivf_nprobe: int = 8,
+        quantization: str = "none",
+        pq_subvectors: int = 0,
+        quantization_rescore: int = 8,
+        store_path: Optional[str] = None,
+        llm_client: Optional[LLMClient] = None,
+        query_cache: Optional[QueryCache] = None,
+        chunk_size: int = 512,
+        chunk_overlap: int = 64,
+        max_text_length: int = 50000
+    ):
         print(f"Initializing GROQ client with model: {model}")
-        self.client = Groq(api_key=api_key)
+        self.llm = llm_client or get_llm_client(api_key, model)
         self.model = model
-        self.embeddings_cache = {}
-        print("GROQ client initialized successfully")
+        self.query_cache = query_cache or QueryCache()
+        self.backend = get_embedding_backend(backend, dimension, backend_model_name)
+        # Arguments for rebuilding the backend in worker processes (see embed_texts)
+        self.backend_config = (backend, dimension, backend_model_name)
+        # Chunks are counted in words and must fit the model's input window (a
+        # word is about 1.3 model tokens), or their tails are cut off
+        if self.backend.max_tokens:
+            chunk_size = min(chunk_size, self.backend.max_tokens * 3 // 4)
+        self.chunker = TextChunker(chunk_size, chunk_overlap, max_text_length)
+        self.store = EmbeddingStore(store_path, self.backend.dimension) if store_path else None
 
-    def generate_embedding(self, text: str) -> List[str]:
-        """Generate embedding representation using GROQ"""
+        self.index_path = index_path
+        self.index_save_interval = index_save_interval
+        quantization_options = {
+            'quantization': quantization,
+            'pq_subvectors': pq_subvectors,
+            'rescore': quantization_rescore,
+            # A quantized index rescores from the store's memory map instead of a private float32 copy
+            'row_source': self._stored_rows if self.store is not None else None,
+        }
+        if index_path:
+            self.index = load_index(
+                index_path, index_type, self.backend.dimension, ivf_nlist, ivf_nprobe, **quantization_options
+            )
+        else:
+            self.index = create_index(
+                index_type, self.backend.dimension, ivf_nlist, ivf_nprobe, **quantization_options
+            )
+        self._index_lock = threading.Lock()
+        self._unsaved_changes = 0
+        # Only one process should write index snapshots when several share the store
+        self.snapshot_writer = True
+        self._feature_matrix: Optional[FeatureMatrix] = None
+        if self.store is not None:
+            self._sync_index_from_store()
+
+        print(f"GROQ client initialized successfully (embedding backend: {self.backend.name})")
+        quantizer = self.index.quantizer
+        print(
+            f"Vector index ({self.index.kind}, {quantizer.kind if quantizer else 'float32'}) "
+            f"loaded with {self.index.candidate_count()} candidates"
+        )
+
+    def generate_embedding(self, text: str) -> List[float]:
+        """Generate a dense embedding vector for text"""
         if not text or len(text.strip()) == 0:
             raise ValueError("Text cannot be empty")
-        
-        # Truncate text if too long
-        max_length = 5000
-        if len(text) > max_length:
-            text = text[:max_length]
-        
-        # Use GROQ to extract key features as a structured embedding
+
+        return self.backend.embed_one(text).tolist()
+
+    @metrics.timed('embed')
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate dense embedding vectors for a batch of texts"""
+        if not texts:
+            return np.zeros((0, self.backend.dimension), dtype=np.float32)
+        return self.backend.embed(texts)
+
+    @metrics.timed('embed_documents')
+    def embed_documents(self, texts: List[str]) -> List[np.ndarray]:
+        """Multi-vector embeddings for documents: a pooled row, then one row per chunk
+
+        Every chunk of every text goes to the backend in one batch. A text
+        that fits in one chunk gets a single row.
+        """
+        return embed_documents(self.generate_embeddings, self.chunker, texts)
+
+    def generate_embedding_id(self, text: str) -> str:
+        """Generate unique ID for embedding"""
+        return hashlib.md5(text.encode()).hexdigest()
+
+    def store_embedding(
+        self,
+        candidate_id: str,
+        text: str,
+        embedding: List[float],
+        features: List[str] = None
+    ):
+        """Store embedding in the on-disk embedding store"""
+        if self.store is None:
+            raise Exception("Embedding store is not configured")
+        self.store.put(
+            candidate_id,
+            np.asarray(embedding, dtype=np.float32),
+            embedding_id=self.generate_embedding_id(text),
+            features=features,
+            preview=text
+        )
+        self._update_features(candidate_id, features or [])
+
+    def get_embedding(self, candidate_id: str) -> List[float]:
+        """Get embedding from the on-disk embedding store"""
+        if self.store is not None:
+            vector = self.store.get(candidate_id)
+            if vector is not None:
+                return vector.tolist()
+        return []
+
+    def _stored_rows(self, candidate_ids: List[str], keys: List[str]) -> np.ndarray:
+        """Float32 rows of the store for index rows (by row key); NaN rows where the store has moved on"""
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        for position, (candidate_id, key) in enumerate(zip(candidate_ids, keys)):
+            meta = self.store.get_meta(candidate_id)
+            if meta is None:
+                continue
+            embedding_id, _, chunk = key.partition('#')
+            chunk = int(chunk or 0)
+            if meta['embedding_id'] == embedding_id and chunk < meta['count']:
+                rows[position] = self.store.rows[candidate_id] + chunk
+        matrix = np.full((len(keys), self.backend.dimension), np.nan, dtype=np.float32)
+        found = rows >= 0
+        if found.any():
+            matrix[found] = self.store.matrix()[rows[found]]
+        return matrix
+
+    def _sync_index_from_store(self):
+        """Bring the index in line with the store without re-embedding anything"""
+        stale = [
+            candidate_id for candidate_id in list(self.index.candidate_to_id)
+            if candidate_id not in self.store
+        ]
+        for candidate_id in stale:
+            self.index.delete(candidate_id)
+
+        for candidate_id, meta in list(self.store.meta.items()):
+            embedding_id = meta['embedding_id']
+            if self.index.candidate_to_id.get(candidate_id) != embedding_id:
+                self.index.upsert(candidate_id, embedding_id, self.store.get_rows(candidate_id))
+                self._unsaved_changes += 1
+
+    @metrics.timed('index_upsert')
+    def index_candidate(
+        self,
+        candidate_id: str,
+        text: str,
+        embedding_id: Optional[str] = None,
+        vector: Optional[np.ndarray] = None,
+        document: Optional[Dict] = None,
+        features: Optional[List[str]] = None
+    ) -> str:
+        """Embed a candidate's text (unless vector is given) and upsert it into the vector index
+
+        The text is embedded in chunks (see embed_documents); vector may be a
+        single vector or such a matrix of rows. document is stored alongside the vector for other workers to replay (see sync_from_store).
+        features (the candidate's skills) are what search_similar matches query features against.
+        """
+        if not text or len(text.strip()) == 0:
+            raise ValueError("Text cannot be empty")
+
+        embedding_id = embedding_id or self.generate_embedding_id(text)
+        if vector is None:
+            vector = self.embed_documents([text])[0]
+        with self._index_lock:
+            if self.store is not None:
+                self.store.put(
+                    candidate_id, vector, embedding_id=embedding_id,
+                    features=features, preview=text, document=document
+                )
+                self._update_features(candidate_id, features or [])
+            self.index.upsert(candidate_id, embedding_id, vector)
+            self._record_change()
+        return embedding_id
+
+    def index_parsed_resume(self, parsed: ParsedResume, candidate_id: Optional[str] = None) -> str:
+        """Embedding ID for a parsed resume, indexing it when the candidate is known"""
+        # Embedding ID is a content hash, so re-parsing the same resume keeps it stable
+        embedding_text = f"{' '.join(parsed.skills)} {parsed.text}"
+        if candidate_id:
+            return self.index_candidate(candidate_id, embedding_text, features=parsed.skills)
+        return self.generate_embedding_id(embedding_text)
+
+    def remove_candidate(self, candidate_id: str) -> bool:
+        """Remove a candidate from the vector index"""
+        with self._index_lock:
+            if self.store is not None:
+                self.store.delete(candidate_id)
+                self._update_features(candidate_id, None)
+            removed = self.index.delete(candidate_id)
+            if removed:
+                self._record_change()
+        return removed
+
+    def sync_from_store(self) -> List[str]:
+        """Apply vector writes other worker processes made to the shared store
+
+        Returns the affected candidate ids; a candidate no longer in the store
+        was deleted. Cheap when nothing changed.
+        """
+        if self.store is None:
+            return []
+        with self._index_lock:
+            changed = self.store.sync()
+            for candidate_id in changed:
+                meta = self.store.get_meta(candidate_id)
+                if meta is None:
+                    self.index.delete(candidate_id)
+                    self._update_features(candidate_id, None)
+                else:
+                    self.index.upsert(candidate_id, meta['embedding_id'], self.store.get_rows(candidate_id))
+                    self._update_features(candidate_id, meta['features'])
+                self._record_change()
+        return changed
+
+    def _feature_index(self) -> FeatureMatrix:
+        """Pre-encoded candidate features, built from the store on first use"""
+        if self._feature_matrix is None:
+            self._feature_matrix = FeatureMatrix.from_features({
+                candidate_id: meta['features']
+                for candidate_id, meta in (self.store.meta.items() if self.store else [])
+            })
+        return self._feature_matrix
+
+    def _update_features(self, candidate_id: str, features: Optional[List[str]]):
+        """Keep the feature matrix in step with the store once it has been built"""
+        if self._feature_matrix is None:
+            return
+        if features is None:
+            self._feature_matrix.delete(candidate_id)
+        else:
+            self._feature_matrix.upsert(candidate_id, features)
+
+    def _record_change(self):
+        """Count an index write and persist once enough have accumulated"""
+        self._unsaved_changes += 1
+        if self.index_path and self.snapshot_writer and self._unsaved_changes >= self.index_save_interval:
+            self._save_locked()
+
+    def _save_locked(self):
+        self.index.save(self.index_path)
+        self._unsaved_changes = 0
+
+    def save_index(self):
+        """Persist the vector index if it has unsaved changes"""
+        if not self.index_path or not self.snapshot_writer:
+            return
+        with self._index_lock:
+            if self._unsaved_changes:
+                self._save_locked()
+
+    @metrics.timed('vector_search')
+    def search(
+        self,
+        query: str,
+        candidate_ids: Optional[List[str]] = None,
+        top_k: int = 20
+    ) -> List[Dict]:
+        """Vector search over indexed candidates, optionally restricted to candidate_ids"""
+        if not query or len(query.strip()) == 0:
+            raise ValueError("Query cannot be empty")
+
+        self.query_cache.record(query)
+        query_vector = self.embed_query(query)
+        with self._index_lock:
+            matches = self.index.search(query_vector, top_k, candidate_ids)
+
+        return [
+            {'candidate_id': candidate_id, 'score': score}
+            for candidate_id, score in matches
+        ]
+
+    @metrics.timed('vector_search_batch')
+    def search_vectors(
+        self,
+        query_vectors: np.ndarray,
+        candidate_ids: Optional[List[str]] = None,
+        top_k: int = 20
+    ) -> List[List[Dict]]:
+        """Score many query vectors (e.g. job roles) against all candidates in one pass"""
+        with self._index_lock:
+            batches = self.index.search_batch(query_vectors, top_k, candidate_ids)
+        return [
+            [{'candidate_id': candidate_id, 'score': score} for candidate_id, score in matches]
+            for matches in batches
+        ]
+
+    def candidate_vectors(self, candidate_ids: List[str]) -> np.ndarray:
+        """Indexed vectors (the pooled row of chunked documents) for candidates, in order; zero rows for unindexed ones"""
+        with self._index_lock:
+            return self.index.candidate_vectors(candidate_ids)
+
+    def search_batch(
+        self,
+        queries: List[str],
+        candidate_ids: Optional[List[str]] = None,
+        top_k: int = 20
+    ) -> List[List[Dict]]:
+        """Vector search for several text queries at once"""
+        if not queries:
+            return []
+        if any(not query or not query.strip() for query in queries):
+            raise ValueError("Query cannot be empty")
+        vectors = np.stack([self.embed_query(query) for query in queries])
+        return self.search_vectors(vectors, candidate_ids, top_k)
+
+    def extract_query_features(self, query: str) -> List[str]:
+        """Requirement features for a search query, using the query cache before GROQ"""
+        cached = self.query_cache.get('features', query)
+        if cached is not None:
+            return cached
+
+        # Use GROQ to understand the search query
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{
+            content = self.llm.complete(
+                [{
                     "role": "system",
-                    "content": "Extract key skills, technologies, and experience from the resume. Return ONLY a JSON array of strings."
+                    "content": "Extract key requirements from the search query. Return ONLY a JSON array of strings representing skills, technologies, or requirements."
                 }, {
                     "role": "user",
-                    "content": f"Resume text:\n{text}"
+                    "content": f"Search query: {query}"
                 }],
-                temperature=0.1,
-                max_tokens=500
+                max_tokens=300,
+                temperature=0.1
             )
-            
-            # Parse the response to get features
-            content = response.choices[0].message.content
-            # Try to extract JSON array from the response
+
             json_match = re.search(r'\[.*\]', content, re.DOTALL)
             if json_match:
-                features = json.loads(json_match.group())
+                query_features = json.loads(json_match.group())
             else:
-                features = []
-            
-            return features
+                query_features = []
         except Exception as e:
-            print(f"Error generating embedding: {e}")
-            return []
+            print(f"Error processing query: {e}")
+            # Not cached: the next search should retry GROQ
+            return query.lower().split()
 
-    def generate_embedding_id(self, text: str) -> str:
-        """Generate unique ID for embedding"""
-        return hashlib.md5(text.encode()).hexdigest()
+        self.query_cache.put('features', query, query_features)
+        return query_features
 
-    def store_embedding(self, candidate_id: str, text: str, embedding: List[str]):
-        """Store embedding in cache"""
-        self.embeddings_cache[candidate_id] = {
-            'text': text,
-            'embedding': embedding
-        }
+    def embed_query(self, query: str) -> np.ndarray:
+        """Query vector, using the query cache before embedding"""
+        vector = self.query_cache.get('vector', query)
+        if vector is None:
+            vector = self.backend.embed_one(query)
+            self.query_cache.put('vector', query, vector)
+        return vector
 
-    def get_embedding(self, candidate_id: str) -> List[str]:
-        """Get embedding from cache"""
-        if candidate_id in self.embeddings_cache:
-            return self.embeddings_cache[candidate_id]['embedding']
-        return []
+    def warm_queries(self, queries: List[str], with_features: bool = False):
+        """Pre-compute cached artifacts for queries likely to be repeated
+
+        Query vectors only by default: features cost a GROQ call each and
+        no search path reads them.
+        """
+        for query in queries:
+            if not query or not query.strip():
+                continue
+            self.embed_query(query)
+            if with_features:
+                self.extract_query_features(query)
 
     def calculate_similarity(self, features1: List[str], features2: List[str]) -> float:
         """Calculate similarity between two feature sets"""
@@ -89,70 +408,54 @@ class EmbeddingService:
         
         return intersection / union
 
+    @metrics.timed('feature_search')
     def search_similar(
         self, 
         query: str, 
-        candidate_embeddings: Dict[str, Dict],
+        candidate_embeddings: Optional[Dict[str, Dict]] = None,
         top_k: int = 20,
         threshold: float = 0.3
     ) -> List[Dict]:
         """Search for similar candidates based on query using GROQ"""
-        
-        # Use GROQ to understand the search query
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{
-                    "role": "system",
-                    "content": "Extract key requirements from the search query. Return ONLY a JSON array of strings representing skills, technologies, or requirements."
-                }, {
-                    "role": "user",
-                    "content": f"Search query: {query}"
-                }],
-                temperature=0.1,
-                max_tokens=300
-            )
-            
-            content = response.choices[0].message.content
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                query_features = json.loads(json_match.group())
-            else:
-                query_features = []
-        except Exception as e:
-            print(f"Error processing query: {e}")
-            query_features = query.lower().split()
-        
-        results = []
-        
-        for candidate_id, candidate_data in candidate_embeddings.items():
-            embedding = candidate_data['embedding']
-            text = candidate_data.get('text', '')
-            
-            # Calculate similarity
-            similarity = self.calculate_similarity(query_features, embedding)
-            
-            if similarity >= threshold:
-                results.append({
-                    'candidate_id': candidate_id,
-                    'score': similarity,
-                    'text_preview': text[:200] if text else ''
-                })
-        
-        # Sort by similarity score (descending)
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
-        # Return top K results
-        return results[:top_k]
+        query_features = self.extract_query_features(query)
+
+        if candidate_embeddings is None:
+            matrix = self._feature_index()
+            preview = lambda candidate_id: self.store.get_meta(candidate_id)['preview']
+        else:
+            matrix = FeatureMatrix.from_features({
+                candidate_id: candidate_data.get('features', [])
+                for candidate_id, candidate_data in candidate_embeddings.items()
+            })
+            preview = lambda candidate_id: candidate_embeddings[candidate_id].get('text', '')
+
+        matches = matrix.top_k([query_features], top_k, threshold)[0]
+        return [
+            {
+                'candidate_id': candidate_id,
+                'score': score,
+                'text_preview': (preview(candidate_id) or '')[:200]
+            }
+            for candidate_id, score in matches
+        ]
 
 
 # Global instance
 _embedding_service = None
 
 
-def get_embedding_service(api_key: str, model: str = "llama-3.3-70b-versatile"):
+def get_embedding_service(
+    api_key: Optional[str],
+    model: str = "llama-3.3-70b-versatile",
+    backend: str = "hashing",
+    dimension: int = 384,
+    backend_model_name: str = "all-MiniLM-L6-v2",
+    **index_options
+):
     """Get or create embedding service instance"""
     global _embedding_service
     if _embedding_service is None:
-        _embedding_service = EmbeddingService(api_key, model)
+        _embedding_service = EmbeddingService(
+            api_key, model, backend, dimension, backend_model_name, **index_options
+        )
     return _embedding_service
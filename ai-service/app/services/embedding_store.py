@@ -0,0 +1,452 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped float32 embedding matrix with an id -> row offset table
+
+    Layout of a store directory:
+        CURRENT               generation number of the live files
+        VERSION               8-byte sequence number of the latest write, memory-mapped by every process
+        vectors.<gen>.f32     contiguous float32 rows, appended in write order
+        rows.<gen>.jsonl      one record per write: the rows a candidate now points at, or a delete
+        .lock                 flock held by the single writer while appending or compacting
+
+    A candidate owns one row, or several contiguous rows when its document was
+    embedded in chunks (see chunker.pool_chunks); get() returns the first.
+
+    Readers map the vector file read-only, so every worker shares the same pages
+    through the OS page cache. Compaction writes a new generation and swaps CURRENT.
+
+    Every write gets the next sequence number and publishes it in VERSION, so
+    other processes notice new writes with one memory read (see sync) and
+    learn which candidates changed without rescanning the store.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dimension: int,
+        read_only: bool = False,
+        compact_ratio: float = 0.5,
+        min_compact_rows: int = 1024
+    ):
+        self.path = path
+        self.dimension = dimension
+        self.read_only = read_only
+        self.compact_ratio = compact_ratio
+        self.min_compact_rows = min_compact_rows
+        self.row_bytes = dimension * np.dtype(np.float32).itemsize
+
+        self.generation = 0
+        self.rows: Dict[str, int] = {}
+        self.meta: Dict[str, Dict] = {}
+        self.total_rows = 0
+        self.live_rows = 0
+        self.sequence = 0
+        self._log_offset = 0
+        self._matrix: Optional[np.ndarray] = None
+        # Candidates changed by other processes since the last sync(), in order
+        self._changed: Dict[str, None] = {}
+        # Candidates dropped at load because their vectors never reached disk
+        self._lost: Dict[str, None] = {}
+        self._local = True
+
+        os.makedirs(path, exist_ok=True)
+        self._lock_path = os.path.join(path, ".lock")
+        self._version = self._map_version()
+        self._load_generation()
+        self._local = False
+
+    # ------------------------------------------------------------------ files
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"vectors.{generation}.f32")
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"rows.{generation}.jsonl")
+
+    def _current_path(self) -> str:
+        return os.path.join(self.path, "CURRENT")
+
+    def _read_current(self) -> int:
+        try:
+            with open(self._current_path()) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _map_version(self) -> Optional[mmap.mmap]:
+        version_path = os.path.join(self.path, "VERSION")
+        if not os.path.exists(version_path):
+            if self.read_only:
+                return None
+            with open(version_path, "ab") as f:
+                f.truncate(8)
+        with open(version_path, "r+b" if not self.read_only else "rb") as f:
+            return mmap.mmap(
+                f.fileno(), 8, access=mmap.ACCESS_READ if self.read_only else mmap.ACCESS_WRITE
+            )
+
+    def version(self) -> int:
+        """Sequence number of the latest write by any process"""
+        if self._version is None:
+            return self.sequence
+        return struct.unpack_from("<Q", self._version)[0]
+
+    def _publish(self, sequence: int):
+        self.sequence = sequence
+        # Aligned 8-byte store: readers see the old or the new value, never a mix
+        struct.pack_into("<Q", self._version, 0, sequence)
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_generation(self):
+        """(Re)load the offset table for the current generation from scratch"""
+        previous = {candidate_id: meta.get('seq') for candidate_id, meta in self.meta.items()}
+        self.generation = self._read_current()
+        self.rows = {}
+        self.meta = {}
+        self.total_rows = 0
+        self.live_rows = 0
+        self._log_offset = 0
+        self._matrix = None
+        local, self._local = self._local, True
+        try:
+            self._read_log()
+        finally:
+            self._local = local
+        # Deletes are not carried across compaction, so the last sequence may be higher
+        self.sequence = max(self.sequence, self.version())
+
+        if not self._local:
+            # Compaction elsewhere: anything whose latest write differs from what we had changed
+            for candidate_id, meta in self.meta.items():
+                if previous.get(candidate_id, -1) != meta.get('seq'):
+                    self._changed[candidate_id] = None
+            for candidate_id in previous:
+                if candidate_id not in self.meta:
+                    self._changed[candidate_id] = None
+
+        vectors_path = self._vectors_path(self.generation)
+        size = os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+        available = size // self.row_bytes
+        if self.total_rows > available:
+            # Log records whose vectors were lost in a crash: never map rows past the end of the file
+            lost = [
+                candidate_id for candidate_id, row in self.rows.items()
+                if row + self.meta[candidate_id]['count'] > available
+            ]
+            for candidate_id in lost:
+                self.live_rows -= self.meta.pop(candidate_id)['count']
+                del self.rows[candidate_id]
+                self._lost[candidate_id] = None
+            self.total_rows = available
+            if lost:
+                print(f"Embedding store: dropped {len(lost)} candidates whose vectors are missing from {vectors_path}")
+
+        if not self.read_only:
+            # Drop a torn vector append that never reached the log
+            expected = self.total_rows * self.row_bytes
+            if size > expected:
+                with open(vectors_path, "r+b") as f:
+                    f.truncate(expected)
+
+    def _read_log(self):
+        """Apply log records appended since the last read"""
+        log_path = self._log_path(self.generation)
+        if not os.path.exists(log_path):
+            return
+
+        with open(log_path, "rb") as f:
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Writer is mid-append; pick it up on the next refresh
+                    break
+                offset = self._log_offset
+                self._log_offset += len(line)
+                self._apply(json.loads(line), offset)
+
+    def _apply(self, record: Dict, offset: int):
+        candidate_id = record['candidate_id']
+        self.sequence = max(self.sequence, record.get('seq') or 0)
+        if not self._local:
+            self._changed[candidate_id] = None
+        previous = self.meta.get(candidate_id)
+        if previous is not None:
+            self.live_rows -= previous['count']
+        if record.get('deleted'):
+            self.rows.pop(candidate_id, None)
+            self.meta.pop(candidate_id, None)
+            return
+
+        row = record['row']
+        count = record.get('count', 1)
+        self.rows[candidate_id] = row
+        self.meta[candidate_id] = {
+            'embedding_id': record.get('embedding_id'),
+            'features': record.get('features', []),
+            'preview': record.get('preview', ''),
+            'seq': record.get('seq'),
+            'count': count,
+            # Documents can be large; they stay in the log and are read back on demand
+            'offset': offset,
+        }
+        self.total_rows = max(self.total_rows, row + count)
+        self.live_rows += count
+
+    def refresh(self) -> bool:
+        """Pick up writes made by another process; returns True if anything changed"""
+        if self._read_current() != self.generation:
+            self._load_generation()
+            return True
+        before = self._log_offset
+        self._read_log()
+        return self._log_offset != before
+
+    def sync(self) -> List[str]:
+        """Candidates written or deleted by other processes since the last sync
+
+        Costs one memory read when nothing changed. Callers should look up
+        each candidate's current state (get/get_meta, or absence) rather than
+        replaying individual writes, so concurrent writers converge on the
+        order recorded in the log.
+        """
+        if self.version() != self.sequence:
+            self.refresh()
+        if not self._changed:
+            return []
+        changed = list(self._changed)
+        self._changed = {}
+        return changed
+
+    # ------------------------------------------------------------------ reads
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, candidate_id: str) -> bool:
+        return candidate_id in self.rows
+
+    def matrix(self) -> np.ndarray:
+        """Read-only memory map over every row written in this generation, live or dead"""
+        if self._matrix is None or self._matrix.shape[0] < self.total_rows:
+            if self.total_rows == 0:
+                self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+            else:
+                try:
+                    self._matrix = self._map_vectors()
+                except FileNotFoundError:
+                    # Another process compacted this generation away; move to the new one
+                    self.refresh()
+                    return self.matrix()
+        return self._matrix
+
+    def _map_vectors(self) -> np.ndarray:
+        return np.memmap(
+            self._vectors_path(self.generation),
+            dtype=np.float32,
+            mode="r",
+            shape=(self.total_rows, self.dimension)
+        )
+
+    def get(self, candidate_id: str) -> Optional[np.ndarray]:
+        """Vector for a candidate (the first of its rows) as a view into the memory map"""
+        row = self.rows.get(candidate_id)
+        if row is None:
+            return None
+        return self.matrix()[row]
+
+    def get_rows(self, candidate_id: str) -> Optional[np.ndarray]:
+        """Every row of a candidate, shape (count, dimension), as a view into the memory map"""
+        row = self.rows.get(candidate_id)
+        if row is None:
+            return None
+        return self.matrix()[row:row + self.meta[candidate_id]['count']]
+
+    def get_meta(self, candidate_id: str) -> Optional[Dict]:
+        return self.meta.get(candidate_id)
+
+    def document(self, candidate_id: str) -> Optional[Dict]:
+        """The document stored with a candidate's latest write, read from the log"""
+        meta = self.meta.get(candidate_id)
+        if meta is None:
+            return None
+        try:
+            with open(self._log_path(self.generation), "rb") as f:
+                f.seek(meta['offset'])
+                return json.loads(f.readline()).get('document')
+        except FileNotFoundError:
+            # Another process compacted this generation away; offsets moved with it
+            self.refresh()
+            return self.document(candidate_id) if candidate_id in self.meta else None
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """Live (candidate_id, row) pairs"""
+        return iter(list(self.rows.items()))
+
+    def live_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Candidate ids and a dense copy of their live vectors (first row of each)"""
+        candidate_ids = list(self.rows.keys())
+        rows = np.fromiter(self.rows.values(), dtype=np.int64, count=len(candidate_ids))
+        return candidate_ids, np.asarray(self.matrix()[rows], dtype=np.float32)
+
+    # ----------------------------------------------------------------- writes
+
+    def put(
+        self,
+        candidate_id: str,
+        vector: np.ndarray,
+        embedding_id: Optional[str] = None,
+        features: Optional[List[str]] = None,
+        preview: str = "",
+        document: Optional[Dict] = None
+    ):
+        """Append a vector, or an (n, dimension) matrix of rows, for a candidate, superseding earlier rows
+
+        document: optional JSON-serialisable payload other processes need to
+        replay the write into their own indexes.
+        """
+        self._check_writable()
+        vectors = np.asarray(vector, dtype=np.float32).reshape(-1, self.dimension)
+        if len(vectors) == 0:
+            raise ValueError("No vectors to store")
+
+        with self._write_lock():
+            self.refresh()
+            self._delete_lost()
+            row = self.total_rows
+            with open(self._vectors_path(self.generation), "ab") as f:
+                f.write(vectors.tobytes())
+                # The log record below is the commit point; the rows it names must be durable first
+                f.flush()
+                os.fsync(f.fileno())
+            record = {
+                'row': row,
+                'candidate_id': candidate_id,
+                'embedding_id': embedding_id,
+                'features': features or [],
+                'preview': preview[:200],
+                'document': document,
+            }
+            if len(vectors) > 1:
+                record['count'] = len(vectors)
+            self._append_log(record)
+        self._maybe_compact()
+
+    def delete(self, candidate_id: str) -> bool:
+        """Mark a candidate's row as dead"""
+        self._check_writable()
+        with self._write_lock():
+            self.refresh()
+            self._delete_lost()
+            if candidate_id not in self.rows:
+                return False
+            self._append_log({'candidate_id': candidate_id, 'deleted': True})
+        self._maybe_compact()
+        return True
+
+    def _append_log(self, record: Dict):
+        """Append a record under the write lock and publish its sequence number"""
+        record['seq'] = max(self.sequence, self.version()) + 1
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with open(self._log_path(self.generation), "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        # The log line is the commit point; apply it locally without re-reading
+        offset = self._log_offset
+        self._log_offset += len(line)
+        self._local = True
+        try:
+            self._apply(record, offset)
+        finally:
+            self._local = False
+        self._publish(record['seq'])
+
+    def _delete_lost(self):
+        """Log deletes for candidates dropped at load, before new rows reuse their row numbers"""
+        for candidate_id in list(self._lost):
+            if candidate_id not in self.rows:
+                self._append_log({'candidate_id': candidate_id, 'deleted': True})
+        self._lost.clear()
+
+    def _check_writable(self):
+        if self.read_only:
+            raise Exception("Embedding store is opened read-only")
+
+    def dead_rows(self) -> int:
+        return self.total_rows - self.live_rows
+
+    def _maybe_compact(self):
+        dead = self.dead_rows()
+        if dead >= self.min_compact_rows and dead >= self.compact_ratio * self.total_rows:
+            self.compact()
+
+    def compact(self):
+        """Rewrite live rows into a new generation and drop the old files"""
+        self._check_writable()
+        with self._write_lock():
+            self.refresh()
+            old_generation = self.generation
+            new_generation = old_generation + 1
+            candidate_ids = list(self.rows.keys())
+            matrix = self.matrix()
+
+            with open(self._vectors_path(new_generation), "wb") as vectors_file, \
+                    open(self._log_path(new_generation), "wb") as log_file:
+                new_row = 0
+                for candidate_id in candidate_ids:
+                    meta = self.meta[candidate_id]
+                    row = self.rows[candidate_id]
+                    vectors_file.write(np.asarray(matrix[row:row + meta['count']]).tobytes())
+                    record = {
+                        'row': new_row,
+                        'candidate_id': candidate_id,
+                        'embedding_id': meta['embedding_id'],
+                        'features': meta['features'],
+                        'preview': meta['preview'],
+                        'document': self.document(candidate_id),
+                        'seq': meta['seq'],
+                    }
+                    if meta['count'] > 1:
+                        record['count'] = meta['count']
+                    new_row += meta['count']
+                    log_file.write((json.dumps(record) + "\n").encode("utf-8"))
+                vectors_file.flush()
+                os.fsync(vectors_file.fileno())
+                log_file.flush()
+                os.fsync(log_file.fileno())
+
+            tmp_current = self._current_path() + ".tmp"
+            with open(tmp_current, "w") as f:
+                f.write(str(new_generation))
+            os.replace(tmp_current, self._current_path())
+
+            self._local = True
+            try:
+                self._load_generation()
+            finally:
+                self._local = False
+            # No candidate changed, but readers must remap onto the new generation
+            self._publish(self.sequence + 1)
+
+            # Readers that still map the old files keep their inodes alive until they refresh
+            for old_path in (self._vectors_path(old_generation), self._log_path(old_generation)):
+                if os.path.exists(old_path):
+                    os.remove(old_path)
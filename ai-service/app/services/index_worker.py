@@ -0,0 +1,293 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from app.core.concurrency import extraction_worker_count, run_in_process_pool
+from app.services.chunker import embed_chunked
+from app.services.resume_parser import ResumeParser
+from app.services.search_service import SearchService
+
+
+def event_fingerprint(event: Dict) -> str:
+    """Hash of the event fields that affect the search indexes"""
+    payload = json.dumps([
+        event.get('text'),
+        sorted(event.get('skills') or []),
+        sorted(event.get('languages') or []),
+        event.get('experience_years') or 0,
+        event.get('resume_url'),
+    ])
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+class IndexWorker:
+    """Background worker that keeps the search indexes in step with candidate change events
+
+    Events sit in an in-process queue keyed by candidate, so rapid updates to
+    one candidate coalesce and only the latest is applied. Upserts whose
+    content fingerprint matches the last applied one are skipped. Applied
+    fingerprints and unapplied events are checkpointed after every batch and
+    restored on startup, so a restart neither loses events nor re-embeds
+    the pool.
+    """
+
+    def __init__(
+        self,
+        search_service: SearchService,
+        resume_parser: ResumeParser,
+        checkpoint_path: Optional[str] = None,
+        batch_size: int = 64
+    ):
+        self.search_service = search_service
+        self.resume_parser = resume_parser
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+
+        self.pending: Dict[str, Dict] = {}
+        self.applied: Dict[str, str] = {}
+        self.rebuilding = False
+        self.last_checkpoint: Optional[float] = None
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.coalesced = 0
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._load_checkpoint()
+
+    # ---------------------------------------------------------------- queue
+
+    def submit(self, events: Iterable[Dict]) -> Dict:
+        """Queue change events; a newer event for a queued candidate replaces it"""
+        events = list(events)
+        for event in events:
+            if event['op'] == 'upsert' and not event.get('text') and not event.get('resume_url'):
+                raise ValueError(f"Upsert for {event['candidate_id']} needs text or resume_url")
+
+        for event in events:
+            candidate_id = event['candidate_id']
+            if candidate_id in self.pending:
+                self.coalesced += 1
+                del self.pending[candidate_id]
+            self.pending[candidate_id] = event
+        self._wake()
+        return {"queued": len(events), "pending": len(self.pending)}
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the worker task on the running event loop"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        if self.pending:
+            self._wakeup.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.save_checkpoint()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.pending and not self.rebuilding:
+                candidate_ids = list(islice(self.pending, self.batch_size))
+                for candidate_id in candidate_ids:
+                    event = self.pending.pop(candidate_id)
+                    try:
+                        await self._apply(event)
+                    except asyncio.CancelledError:
+                        # Put it back so the checkpoint keeps it
+                        self.pending.setdefault(candidate_id, event)
+                        raise
+                    except Exception as e:
+                        self.failed += 1
+                        print(f"Index event for candidate {candidate_id} failed: {e}")
+                await loop.run_in_executor(None, self.save_checkpoint)
+
+    async def _apply(self, event: Dict):
+        loop = asyncio.get_running_loop()
+        candidate_id = event['candidate_id']
+
+        if event['op'] == 'delete':
+            await loop.run_in_executor(None, self.search_service.remove_candidate, candidate_id)
+            self.applied.pop(candidate_id, None)
+            self.processed += 1
+            return
+
+        fingerprint = event_fingerprint(event)
+        if self.applied.get(candidate_id) == fingerprint:
+            self.skipped += 1
+            return
+
+        if event.get('text'):
+            text = event['text']
+            skills = event.get('skills') or []
+            languages = event.get('languages') or []
+            experience_years = event.get('experience_years') or 0
+        else:
+            file_content = await self.resume_parser.fetch_document(event['resume_url'])
+            parsed = await self.resume_parser.parse_document_async(
+                file_content, event.get('filename') or event['resume_url']
+            )
+            text = parsed.text
+            skills = parsed.skills
+            languages = parsed.languages
+            experience_years = parsed.experience_years
+
+        await loop.run_in_executor(
+            None,
+            lambda: self.search_service.index_candidate(
+                candidate_id, text, skills, languages, experience_years
+            )
+        )
+        self.applied[candidate_id] = fingerprint
+        self.processed += 1
+
+    # -------------------------------------------------------------- rebuild
+
+    def begin_rebuild(self) -> bool:
+        """Mark a rebuild as running; False if one already is
+
+        Call before scheduling rebuild() so that a concurrent request sees it.
+        """
+        if self.rebuilding:
+            return False
+        self.rebuilding = True
+        return True
+
+    async def rebuild(
+        self,
+        records: List[Dict],
+        force: bool = False,
+        last: bool = True,
+        snapshot_ids: Iterable[str] = ()
+    ) -> Dict:
+        """Bring the indexes in line with a full candidate snapshot, or one page of it
+
+        Changed candidates are embedded in parallel across the process pool.
+        Records that only carry a resume_url are queued as ordinary events.
+        On the last (or only) page, indexed candidates that are neither in
+        records nor in snapshot_ids are removed.
+        """
+        self.rebuilding = True
+        loop = asyncio.get_running_loop()
+        try:
+            with_text = [record for record in records if record.get('text')]
+            self.submit(record for record in records if not record.get('text') and record.get('resume_url'))
+
+            changed = [
+                record for record in with_text
+                if force or self.applied.get(record['candidate_id']) != event_fingerprint(record)
+            ]
+            texts = [
+                SearchService.embedding_text(record['text'], record.get('skills') or [])
+                for record in changed
+            ]
+            vectors = []
+            if texts:
+                batch = max(1, min(256, math.ceil(len(texts) / extraction_worker_count())))
+                embedding_service = self.search_service.embedding_service
+                parts = await asyncio.gather(*[
+                    run_in_process_pool(
+                        embed_chunked,
+                        *embedding_service.backend_config,
+                        embedding_service.chunker,
+                        texts[start:start + batch]
+                    )
+                    for start in range(0, len(texts), batch)
+                ])
+                vectors = [vector for part in parts for vector in part]
+
+            def apply_all():
+                for record, vector in zip(changed, vectors):
+                    self.search_service.index_candidate(
+                        record['candidate_id'],
+                        record['text'],
+                        record.get('skills') or [],
+                        record.get('languages') or [],
+                        record.get('experience_years') or 0,
+                        vector=vector
+                    )
+                    self.applied[record['candidate_id']] = event_fingerprint(record)
+
+                stale = set()
+                if last:
+                    keep = {record['candidate_id'] for record in records} | set(snapshot_ids)
+                    stale = (self.search_service.candidate_ids() | set(self.applied)) - keep
+                for candidate_id in stale:
+                    self.search_service.remove_candidate(candidate_id)
+                    self.applied.pop(candidate_id, None)
+                self.search_service.save()
+                self.save_checkpoint()
+                return len(stale)
+
+            removed = await loop.run_in_executor(None, apply_all)
+            return {
+                "total": len(records),
+                "embedded": len(changed),
+                "skipped": len(with_text) - len(changed),
+                "removed": removed
+            }
+        finally:
+            self.rebuilding = False
+            self._wake()
+
+    # ----------------------------------------------------------- checkpoint
+
+    def save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {
+            "applied": dict(self.applied),
+            "pending": list(self.pending.values()),
+            "saved_at": time.time(),
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self.last_checkpoint = state["saved_at"]
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"Error loading index checkpoint from {self.checkpoint_path}: {e}")
+            return
+        self.applied = state.get("applied", {})
+        self.pending = {event['candidate_id']: event for event in state.get("pending", [])}
+        self.last_checkpoint = state.get("saved_at")
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self.pending),
+            "tracked": len(self.applied),
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "rebuilding": self.rebuilding,
+            "last_checkpoint": self.last_checkpoint,
+        }
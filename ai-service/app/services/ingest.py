@@ -0,0 +1,152 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.concurrency import stage
+from app.models.resume import ParsedResume
+from app.models.schemas import ResumeParseRequest
+from app.services.parse_cache import ParseCache
+from app.services.resume_parser import ResumeParser
+from app.services.search_service import SearchService
+from app.services.summary_generator import SummaryGenerator
+from app.services.summary_queue import PENDING, SummaryQueue
+
+
+SummarizeFn = Callable[[str, List[str], int], Awaitable[str]]
+
+
+def build_parse_response(
+    parsed: ParsedResume,
+    summary: str,
+    embedding_id: Optional[str],
+    summary_job_id: Optional[str] = None
+) -> Dict:
+    """Shape a parsed resume into a ResumeParseResponse payload"""
+    return {**parsed.to_dict(), "summary": summary, "embedding_id": embedding_id, "summary_job_id": summary_job_id}
+
+
+class ResumePipeline:
+    """Download, parse, summarise and index a single resume, reusing cached parse results
+
+    With a summary queue, the response carries the rule-based summary and
+    the id of a queued LLM summary job instead of waiting for the LLM.
+    """
+
+    def __init__(
+        self,
+        resume_parser: ResumeParser,
+        summary_generator: SummaryGenerator,
+        search_service: SearchService,
+        parse_cache: Optional[ParseCache] = None,
+        summary_queue: Optional[SummaryQueue] = None
+    ):
+        self.resume_parser = resume_parser
+        self.summary_generator = summary_generator
+        self.search_service = search_service
+        self.parse_cache = parse_cache
+        self.summary_queue = summary_queue
+
+    async def _summarize(self, resume_text: str, skills: List[str], experience_years: int) -> str:
+        async with stage('summary'):
+            return await self.summary_generator.generate_summary_async(
+                resume_text, skills, experience_years
+            )
+
+    def cache_key(self, file_content: bytes) -> str:
+        return ParseCache.make_key(
+            file_content,
+            ResumeParser.PARSER_VERSION,
+            self.summary_generator.model
+        )
+
+    async def parse(
+        self,
+        request: ResumeParseRequest,
+        summarize: Optional[SummarizeFn] = None,
+        priority: str = 'normal'
+    ) -> Dict:
+        """ResumeParseResponse payload for a resume request
+
+        priority is the summary job priority when the request sets none.
+        """
+        file_content = await self.resume_parser.fetch_document(request.resume_url)
+        # Cache and queue calls are SQLite reads and writes; run them off the event loop
+        loop = asyncio.get_running_loop()
+
+        key = self.cache_key(file_content) if self.parse_cache else None
+        cached = await loop.run_in_executor(None, self.parse_cache.get, key) if key else None
+        if cached is not None:
+            parsed, summary = cached
+        else:
+            parsed = await self.resume_parser.parse_document_async(file_content, request.filename)
+            summary = None
+
+        skills = parsed.skills
+        fallback = self.summary_generator._generate_simple_summary(skills, parsed.experience_years)
+        job = None
+        # A cached fallback summary means the LLM failed or had not finished; try to upgrade it
+        if summary is None or summary == fallback:
+            if self.summary_queue is not None:
+                job = await loop.run_in_executor(
+                    None,
+                    self.summary_queue.submit,
+                    parsed.text,
+                    skills,
+                    parsed.experience_years,
+                    request.summary_priority or priority,
+                    request.candidate_id,
+                    request.summary_callback_url
+                )
+                summary = job['summary']
+            else:
+                summary = await (summarize or self._summarize)(parsed.text, skills, parsed.experience_years)
+            if key and (cached is None or summary != cached[1]):
+                await loop.run_in_executor(None, self.parse_cache.put, key, parsed, summary)
+
+        # Chunk embedding and the index/store writes are CPU-bound too
+        embedding_id = await loop.run_in_executor(
+            None, self.search_service.index_parsed_resume, parsed, request.candidate_id
+        )
+        summary_job_id = job['job_id'] if job is not None and job['status'] in PENDING else None
+        return build_parse_response(parsed, summary, embedding_id, summary_job_id)
+
+
+class BatchIngestor:
+    """Parses many resumes concurrently and yields each result as soon as it is ready"""
+
+    def __init__(self, pipeline: ResumePipeline):
+        self.pipeline = pipeline
+
+    async def _process(self, index: int, request: ResumeParseRequest) -> Dict:
+        try:
+            return {
+                "index": index,
+                "resume_url": request.resume_url,
+                "candidate_id": request.candidate_id,
+                "result": await self.pipeline.parse(
+                    request,
+                    self.pipeline.summary_generator.summarize_batched,
+                    priority='bulk'
+                ),
+                "error": None
+            }
+        except Exception as e:
+            return {
+                "index": index,
+                "resume_url": request.resume_url,
+                "candidate_id": request.candidate_id,
+                "result": None,
+                "error": str(e)
+            }
+
+    async def run(self, requests: List[ResumeParseRequest]) -> AsyncIterator[Dict]:
+        """Yield one result per request, in completion order"""
+        tasks = [
+            asyncio.create_task(self._process(index, request))
+            for index, request in enumerate(requests)
+        ]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
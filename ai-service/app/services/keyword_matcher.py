@@ -0,0 +1,87 @@
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class KeywordMatcher:
+    """Finds many keywords in a single linear pass over the text
+
+    Keywords are compiled into one trie-shaped regular expression, so matching
+    cost depends on the text length rather than on the number of keywords.
+    Matches are whole-word: a keyword may not be preceded or followed by a
+    word character. Whitespace inside a keyword matches any run of whitespace.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, str]]):
+        """entries: (kind, display name, alias) triples; aliases are matched case-insensitively"""
+        self.lookup: Dict[str, Tuple[str, str]] = {}
+        for kind, display, alias in entries:
+            key = _normalize(alias)
+            if key:
+                self.lookup.setdefault(key, (kind, display))
+
+        trie: Dict = {}
+        for key in self.lookup:
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        body = _trie_pattern(trie) if trie else '(?!)'
+        self.pattern = re.compile(r'(?<!\w)(' + body + r')(?!\w)')
+
+    def __len__(self) -> int:
+        return len(self.lookup)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[str, str, int]]:
+        """Yield (kind, display name, offset) for every keyword occurrence"""
+        for match in self.pattern.finditer(text.lower()):
+            kind, display = self.lookup[_normalize(match.group(1))]
+            yield kind, display, match.start()
+
+    def find_all(self, text: str) -> Dict[str, List[str]]:
+        """Sorted, de-duplicated display names found in text, grouped by kind"""
+        found: Dict[str, set] = {}
+        for kind, display, _ in self.iter_matches(text):
+            found.setdefault(kind, set()).add(display)
+        return {kind: sorted(names) for kind, names in found.items()}
+
+
+def _normalize(keyword: str) -> str:
+    return ' '.join(keyword.lower().split())
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for a character trie; longer branches are tried before a terminal"""
+    terminal = '' in node
+    branches = [
+        (r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ''
+    ]
+
+    if not branches:
+        return ''
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+
+    group = '(?:' + '|'.join(branches) + ')'
+    return group + '?' if terminal else group
+
+
+def load_taxonomy(path: str) -> List[Tuple[str, str, str]]:
+    """Load (kind, display, alias) entries from a JSON taxonomy file
+
+    Expected format: {"<kind>": {"<Display Name>": ["alias", ...], ...}, ...}
+    The display name itself is always matched as an alias.
+    """
+    with open(path) as f:
+        taxonomy = json.load(f)
+
+    entries = []
+    for kind, names in taxonomy.items():
+        for display, aliases in names.items():
+            entries.append((kind, display, display))
+            for alias in aliases or []:
+                entries.append((kind, display, alias))
+    return entries
@@ -0,0 +1,258 @@
+import math
+import os
+import pickle
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+TERM_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it of on or that the to was were will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word terms, without stopwords"""
+    return [term for term in TERM_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+def skill_term(skill: str) -> str:
+    return "skill:" + skill.lower()
+
+
+def language_term(language: str) -> str:
+    return "lang:" + language.lower()
+
+
+class LexicalIndex:
+    """In-process inverted index with BM25 scoring and posting-list filters
+
+    Documents get increasing integer ids, so appending keeps every posting
+    list sorted. Updates re-add the candidate under a new id and tombstone the
+    old one; postings are compacted once tombstones pile up. Skills and
+    languages are indexed as prefixed terms, so hard filters are posting-list
+    intersections that run before any scoring.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_candidate: List[Optional[str]] = []
+        self.candidate_doc: Dict[str, int] = {}
+        self.doc_length = array('I')
+        self.live = array('B')
+        self.experience = array('h')
+        self.skills: List[Tuple[str, ...]] = []
+        self.total_length = 0
+        # Embedding store sequence number this index reflects, for catch-up replay on load
+        self.sequence = 0
+
+    def __len__(self) -> int:
+        return len(self.candidate_doc)
+
+    # ---------------------------------------------------------------- writes
+
+    def add(
+        self,
+        candidate_id: str,
+        text: str,
+        skills: Iterable[str] = (),
+        languages: Iterable[str] = (),
+        experience_years: int = 0
+    ):
+        """Index or re-index a candidate"""
+        self.delete(candidate_id)
+
+        skills = tuple(skills)
+        terms = Counter(tokenize(text))
+        terms.update(skill_term(skill) for skill in set(skills))
+        terms.update(language_term(language) for language in set(languages))
+
+        doc = len(self.doc_candidate)
+        for term, frequency in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array('I'), array('H'))
+            posting[0].append(doc)
+            posting[1].append(min(frequency, 65535))
+
+        length = sum(terms.values())
+        self.doc_candidate.append(candidate_id)
+        self.candidate_doc[candidate_id] = doc
+        self.doc_length.append(length)
+        self.live.append(1)
+        self.experience.append(max(-1, min(experience_years, 32767)))
+        self.skills.append(skills)
+        self.total_length += length
+
+    def delete(self, candidate_id: str) -> bool:
+        doc = self.candidate_doc.pop(candidate_id, None)
+        if doc is None:
+            return False
+        self.doc_candidate[doc] = None
+        self.live[doc] = 0
+        self.total_length -= self.doc_length[doc]
+        self.skills[doc] = ()
+        if len(self.doc_candidate) > 1024 and len(self) < len(self.doc_candidate) // 2:
+            self.compact()
+        return True
+
+    def compact(self):
+        """Rebuild postings without tombstoned documents"""
+        live = self._live_mask()
+        remap = np.cumsum(live) - 1
+
+        postings = {}
+        for term, (docs, frequencies) in self.postings.items():
+            doc_array = np.frombuffer(docs, dtype=np.uint32)
+            keep = live[doc_array]
+            if not keep.any():
+                continue
+            postings[term] = (
+                array('I', remap[doc_array[keep]].astype(np.uint32).tobytes()),
+                array('H', np.frombuffer(frequencies, dtype=np.uint16)[keep].tobytes()),
+            )
+
+        live_docs = np.flatnonzero(live)
+        self.postings = postings
+        self.doc_candidate = [self.doc_candidate[doc] for doc in live_docs]
+        self.candidate_doc = {candidate: doc for doc, candidate in enumerate(self.doc_candidate)}
+        self.doc_length = array('I', (self.doc_length[doc] for doc in live_docs))
+        self.live = array('B', [1]) * len(live_docs)
+        self.experience = array('h', (self.experience[doc] for doc in live_docs))
+        self.skills = [self.skills[doc] for doc in live_docs]
+
+    # ----------------------------------------------------------------- reads
+
+    def _docs(self, term: str) -> np.ndarray:
+        posting = self.postings.get(term)
+        if posting is None:
+            return np.zeros(0, dtype=np.uint32)
+        return np.frombuffer(posting[0], dtype=np.uint32)
+
+    def _live_mask(self) -> np.ndarray:
+        return np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+
+    def filter(
+        self,
+        required_skills: Iterable[str] = (),
+        languages: Iterable[str] = (),
+        min_experience_years: Optional[int] = None
+    ) -> Optional[np.ndarray]:
+        """Sorted doc ids passing every hard filter; None when no filter is set"""
+        terms = [skill_term(skill) for skill in required_skills]
+        terms += [language_term(language) for language in languages]
+        if not terms and min_experience_years is None:
+            return None
+
+        # Intersect shortest postings first so the working set shrinks fastest
+        docs: Optional[np.ndarray] = None
+        for term in sorted(terms, key=lambda term: len(self._docs(term))):
+            term_docs = self._docs(term)
+            docs = term_docs if docs is None else np.intersect1d(docs, term_docs, assume_unique=True)
+            if len(docs) == 0:
+                return docs
+
+        if min_experience_years is not None:
+            experience = np.frombuffer(self.experience, dtype=np.int16)
+            if docs is None:
+                docs = np.flatnonzero(experience >= min_experience_years).astype(np.uint32)
+            else:
+                docs = docs[experience[docs] >= min_experience_years]
+
+        live = self._live_mask()
+        return docs[live[docs]]
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 20,
+        allowed_docs: Optional[np.ndarray] = None,
+        extra_terms: Iterable[str] = ()
+    ) -> List[Tuple[str, float]]:
+        """BM25 top-k as (candidate_id, score), restricted to allowed_docs if given"""
+        size = len(self.doc_candidate)
+        if size == 0 or len(self) == 0:
+            return []
+
+        terms = set(tokenize(query)) | set(extra_terms)
+        if not terms:
+            return []
+
+        lengths = np.frombuffer(self.doc_length, dtype=np.uint32).astype(np.float32)
+        average_length = self.total_length / len(self) if len(self) else 1.0
+        norms = self.k1 * (1 - self.b + self.b * lengths / max(average_length, 1.0))
+
+        mask = self._live_mask()
+        scores = np.zeros(size, dtype=np.float32)
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            docs = np.frombuffer(posting[0], dtype=np.uint32)
+            frequencies = np.frombuffer(posting[1], dtype=np.uint16).astype(np.float32)
+            # Tombstoned docs stay in postings until compaction; they must not count towards df
+            df = int(np.count_nonzero(mask[docs]))
+            idf = math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * frequencies * (self.k1 + 1) / (frequencies + norms[docs])
+
+        if allowed_docs is not None:
+            allowed = np.zeros(size, dtype=bool)
+            allowed[allowed_docs] = True
+            mask &= allowed
+        scores[~mask] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(self.doc_candidate[doc], float(scores[doc])) for doc in candidates]
+
+    def candidate_ids(self, docs: np.ndarray) -> List[str]:
+        return [self.doc_candidate[doc] for doc in docs]
+
+    def candidate_skills(self, candidate_id: str) -> Tuple[str, ...]:
+        doc = self.candidate_doc.get(candidate_id)
+        return self.skills[doc] if doc is not None else ()
+
+    # ----------------------------------------------------------- persistence
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, "rb") as f:
+                index.__dict__.update(pickle.load(f))
+        except Exception as e:
+            print(f"Error loading lexical index from {path}: {e}")
+            return cls()
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[str, float]]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked lists; scores are normalised so a top hit in every list scores 1.0"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, (candidate_id, _) in enumerate(ranking):
+            fused[candidate_id] = fused.get(candidate_id, 0.0) + 1.0 / (k + rank + 1)
+
+    best = len(rankings) / (k + 1)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [(candidate_id, score / best) for candidate_id, score in ranked]
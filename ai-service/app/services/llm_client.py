@@ -0,0 +1,444 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core import metrics
+from app.core.startup import load_module
+
+
+@lru_cache(maxsize=1)
+def _retryable_errors() -> Tuple[type, ...]:
+    """Errors worth retrying: throttling, transient network failures and server faults"""
+    # Only evaluated when an exception reaches the except clause, by which time groq is loaded
+    groq = load_module("groq")
+    return (
+        groq.RateLimitError,
+        groq.APIConnectionError,
+        groq.APITimeoutError,
+        groq.InternalServerError,
+    )
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an LLM call cannot finish before its deadline"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float, deadline: float) -> float:
+        """Take tokens (possibly going negative) and return how long to wait for them
+
+        Raises DeadlineExceeded without taking anything if the wait would end
+        past the deadline, so rejected calls do not run up a debt.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            remaining = self.tokens - amount
+            wait = 0.0 if remaining >= 0 else -remaining / self.rate
+            if now + wait > deadline:
+                raise DeadlineExceeded("Rate limit wait exceeds the call deadline")
+            self.tokens = remaining
+            return wait
+
+    def release(self, amount: float):
+        """Give back tokens taken for a call that was never made"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def acquire(self, amount: float, deadline: float):
+        wait = self._reserve(amount, deadline)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float, deadline: float):
+        wait = self._reserve(amount, deadline)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class LLMClient:
+    """Shared GROQ chat completion client
+
+    Every call goes through request- and token-per-minute buckets, is retried
+    with jittered exponential backoff on transient errors, and has an explicit
+    deadline. Identical prompts already in flight are coalesced into one call.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        model: str = "llama-3.3-70b-versatile",
+        requests_per_minute: int = 30,
+        tokens_per_minute: int = 12000,
+        timeout: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        client: Any = None,
+        async_client: Any = None
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        # SDK clients are built on first call, so importing groq never delays startup
+        self._client = client
+        self._async_client = async_client
+        self._client_lock = threading.Lock()
+        self.request_bucket = TokenBucket(requests_per_minute / 60, requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._inflight_waiters: Dict[str, int] = {}
+        self._inflight_sync: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+
+    def _request(
+        self,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[Dict]
+    ) -> Tuple[str, Dict, int]:
+        """Dedupe key, request kwargs and estimated token cost"""
+        if not self.configured:
+            # Fail before touching the rate limits; callers fall back without an LLM
+            raise Exception("GROQ_API_KEY is not configured")
+        kwargs: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if response_format:
+            kwargs["response_format"] = response_format
+        key = hashlib.sha256(json.dumps(kwargs, sort_keys=True).encode("utf-8")).hexdigest()
+        # Roughly four characters per token for English prompts
+        prompt_chars = sum(len(message.get("content", "")) for message in messages)
+        return key, kwargs, prompt_chars // 4 + max_tokens
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) or self._client is not None or self._async_client is not None
+
+    def _build_client(self, is_async: bool):
+        if not self.api_key:
+            raise Exception("GROQ_API_KEY is not configured")
+        groq = load_module("groq")
+        client_class = groq.AsyncGroq if is_async else groq.Groq
+        # Retries and timeouts are handled here, not in the SDK
+        return client_class(api_key=self.api_key, max_retries=0, timeout=self.timeout)
+
+    @property
+    def client(self):
+        """Shared blocking GROQ client, created on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client(is_async=False)
+        return self._client
+
+    @property
+    def async_client(self):
+        """Shared async GROQ client, created on first use"""
+        if self._async_client is None:
+            with self._client_lock:
+                if self._async_client is None:
+                    self._async_client = self._build_client(is_async=True)
+        return self._async_client
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when present"""
+        delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    # ----------------------------------------------------------------- async
+
+    async def acomplete(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 300,
+        temperature: float = 0.1,
+        response_format: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Chat completion text; raises on failure so callers can fall back"""
+        key, kwargs, cost = self._request(messages, max_tokens, temperature, response_format)
+
+        task = self._inflight.get(key)
+        if task is None:
+            deadline = time.monotonic() + (timeout or self.timeout)
+            task = asyncio.ensure_future(self._call_async(kwargs, cost, deadline))
+            self._inflight[key] = task
+            self._inflight_waiters[key] = 0
+            task.add_done_callback(lambda _: self._drop_inflight(key, task))
+        else:
+            self.coalesced += 1
+
+        # Every caller waits on the shared call; a cancelled caller only
+        # cancels it when nobody else is still waiting
+        self._inflight_waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._inflight.get(key) is task:
+                self._inflight_waiters[key] -= 1
+                if self._inflight_waiters[key] == 0 and not task.done():
+                    task.cancel()
+
+    def _drop_inflight(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._inflight_waiters[key]
+
+    @staticmethod
+    def _record_usage(response: Any):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            metrics.LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+            metrics.LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+
+    async def _call_async(self, kwargs: Dict, cost: int, deadline: float) -> str:
+        response = await self._with_retries_async(
+            lambda: self.async_client.chat.completions.create(**kwargs), cost, deadline
+        )
+        self._record_usage(response)
+        return response.choices[0].message.content
+
+    async def _with_retries_async(
+        self,
+        make_call: Callable[[], Awaitable[Any]],
+        cost: int,
+        deadline: float
+    ) -> Any:
+        attempt = 0
+        while True:
+            await self.request_bucket.acquire_async(1, deadline)
+            try:
+                await self.token_bucket.acquire_async(cost, deadline)
+            except DeadlineExceeded:
+                self.request_bucket.release(1)
+                raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("LLM call deadline exceeded")
+            try:
+                self.calls += 1
+                with metrics.timer('llm'):
+                    response = await asyncio.wait_for(make_call(), remaining)
+                metrics.LLM_REQUESTS.inc(outcome="ok")
+                return response
+            except asyncio.TimeoutError:
+                metrics.LLM_REQUESTS.inc(outcome="deadline")
+                raise DeadlineExceeded("LLM call deadline exceeded")
+            except _retryable_errors() as e:
+                delay = self._backoff(attempt, e)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    metrics.LLM_REQUESTS.inc(outcome="error")
+                    raise
+                metrics.LLM_REQUESTS.inc(outcome="retry")
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def astream(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 300,
+        temperature: float = 0.1,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """Stream completion text deltas; retries only happen before the first token"""
+        _, kwargs, cost = self._request(messages, max_tokens, temperature, None)
+        deadline = time.monotonic() + (timeout or self.timeout)
+        stream = await self._with_retries_async(
+            lambda: self.async_client.chat.completions.create(**kwargs, stream=True), cost, deadline
+        )
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded("LLM call deadline exceeded")
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded("LLM call deadline exceeded")
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
+
+    # ------------------------------------------------------------------ sync
+
+    def complete(
+        self,
+        messages: List[Dict],
+        max_tokens: int = 300,
+        temperature: float = 0.1,
+        response_format: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Blocking chat completion for synchronous callers"""
+        key, kwargs, cost = self._request(messages, max_tokens, temperature, response_format)
+
+        with self._inflight_lock:
+            existing = self._inflight_sync.get(key)
+            if existing is None:
+                future: Future = Future()
+                self._inflight_sync[key] = future
+        if existing is not None:
+            self.coalesced += 1
+            return existing.result()
+
+        try:
+            deadline = time.monotonic() + (timeout or self.timeout)
+            result = self._call_sync(kwargs, cost, deadline)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight_sync[key]
+
+    def _call_sync(self, kwargs: Dict, cost: int, deadline: float) -> str:
+        attempt = 0
+        while True:
+            self.request_bucket.acquire(1, deadline)
+            try:
+                self.token_bucket.acquire(cost, deadline)
+            except DeadlineExceeded:
+                self.request_bucket.release(1)
+                raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("LLM call deadline exceeded")
+            try:
+                self.calls += 1
+                with metrics.timer('llm'):
+                    response = self.client.with_options(timeout=remaining).chat.completions.create(**kwargs)
+                metrics.LLM_REQUESTS.inc(outcome="ok")
+                self._record_usage(response)
+                return response.choices[0].message.content
+            except _retryable_errors() as e:
+                delay = self._backoff(attempt, e)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    metrics.LLM_REQUESTS.inc(outcome="error")
+                    raise
+                metrics.LLM_REQUESTS.inc(outcome="retry")
+                attempt += 1
+                self.retries += 1
+                time.sleep(delay)
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "configured": self.configured,
+        }
+
+
+class MicroBatcher:
+    """Collects single requests for a short window and hands them to a batch function
+
+    batch_fn receives a list of items and must return one result per item, in order.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        batch_size: int = 8,
+        window: float = 0.05
+    ):
+        self.batch_fn = batch_fn
+        self.batch_size = batch_size
+        self.window = window
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            asyncio.create_task(self._flush(batch))
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+
+# Global instance
+_llm_client = None
+
+
+def get_llm_client(api_key: Optional[str], model: str = "llama-3.3-70b-versatile", **options) -> LLMClient:
+    """Get or create the shared LLM client"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient(api_key, model, **options)
+    return _llm_client
@@ -0,0 +1,340 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.embedding_service import EmbeddingService
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.scoring import FeatureMatrix, top_k_indices
+
+
+class MatchEngine:
+    """Precomputed candidate x job-role match scores
+
+    Each role is reduced once to a requirement skill set and a requirement
+    vector. Scores (0-100) blend skill coverage, the share of role skills the
+    candidate has, with cosine similarity of the role vector to the
+    candidate's resume vector. The score table is updated a row at a time as
+    candidates are indexed and a column at a time as roles change, so
+    shortlists are read straight from it.
+    """
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        matcher: KeywordMatcher,
+        roles_path: Optional[str] = None,
+        skill_weight: float = 0.7
+    ):
+        self.embedding_service = embedding_service
+        self.matcher = matcher
+        self.roles_path = roles_path
+        self.skill_weight = skill_weight
+
+        self.roles: Dict[str, Dict] = {}
+        self.role_ids: List[str] = []
+        self.role_skills: List[frozenset] = []
+        self.role_vectors = np.zeros((0, embedding_service.backend.dimension), dtype=np.float32)
+
+        # Score table rows follow candidate_matrix rows, columns follow role_ids
+        self.candidate_matrix = FeatureMatrix()
+        self.candidate_skills: Dict[str, Tuple[str, ...]] = {}
+        self.scores = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._roles_mtime: Optional[int] = None
+
+        self.refresh_roles()
+
+    # ----------------------------------------------------------------- roles
+
+    def extract_role_skills(self, requirements: Optional[str], description: Optional[str]) -> List[str]:
+        """Canonical skills named in a role's requirements and description"""
+        skills = set(self.matcher.find_all(f"{requirements or ''}\n{description or ''}").get('skills', []))
+        # Comma-separated requirements outside the taxonomy are kept verbatim
+        for requirement in (requirements or '').split(','):
+            requirement = requirement.strip()
+            if requirement and not self.matcher.find_all(requirement).get('skills'):
+                skills.add(requirement)
+        return sorted(skills)
+
+    def upsert_roles(self, roles: List[Dict], save: bool = True):
+        """Add or replace job roles and recompute their score columns"""
+        if not roles:
+            return
+        with self._roles_file_lock(save):
+            self._upsert_roles(roles, save)
+
+    def _upsert_roles(self, roles: List[Dict], save: bool):
+        if save:
+            # Start from the roles file as other workers left it, or their roles would be lost on save
+            self.refresh_roles()
+        texts = [
+            f"{role['role_name']}. {role.get('requirements') or ''}. {role.get('description') or ''}"
+            for role in roles
+        ]
+        vectors = self.embedding_service.generate_embeddings(texts)
+
+        with self._lock:
+            columns = []
+            for role, vector in zip(roles, vectors):
+                role_id = role['id']
+                skills = self.extract_role_skills(role.get('requirements'), role.get('description'))
+                self.roles[role_id] = {**role, 'skills': skills}
+                if role_id in self.role_ids:
+                    column = self.role_ids.index(role_id)
+                    self.role_skills[column] = frozenset(skill.lower() for skill in skills)
+                    self.role_vectors[column] = vector
+                else:
+                    column = len(self.role_ids)
+                    self.role_ids.append(role_id)
+                    self.role_skills.append(frozenset(skill.lower() for skill in skills))
+                    self.role_vectors = np.vstack([self.role_vectors, vector[np.newaxis, :]])
+                    self.scores = np.hstack([
+                        self.scores,
+                        np.zeros((self.scores.shape[0], 1), dtype=np.float32)
+                    ])
+                columns.append(column)
+            self._score_columns(sorted(set(columns)))
+            if save:
+                self._save_roles()
+
+    def _roles_file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.roles_path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def refresh_roles(self):
+        """Reload job roles if another worker process rewrote the roles file"""
+        mtime = self._roles_file_mtime()
+        if mtime is None or mtime == self._roles_mtime:
+            return
+        try:
+            with open(self.roles_path) as f:
+                roles = json.load(f)
+        except Exception as e:
+            print(f"Error loading job roles from {self.roles_path}: {e}")
+            return
+        self._roles_mtime = mtime
+        keep = {role['id'] for role in roles}
+        for role_id in [role_id for role_id in self.role_ids if role_id not in keep]:
+            self._remove_role(role_id, save=False)
+        changed = [role for role in roles if self._role_record(role['id']) != role]
+        if changed:
+            self._upsert_roles(changed, save=False)
+
+    def _role_record(self, role_id: str) -> Optional[Dict]:
+        """A role as stored in the roles file"""
+        role = self.roles.get(role_id)
+        if role is None:
+            return None
+        return {key: value for key, value in role.items() if key != 'skills'}
+
+    @contextmanager
+    def _roles_file_lock(self, enabled: bool = True):
+        """Serialise read-modify-write of the roles file across worker processes"""
+        if not enabled or not self.roles_path:
+            yield
+            return
+        directory = os.path.dirname(self.roles_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.roles_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def remove_role(self, role_id: str, save: bool = True) -> bool:
+        with self._roles_file_lock(save):
+            if save:
+                self.refresh_roles()
+            return self._remove_role(role_id, save)
+
+    def _remove_role(self, role_id: str, save: bool) -> bool:
+        with self._lock:
+            if role_id not in self.roles:
+                return False
+            column = self.role_ids.index(role_id)
+            del self.roles[role_id]
+            del self.role_ids[column]
+            del self.role_skills[column]
+            self.role_vectors = np.delete(self.role_vectors, column, axis=0)
+            self.scores = np.delete(self.scores, column, axis=1)
+            if save:
+                self._save_roles()
+        return True
+
+    def _save_roles(self):
+        if not self.roles_path:
+            return
+        directory = os.path.dirname(self.roles_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        records = [self._role_record(role_id) for role_id in self.role_ids]
+        tmp_path = self.roles_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, self.roles_path)
+        self._roles_mtime = self._roles_file_mtime()
+
+    # ------------------------------------------------------------ candidates
+
+    def load_candidates(self, candidates: Iterable[Tuple[str, Iterable[str]]]):
+        """Bulk-load (candidate_id, skills) pairs and rebuild the whole score table"""
+        with self._lock:
+            for candidate_id, skills in candidates:
+                self.candidate_skills[candidate_id] = tuple(skills)
+                self.candidate_matrix.upsert(candidate_id, self.candidate_skills[candidate_id])
+            self._rebuild()
+
+    def update_candidate(self, candidate_id: str, skills: Iterable[str]):
+        """Score one newly indexed or re-indexed candidate against every role"""
+        skills = tuple(skills)
+        with self._lock:
+            rows_before = len(self.candidate_matrix.row_ids)
+            previous_row = self.candidate_matrix.id_to_row.get(candidate_id)
+            self.candidate_skills[candidate_id] = skills
+            self.candidate_matrix.upsert(candidate_id, skills)
+            if len(self.candidate_matrix.row_ids) != rows_before + 1:
+                # The upsert compacted away tombstoned rows, so row numbers moved
+                self._rebuild()
+                return
+
+            row = self.candidate_matrix.id_to_row[candidate_id]
+            self._ensure_rows(row + 1)
+            if previous_row is not None:
+                self.scores[previous_row] = -1.0
+            if self.role_ids:
+                lowered = {skill.lower() for skill in skills}
+                coverage = np.array([
+                    len(required & lowered) / len(required) if required else 0.0
+                    for required in self.role_skills
+                ], dtype=np.float32)
+                vector = self.embedding_service.candidate_vectors([candidate_id])[0]
+                self.scores[row] = self._combine(coverage, self.role_vectors @ vector)
+
+    def remove_candidate(self, candidate_id: str):
+        with self._lock:
+            row = self.candidate_matrix.id_to_row.get(candidate_id)
+            if row is None:
+                return
+            rows_before = len(self.candidate_matrix.row_ids)
+            self.candidate_matrix.delete(candidate_id)
+            self.candidate_skills.pop(candidate_id, None)
+            if len(self.candidate_matrix.row_ids) != rows_before:
+                self._rebuild()
+            else:
+                self.scores[row] = -1.0
+
+    # --------------------------------------------------------------- scoring
+
+    def _combine(self, coverage: np.ndarray, similarity: np.ndarray) -> np.ndarray:
+        semantic = np.clip(similarity, 0.0, 1.0)
+        return 100.0 * (self.skill_weight * coverage + (1.0 - self.skill_weight) * semantic)
+
+    def _ensure_rows(self, size: int):
+        if size <= self.scores.shape[0]:
+            return
+        capacity = max(size, self.scores.shape[0] * 2, 64)
+        grown = np.full((capacity, len(self.role_ids)), -1.0, dtype=np.float32)
+        grown[:self.scores.shape[0]] = self.scores
+        self.scores = grown
+
+    def _score_columns(self, columns: List[int]):
+        """Recompute score columns for the given roles across all candidates"""
+        rows = len(self.candidate_matrix.row_ids)
+        if not columns or rows == 0:
+            return
+        self._ensure_rows(rows)
+        coverage = self.candidate_matrix.coverage_batch([self.role_skills[column] for column in columns])
+        vectors = self.embedding_service.candidate_vectors(self.candidate_matrix.row_ids)
+        similarity = self.role_vectors[columns] @ vectors.T
+        scores = self._combine(np.maximum(coverage, 0.0), similarity)
+        scores[coverage < 0] = -1.0
+        self.scores[:rows, columns] = scores.T
+
+    def _rebuild(self):
+        self.scores = np.full(
+            (len(self.candidate_matrix.row_ids), len(self.role_ids)), -1.0, dtype=np.float32
+        )
+        self._score_columns(list(range(len(self.role_ids))))
+
+    def _skill_breakdown(self, candidate_id: str, role_id: str) -> Tuple[List[str], List[str]]:
+        candidate = {skill.lower() for skill in self.candidate_skills.get(candidate_id, ())}
+        required = self.roles[role_id]['skills']
+        matching = [skill for skill in required if skill.lower() in candidate]
+        missing = [skill for skill in required if skill.lower() not in candidate]
+        return matching, missing
+
+    def match_job_role(self, role_id: str, top_k: int = 20, min_score: float = 0.0) -> List[Dict]:
+        """Best candidates for a role, read from the score table"""
+        self.refresh_roles()
+        with self._lock:
+            if role_id not in self.roles:
+                raise KeyError(role_id)
+            rows = len(self.candidate_matrix.row_ids)
+            column = self.scores[:rows, self.role_ids.index(role_id)]
+            order = top_k_indices(column, top_k)
+            matches = []
+            for row in order:
+                score = float(column[row])
+                # Zero means nothing in common; unscored pairs are negative
+                if score < min_score or score <= 0:
+                    break
+                candidate_id = self.candidate_matrix.row_ids[row]
+                matching, missing = self._skill_breakdown(candidate_id, role_id)
+                matches.append({
+                    'candidate_id': candidate_id,
+                    'match_score': round(score, 1),
+                    'matching_skills': matching,
+                    'missing_skills': missing
+                })
+        return matches
+
+    def match_candidate(self, candidate_id: str, top_k: int = 3, min_score: float = 0.0) -> List[Dict]:
+        """Best roles for a candidate, read from the score table"""
+        self.refresh_roles()
+        with self._lock:
+            row = self.candidate_matrix.id_to_row.get(candidate_id)
+            if row is None:
+                raise KeyError(candidate_id)
+            scores = self.scores[row, :len(self.role_ids)]
+            matches = []
+            for column in top_k_indices(scores, top_k):
+                score = float(scores[column])
+                # Same cutoff as match_job_role
+                if score < min_score or score <= 0:
+                    break
+                role_id = self.role_ids[column]
+                matching, missing = self._skill_breakdown(candidate_id, role_id)
+                matches.append({
+                    'role_id': role_id,
+                    'role_name': self.roles[role_id]['role_name'],
+                    'category': self.roles[role_id].get('category'),
+                    'match_score': round(score, 1),
+                    'matching_skills': matching,
+                    'missing_skills': missing
+                })
+        return matches
+
+
+# Global instance
+_match_engine = None
+
+
+def get_match_engine(
+    embedding_service: EmbeddingService,
+    matcher: KeywordMatcher,
+    **options
+) -> MatchEngine:
+    """Get or create the match engine instance"""
+    global _match_engine
+    if _match_engine is None:
+        _match_engine = MatchEngine(embedding_service, matcher, **options)
+    return _match_engine
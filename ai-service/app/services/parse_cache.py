@@ -0,0 +1,129 @@
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.models.resume import ParsedResume
+
+
+_SUMMARY_LENGTH = struct.Struct("<I")
+
+
+class ParseCache:
+    """Content-addressed cache of parse results in a local SQLite file
+
+    Entries are keyed on the SHA-256 of the downloaded resume bytes plus the
+    parser and model versions, so a version bump invalidates older entries.
+    When the stored payloads exceed max_bytes, least recently used entries
+    are evicted.
+
+    Payloads are the summary followed by ParsedResume.to_bytes(), so a hit
+    decodes straight into the compact record without a JSON round trip.
+    """
+
+    # Part of every key; bump when the payload layout changes
+    PAYLOAD_FORMAT = "bin1"
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parse_cache ("
+            " key TEXT PRIMARY KEY,"
+            " payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_parse_cache_last_access ON parse_cache(last_access)"
+        )
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM parse_cache"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(file_content: bytes, *versions: str) -> str:
+        """Cache key for resume bytes under the given parser/model versions"""
+        digest = hashlib.sha256(file_content).hexdigest()
+        return ":".join((digest,) + versions + (ParseCache.PAYLOAD_FORMAT,))
+
+    def get(self, key: str) -> Optional[Tuple[ParsedResume, str]]:
+        """(parsed resume, summary) for a key, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM parse_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE parse_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+        payload = memoryview(row[0])
+        (summary_length,) = _SUMMARY_LENGTH.unpack_from(payload, 0)
+        summary_end = _SUMMARY_LENGTH.size + summary_length
+        summary = str(payload[_SUMMARY_LENGTH.size:summary_end], "utf-8")
+        return ParsedResume.from_bytes(payload[summary_end:]), summary
+
+    def put(self, key: str, parsed: ParsedResume, summary: str):
+        summary_bytes = summary.encode("utf-8")
+        payload = _SUMMARY_LENGTH.pack(len(summary_bytes)) + summary_bytes + parsed.to_bytes()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM parse_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time())
+            )
+            self._total_bytes += len(payload) - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until 90% of the size budget remains"""
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, size FROM parse_cache ORDER BY last_access"
+        )
+        doomed = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            doomed.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM parse_cache WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+QUERY_TOKEN_PATTERN = re.compile(r"[a-z0-9+#.]+")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, drop punctuation and sort tokens so equivalent queries share a key"""
+    tokens = QUERY_TOKEN_PATTERN.findall(query.lower())
+    return " ".join(sorted(token.strip(".") for token in tokens if token.strip(".")))
+
+
+class QueryCache:
+    """TTL + LRU cache of per-query artifacts (LLM features, query vectors)
+
+    Also keeps a count and last-seen time per normalized query so the most
+    frequent recent queries can be saved and used to pre-warm a fresh process.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._frequency: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, query: str) -> Optional[Any]:
+        key = f"{namespace}:{normalize_query(query)}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, namespace: str, query: str, value: Any):
+        key = f"{namespace}:{normalize_query(query)}"
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, query: str):
+        """Count a search for pre-warming; keeps the original wording of the latest query"""
+        normalized = normalize_query(query)
+        if not normalized:
+            return
+        with self._lock:
+            stats = self._frequency.setdefault(normalized, {'count': 0})
+            stats['count'] += 1
+            stats['last_seen'] = time.time()
+            stats['query'] = query
+
+    def frequent_queries(self, limit: int, max_age_seconds: Optional[float] = None) -> List[str]:
+        """Most frequent queries seen within max_age_seconds"""
+        cutoff = time.time() - max_age_seconds if max_age_seconds else 0
+        with self._lock:
+            recent = [
+                stats for stats in self._frequency.values()
+                if stats.get('last_seen', 0) >= cutoff
+            ]
+        recent.sort(key=lambda stats: stats['count'], reverse=True)
+        return [stats['query'] for stats in recent[:limit]]
+
+    def save_log(self, path: str, limit: int = 1000):
+        """Persist the most frequent queries for the next startup"""
+        with self._lock:
+            top = sorted(
+                self._frequency.items(),
+                key=lambda item: item[1]['count'],
+                reverse=True
+            )[:limit]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(top), f)
+        os.replace(tmp_path, path)
+
+    def load_log(self, path: str):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"Error loading query log from {path}: {e}")
+            return
+        with self._lock:
+            for normalized, stats in saved.items():
+                current = self._frequency.setdefault(normalized, {'count': 0})
+                current['count'] += stats.get('count', 0)
+                current['last_seen'] = max(current.get('last_seen', 0), stats.get('last_seen', 0))
+                current.setdefault('query', stats.get('query', normalized))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "tracked_queries": len(self._frequency),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,91 +1,213 @@
-import re
 import io
-import requests
-from typing import List, Dict, Optional
-import PyPDF2
-import pdfplumber
-from docx import Document
+from typing import Iterator, List, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core import metrics
+from app.core.concurrency import get_http_client, run_extraction, stage
+from app.core.startup import load_module
+from app.models.resume import ParsedResume
+from app.services.keyword_matcher import KeywordMatcher, load_taxonomy
+from app.services.section_extractor import SectionExtractor
 
 
 class ResumeParser:
     """Service for parsing resume documents"""
 
+    # Bump whenever extraction output changes; cached parse results are keyed on it
+    PARSER_VERSION = "4"
+
     SKILL_PATTERNS = {
         'programming': [
-            'python', 'java', 'javascript', 'typescript', 'c\\+\\+', 'c#', 'ruby', 'php', 
-            'go', 'rust', 'swift', 'kotlin', 'scala', 'r', 'matlab'
+            'Python', 'Java', 'JavaScript', 'TypeScript', 'C++', 'C#', 'Ruby', 'PHP',
+            'Go', 'Rust', 'Swift', 'Kotlin', 'Scala', 'R', 'MATLAB'
         ],
         'web': [
-            'react', 'vue', 'angular', 'node\\.js', 'express', 'django', 'flask', 
-            'fastapi', 'spring', 'asp\\.net', 'html', 'css', 'tailwind', 'bootstrap'
+            'React', 'Vue', 'Angular', 'Node.js', 'Express', 'Django', 'Flask',
+            'FastAPI', 'Spring', 'ASP.NET', 'HTML', 'CSS', 'Tailwind', 'Bootstrap'
         ],
         'data': [
-            'sql', 'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch',
-            'pandas', 'numpy', 'tensorflow', 'pytorch', 'scikit-learn', 'spark'
+            'SQL', 'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'Elasticsearch',
+            'Pandas', 'NumPy', 'TensorFlow', 'PyTorch', 'Scikit-learn', 'Spark'
         ],
         'cloud': [
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'jenkins',
-            'gitlab', 'github actions', 'ci/cd'
+            'AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes', 'Terraform', 'Jenkins',
+            'GitLab', 'GitHub Actions', 'CI/CD'
         ],
         'tools': [
-            'git', 'linux', 'bash', 'rest api', 'graphql', 'microservices',
-            'agile', 'scrum', 'jira', 'confluence'
+            'Git', 'Linux', 'Bash', 'REST API', 'GraphQL', 'Microservices',
+            'Agile', 'Scrum', 'Jira', 'Confluence'
         ]
     }
 
-    DEGREE_PATTERNS = [
-        r'(bachelor|b\.?s\.?|b\.?a\.?|b\.?tech|b\.?e\.?)',
-        r'(master|m\.?s\.?|m\.?a\.?|m\.?tech|mba)',
-        r'(ph\.?d\.?|doctorate|doctoral)',
-        r'(associate|a\.?s\.?|diploma)'
+    SKILL_ALIASES = {
+        'Go': ['golang'],
+        'Node.js': ['nodejs', 'node js'],
+        'React': ['react.js', 'reactjs'],
+        'Vue': ['vue.js', 'vuejs'],
+        'PostgreSQL': ['postgres'],
+        'Kubernetes': ['k8s'],
+        'Scikit-learn': ['sklearn'],
+        'REST API': ['rest apis', 'restful api', 'restful apis'],
+        'CI/CD': ['ci / cd'],
+    }
+
+    LANGUAGES = [
+        'English', 'Spanish', 'French', 'German', 'Chinese', 'Mandarin',
+        'Hindi', 'Arabic', 'Portuguese', 'Russian', 'Japanese', 'Korean',
+        'Italian', 'Dutch', 'Swedish', 'Polish', 'Turkish', 'Vietnamese'
+    ]
+
+    CERT_KEYWORDS = [
+        'certified', 'certification', 'certifications', 'certificate', 'certificates'
     ]
 
+    @classmethod
+    def build_matcher(cls, taxonomy_path: Optional[str] = None) -> KeywordMatcher:
+        """Compile skills, languages and certification keywords into one matcher"""
+        entries = []
+        for skills in cls.SKILL_PATTERNS.values():
+            for skill in skills:
+                entries.append(('skills', skill, skill))
+                for alias in cls.SKILL_ALIASES.get(skill, []):
+                    entries.append(('skills', skill, alias))
+        for language in cls.LANGUAGES:
+            entries.append(('languages', language, language))
+        for keyword in cls.CERT_KEYWORDS:
+            entries.append(('certifications', keyword, keyword))
+
+        if taxonomy_path:
+            entries.extend(load_taxonomy(taxonomy_path))
+
+        return KeywordMatcher(entries)
+
+    SECTIONS = SectionExtractor()
+
+    def __init__(self, matcher: Optional[KeywordMatcher] = None):
+        self.matcher = matcher or ResumeParser.MATCHER
+
     def download_file(self, url: str) -> bytes:
         """Download file from URL"""
         try:
-            response = requests.get(url, timeout=30)
+            response = load_module("requests").get(url, timeout=30)
             response.raise_for_status()
             return response.content
         except Exception as e:
             raise Exception(f"Failed to download file: {str(e)}")
 
+    @metrics.timed('pdf_extract')
     def extract_text_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file"""
-        text = ""
-        
-        # Try with pdfplumber first (better formatting)
+        """Extract text from PDF file, stopping once max_text_length is reached"""
+        parts = []
+        length = 0
+
+        for page_text in self.iter_pdf_pages(file_content):
+            parts.append(page_text)
+            length += len(page_text) + 1
+            if length >= settings.max_text_length:
+                break
+
+        return "\n".join(parts).strip()
+
+    def iter_pdf_pages(
+        self,
+        file_content: bytes,
+        mode: Optional[str] = None,
+        max_pages: Optional[int] = None
+    ) -> Iterator[str]:
+        """Yield the text of each non-empty page, up to max_pages
+
+        "fast" mode reads pages with PyPDF2 and only falls back to pdfplumber
+        for pages whose fast text looks empty or garbled. "accurate" mode uses
+        pdfplumber for every page and PyPDF2 only if pdfplumber cannot open
+        the file.
+        """
+        mode = mode or settings.pdf_extraction_mode
+        max_pages = max_pages or settings.pdf_max_pages
+        if mode == "fast":
+            pages = self._iter_pdf_pages_fast(file_content, max_pages)
+        elif mode == "accurate":
+            pages = self._iter_pdf_pages_accurate(file_content, max_pages)
+        else:
+            raise Exception(f"Unknown PDF extraction mode: {mode}")
+
+        for page_text in pages:
+            if page_text:
+                yield page_text
+
+    def _iter_pdf_pages_fast(self, file_content: bytes, max_pages: int) -> Iterator[str]:
         try:
-            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except:
-            # Fallback to PyPDF2
-            try:
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            except Exception as e:
-                raise Exception(f"Failed to extract PDF text: {str(e)}")
-        
-        return text.strip()
+            pdf_reader = load_module("PyPDF2").PdfReader(io.BytesIO(file_content))
+            page_count = len(pdf_reader.pages)
+        except Exception:
+            # PyPDF2 can't read the file at all; let pdfplumber try
+            yield from self._iter_pdf_pages_accurate(file_content, max_pages)
+            return
 
+        plumber_pdf = None
+        try:
+            for page_number in range(min(page_count, max_pages)):
+                try:
+                    page_text = pdf_reader.pages[page_number].extract_text() or ""
+                except Exception:
+                    page_text = ""
+
+                if _looks_garbled(page_text):
+                    if plumber_pdf is None:
+                        plumber_pdf = load_module("pdfplumber").open(io.BytesIO(file_content))
+                    page_text = plumber_pdf.pages[page_number].extract_text() or page_text
+
+                yield page_text
+        finally:
+            if plumber_pdf is not None:
+                plumber_pdf.close()
+
+    def _iter_pdf_pages_accurate(self, file_content: bytes, max_pages: int) -> Iterator[str]:
+        try:
+            pdf = load_module("pdfplumber").open(io.BytesIO(file_content))
+        except Exception:
+            pdf = None
+
+        if pdf is not None:
+            with pdf:
+                for page in pdf.pages[:max_pages]:
+                    yield page.extract_text() or ""
+            return
+
+        # Fallback to PyPDF2
+        try:
+            pdf_reader = load_module("PyPDF2").PdfReader(io.BytesIO(file_content))
+            pages = pdf_reader.pages[:max_pages]
+        except Exception as e:
+            raise Exception(f"Failed to extract PDF text: {str(e)}")
+        for page in pages:
+            yield page.extract_text() or ""
+
+    @metrics.timed('docx_extract')
     def extract_text_from_docx(self, file_content: bytes) -> str:
         """Extract text from DOCX file"""
         try:
-            doc = Document(io.BytesIO(file_content))
+            doc = load_module("docx").Document(io.BytesIO(file_content))
             text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
             return text.strip()
         except Exception as e:
             raise Exception(f"Failed to extract DOCX text: {str(e)}")
 
+    @metrics.timed('download')
+    async def download_file_async(self, url: str) -> bytes:
+        """Download file from URL with the shared pooled async client"""
+        try:
+            response = await get_http_client().get(url)
+            response.raise_for_status()
+            return response.content
+        except Exception as e:
+            raise Exception(f"Failed to download file: {str(e)}")
+
     def extract_text(self, resume_url: str, filename: str) -> str:
         """Extract text from resume file"""
         file_content = self.download_file(resume_url)
-        
+        return self.extract_text_from_bytes(file_content, filename)
+
+    def extract_text_from_bytes(self, file_content: bytes, filename: str) -> str:
+        """Extract text from downloaded resume bytes based on the file extension"""
         if filename.lower().endswith('.pdf'):
             return self.extract_text_from_pdf(file_content)
         elif filename.lower().endswith('.docx'):
@@ -95,144 +217,125 @@ class ResumeParser:
 
     def extract_skills(self, text: str) -> List[str]:
         """Extract skills from resume text"""
-        text_lower = text.lower()
-        found_skills = set()
-        
-        for category, skills in self.SKILL_PATTERNS.items():
-            for skill in skills:
-                pattern = r'\b' + skill + r'\b'
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    # Capitalize skill name properly
-                    skill_name = skill.replace('\\', '').replace('.', '')
-                    found_skills.add(skill_name.title())
-        
-        return sorted(list(found_skills))
+        return self.matcher.find_all(text).get('skills', [])
 
     def extract_education(self, text: str) -> List[Dict]:
         """Extract education information"""
-        education = []
-        lines = text.split('\n')
-        
-        for i, line in enumerate(lines):
-            line_lower = line.lower()
-            
-            # Check for degree patterns
-            for pattern in self.DEGREE_PATTERNS:
-                if re.search(pattern, line_lower):
-                    degree_info = {
-                        'degree': line.strip(),
-                        'institution': '',
-                        'field': None,
-                        'year': None
-                    }
-                    
-                    # Look for institution in nearby lines
-                    if i + 1 < len(lines):
-                        degree_info['institution'] = lines[i + 1].strip()
-                    
-                    # Look for year (4 digits)
-                    year_match = re.search(r'\b(19|20)\d{2}\b', line)
-                    if year_match:
-                        degree_info['year'] = int(year_match.group())
-                    
-                    education.append(degree_info)
-                    break
-        
-        return education[:3]  # Return max 3 education entries
+        return [
+            {'degree': degree, 'institution': institution, 'field': field, 'year': year}
+            for degree, institution, field, year in self.SECTIONS.extract(text)['education']
+        ]
 
     def extract_certifications(self, text: str) -> List[Dict]:
         """Extract certifications"""
-        certifications = []
-        cert_keywords = ['certified', 'certification', 'certificate']
-        
-        lines = text.split('\n')
-        for line in lines:
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in cert_keywords):
-                cert_info = {
-                    'name': line.strip(),
-                    'year': None
-                }
-                
-                # Look for year
-                year_match = re.search(r'\b(19|20)\d{2}\b', line)
-                if year_match:
-                    cert_info['year'] = int(year_match.group())
-                
-                certifications.append(cert_info)
-        
-        return certifications[:5]  # Return max 5 certifications
+        certifications = self.SECTIONS.extract(text, self.scan_keywords(text)['cert_offsets'])['certifications']
+        return [{'name': name, 'year': year} for name, year in certifications]
 
     def estimate_experience(self, text: str) -> int:
         """Estimate years of experience"""
-        # Look for explicit experience mentions
-        exp_patterns = [
-            r'(\d+)\+?\s*years?\s+of\s+experience',
-            r'experience\s*:\s*(\d+)\+?\s*years?',
-            r'(\d+)\+?\s*years?\s+in',
-        ]
-        
-        years = []
-        for pattern in exp_patterns:
-            matches = re.findall(pattern, text.lower())
-            for match in matches:
-                try:
-                    years.append(int(match))
-                except:
-                    pass
-        
-        if years:
-            return max(years)
-        
-        # Estimate from date ranges
-        year_matches = re.findall(r'\b(19|20)\d{2}\b', text)
-        if len(year_matches) >= 2:
-            years_list = [int(year) for year in year_matches]
-            if years_list:
-                current_year = 2024
-                oldest_year = min(years_list)
-                if oldest_year < current_year:
-                    return min(current_year - oldest_year, 30)  # Cap at 30 years
-        
-        return 0
+        return self.SECTIONS.extract(text)['experience_years']
 
     def extract_languages(self, text: str) -> List[str]:
         """Extract languages"""
-        common_languages = [
-            'english', 'spanish', 'french', 'german', 'chinese', 'mandarin',
-            'hindi', 'arabic', 'portuguese', 'russian', 'japanese', 'korean',
-            'italian', 'dutch', 'swedish', 'polish', 'turkish', 'vietnamese'
-        ]
-        
-        text_lower = text.lower()
-        found_languages = set()
-        
-        for lang in common_languages:
-            if re.search(r'\b' + lang + r'\b', text_lower):
-                found_languages.add(lang.title())
-        
-        return sorted(list(found_languages))
+        return self.matcher.find_all(text).get('languages', [])
+
+    @metrics.timed('keyword_scan')
+    def scan_keywords(self, text: str) -> Dict:
+        """Find skills, languages and certification keyword offsets in one pass over the text"""
+        skills = set()
+        languages = set()
+        cert_offsets = []
+
+        for kind, display, offset in self.matcher.iter_matches(text):
+            if kind == 'languages':
+                languages.add(display)
+            elif kind == 'certifications':
+                cert_offsets.append(offset)
+            else:
+                skills.add(display)
+
+        return {
+            'skills': sorted(skills),
+            'languages': sorted(languages),
+            'cert_offsets': cert_offsets,
+        }
 
-    def parse_resume(self, resume_url: str, filename: str) -> Dict:
+    def parse_resume(self, resume_url: str, filename: str) -> ParsedResume:
         """Main method to parse resume"""
         # Extract text
         text = self.extract_text(resume_url, filename)
-        
+        return self.analyze_text(text)
+
+    def parse_document(self, file_content: bytes, filename: str) -> ParsedResume:
+        """Parse already-downloaded resume bytes"""
+        return self.analyze_text(self.extract_text_from_bytes(file_content, filename))
+
+    async def parse_resume_async(self, resume_url: str, filename: str) -> ParsedResume:
+        """Parse resume without blocking the event loop
+
+        The download runs on the shared async HTTP client; extraction and field
+        analysis run in the process pool. Both stages are concurrency-limited.
+        """
+        file_content = await self.fetch_document(resume_url)
+        return await self.parse_document_async(file_content, filename)
+
+    async def fetch_document(self, resume_url: str) -> bytes:
+        """Download resume bytes within the download stage limit"""
+        async with stage('download'):
+            return await self.download_file_async(resume_url)
+
+    async def parse_document_async(self, file_content: bytes, filename: str) -> ParsedResume:
+        """Parse resume bytes in the process pool within the extract stage limit"""
+        async with stage('extract'):
+            parsed, observations = await run_extraction(_parse_document, file_content, filename)
+        metrics.replay(observations)
+        return parsed
+
+    @metrics.timed('analyze')
+    def analyze_text(self, text: str) -> ParsedResume:
+        """Extract structured fields from resume text"""
         if not text or len(text) < 50:
             raise Exception("Failed to extract meaningful text from resume")
         
         # Extract all information
-        skills = self.extract_skills(text)
-        education = self.extract_education(text)
-        certifications = self.extract_certifications(text)
-        experience_years = self.estimate_experience(text)
-        languages = self.extract_languages(text)
-        
-        return {
-            'extracted_text': text[:10000],  # Limit text length
-            'skills': skills,
-            'education': education,
-            'certifications': certifications,
-            'experience_years': experience_years,
-            'languages': languages if languages else ['English']  # Default to English
-        }
+        keywords = self.scan_keywords(text)
+        languages = keywords['languages']
+        sections = self.extract_sections(text, keywords['cert_offsets'])
+
+        return ParsedResume.build(
+            # Same cap as chunked embedding, so chunks reach deep into long resumes;
+            # responses still return at most EXTRACTED_TEXT_LIMIT characters (see to_dict)
+            text[:settings.max_text_length],
+            keywords['skills'],
+            languages if languages else ['English'],  # Default to English
+            sections['education'],
+            sections['certifications'],
+            sections['experience_years']
+        )
+
+    @metrics.timed('section_extract')
+    def extract_sections(self, text: str, cert_offsets: List[int]) -> Dict:
+        """Education, certifications and experience years in one pass over the lines"""
+        return self.SECTIONS.extract(text, cert_offsets)
+
+
+# Built once at import; every parser instance shares the compiled matcher
+ResumeParser.MATCHER = ResumeParser.build_matcher(settings.skill_taxonomy_path)
+
+
+def _looks_garbled(page_text: str) -> bool:
+    """Heuristic for fast-path page text that needs a pdfplumber re-read"""
+    stripped = page_text.strip()
+    if len(stripped) < 20:
+        return True
+    if stripped.count("(cid:") > 3:
+        return True
+    readable = sum(1 for char in stripped if char.isalnum() or char.isspace())
+    return readable / len(stripped) < 0.6
+
+
+def _parse_document(file_content: bytes, filename: str) -> Tuple[ParsedResume, List]:
+    """Process-pool entry point: parsed resume plus stage timings for the parent to record"""
+    with metrics.capture() as observations:
+        parsed = ResumeParser().parse_document(file_content, filename)
+    return parsed, observations
@@ -0,0 +1,199 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k == len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row top-k of a (queries, items) score matrix as (indices, scores), best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.zeros((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+    if k == scores.shape[1]:
+        indices = np.argsort(-scores, axis=1, kind="stable")
+    else:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, indices, axis=1), axis=1, kind="stable")
+        indices = np.take_along_axis(indices, order, axis=1)
+    return indices, np.take_along_axis(scores, indices, axis=1)
+
+
+def dense_scores(matrix: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Dot-product scores of every query against every row, shape (queries, rows)"""
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    return queries @ matrix.T
+
+
+class FeatureMatrix:
+    """Candidate feature sets pre-encoded as a sparse term-id CSR matrix
+
+    Features are case-folded and mapped to integer term ids once, when a
+    candidate is added, so scoring a query is a handful of NumPy operations
+    over the flat ``indices`` array instead of a Python loop building sets.
+    Updates append a new row and tombstone the old one; rows are compacted
+    once half of them are dead.
+    """
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.indices = array('I')
+        self.indptr = array('q', [0])
+        self.row_ids: List[Optional[str]] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.live = array('B')
+
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+
+    @classmethod
+    def from_features(cls, features: Dict[str, Iterable[str]]) -> "FeatureMatrix":
+        matrix = cls()
+        for row_id, row_features in features.items():
+            matrix.upsert(row_id, row_features)
+        return matrix
+
+    def _term_ids(self, features: Iterable[str], add: bool) -> List[int]:
+        ids = set()
+        for feature in features:
+            term = str(feature).strip().lower()
+            if not term:
+                continue
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                if not add:
+                    continue
+                term_id = self.vocabulary[term] = len(self.vocabulary)
+            ids.add(term_id)
+        return sorted(ids)
+
+    def upsert(self, row_id: str, features: Iterable[str]):
+        self.delete(row_id)
+        self.indices.extend(self._term_ids(features, add=True))
+        self.indptr.append(len(self.indices))
+        self.id_to_row[row_id] = len(self.row_ids)
+        self.row_ids.append(row_id)
+        self.live.append(1)
+
+    def delete(self, row_id: str) -> bool:
+        row = self.id_to_row.pop(row_id, None)
+        if row is None:
+            return False
+        self.row_ids[row] = None
+        self.live[row] = 0
+        if len(self.row_ids) > 1024 and len(self) < len(self.row_ids) // 2:
+            self.compact()
+        return True
+
+    def compact(self):
+        """Drop tombstoned rows"""
+        rows = [row for row, row_id in enumerate(self.row_ids) if row_id is not None]
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        indices = np.frombuffer(self.indices, dtype=np.uint32)
+        lengths = (indptr[1:] - indptr[:-1])[rows]
+
+        self.indices = array('I', np.concatenate(
+            [indices[indptr[row]:indptr[row + 1]] for row in rows]
+        ).astype(np.uint32).tobytes() if rows else b'')
+        self.indptr = array('q', np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64).tobytes())
+        self.row_ids = [self.row_ids[row] for row in rows]
+        self.id_to_row = {row_id: row for row, row_id in enumerate(self.row_ids)}
+        self.live = array('B', [1]) * len(rows)
+
+    def _arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        indices = np.frombuffer(self.indices, dtype=np.uint32)
+        return indptr, indices, indptr[1:] - indptr[:-1]
+
+    def _overlap_batches(self, queries: List[List[str]], max_cells: int):
+        """Yield (start, intersection sizes, query set sizes) for chunks of queries
+
+        Chunks keep the (queries x non-zeros) work array under max_cells entries.
+        """
+        indptr, indices, _ = self._arrays()
+        chunk = max(1, max_cells // max(len(indices), 1))
+
+        for start in range(0, len(queries), chunk):
+            batch = queries[start:start + chunk]
+            membership = np.zeros((len(batch), len(self.vocabulary) + 1), dtype=np.int32)
+            query_lengths = np.zeros(len(batch), dtype=np.float32)
+            for position, query in enumerate(batch):
+                membership[position, self._term_ids(query, add=False)] = 1
+                # Query terms absent from the vocabulary still count toward the union
+                query_lengths[position] = len({str(f).strip().lower() for f in query} - {''})
+
+            # Intersection sizes: running hit counts over the flat indices, differenced at row bounds
+            hits = np.zeros((len(batch), len(indices) + 1), dtype=np.int32)
+            np.cumsum(membership[:, indices], axis=1, out=hits[:, 1:])
+            intersection = (hits[:, indptr[1:]] - hits[:, indptr[:-1]]).astype(np.float32)
+            yield start, intersection, query_lengths
+
+    def _dead_rows(self) -> np.ndarray:
+        return ~np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+
+    def jaccard_batch(self, queries: List[Iterable[str]], max_cells: int = 1 << 24) -> np.ndarray:
+        """Jaccard similarity of each query feature set to every row, shape (queries, rows)
+
+        Tombstoned rows score -1 so they never pass a threshold.
+        """
+        queries = [list(query) for query in queries]
+        _, _, row_lengths = self._arrays()
+        scores = np.zeros((len(queries), len(self.row_ids)), dtype=np.float32)
+        for start, intersection, query_lengths in self._overlap_batches(queries, max_cells):
+            union = row_lengths[np.newaxis, :] + query_lengths[:, np.newaxis] - intersection
+            np.divide(
+                intersection, union,
+                out=scores[start:start + len(intersection)], where=union > 0
+            )
+        scores[:, self._dead_rows()] = -1.0
+        return scores
+
+    def coverage_batch(self, queries: List[Iterable[str]], max_cells: int = 1 << 24) -> np.ndarray:
+        """Fraction of each query's features present in every row, shape (queries, rows)
+
+        Tombstoned rows score -1.
+        """
+        queries = [list(query) for query in queries]
+        scores = np.zeros((len(queries), len(self.row_ids)), dtype=np.float32)
+        for start, intersection, query_lengths in self._overlap_batches(queries, max_cells):
+            np.divide(
+                intersection, query_lengths[:, np.newaxis],
+                out=scores[start:start + len(intersection)], where=query_lengths[:, np.newaxis] > 0
+            )
+        scores[:, self._dead_rows()] = -1.0
+        return scores
+
+    def jaccard(self, query: Iterable[str]) -> np.ndarray:
+        """Jaccard similarity of one query feature set to every row"""
+        return self.jaccard_batch([list(query)])[0]
+
+    def top_k(
+        self,
+        queries: List[Iterable[str]],
+        top_k: int = 20,
+        threshold: float = 0.0
+    ) -> List[List[Tuple[str, float]]]:
+        """Best (row_id, score) pairs per query, keeping scores >= threshold"""
+        if not self.row_ids:
+            return [[] for _ in queries]
+        scores = self.jaccard_batch(queries)
+        indices, top_scores = top_k_rows(scores, top_k)
+        results = []
+        for row_indices, row_scores in zip(indices, top_scores):
+            keep = row_scores >= max(threshold, 0.0)
+            results.append([
+                (self.row_ids[index], float(score))
+                for index, score in zip(row_indices[keep], row_scores[keep])
+            ])
+        return results
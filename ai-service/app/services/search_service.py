@@ -0,0 +1,346 @@
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core import metrics
+from app.models.resume import ParsedResume
+from app.services.embedding_service import EmbeddingService
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion, skill_term
+from app.services.match_engine import MatchEngine
+
+
+class SearchService:
+    """Hybrid candidate search: BM25 over an inverted skill/term index fused with vector similarity
+
+    Hard filters (required skills, languages, minimum experience) are applied
+    on posting lists first, so only the surviving candidates are ranked.
+    """
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        matcher: KeywordMatcher,
+        lexical_index_path: Optional[str] = None,
+        save_interval: int = 100,
+        rrf_k: int = 60,
+        match_engine: Optional[MatchEngine] = None
+    ):
+        self.embedding_service = embedding_service
+        self.matcher = matcher
+        self.match_engine = match_engine
+        self.lexical_index_path = lexical_index_path
+        self.save_interval = save_interval
+        self.rrf_k = rrf_k
+        self.lexical_index = (
+            LexicalIndex.load(lexical_index_path) if lexical_index_path else LexicalIndex()
+        )
+        self._lock = threading.Lock()
+        self._unsaved_changes = 0
+        self.snapshot_writer = True
+        self._catch_up()
+
+    # ---------------------------------------------------------------- writes
+
+    def index_candidate(
+        self,
+        candidate_id: str,
+        text: str,
+        skills: Iterable[str] = (),
+        languages: Iterable[str] = (),
+        experience_years: int = 0,
+        vector: Optional[np.ndarray] = None
+    ) -> str:
+        """Index a candidate for both lexical and vector search"""
+        skills = list(skills)
+        languages = list(languages)
+        canonical = self.canonical_skills(skills)
+        # Stored with the vector so other workers can replay this write into their lexical index
+        document = {
+            'text': text,
+            'skills': canonical,
+            'languages': languages,
+            'experience_years': experience_years,
+        }
+        embedding_id = self.embedding_service.index_candidate(
+            candidate_id, self.embedding_text(text, skills), vector=vector,
+            document=document, features=canonical
+        )
+        skills = canonical
+        with self._lock:
+            self.lexical_index.add(candidate_id, text, skills, languages, experience_years)
+            self._record_change()
+        if self.match_engine is not None:
+            self.match_engine.update_candidate(candidate_id, skills)
+        return embedding_id
+
+    @staticmethod
+    def embedding_text(text: str, skills: Iterable[str]) -> str:
+        """Text embedded for a candidate: skills first, then resume text"""
+        return f"{' '.join(skills)} {text}"
+
+    def index_parsed_resume(self, parsed: ParsedResume, candidate_id: Optional[str] = None) -> str:
+        """Embedding ID for a parsed resume, indexing it when the candidate is known"""
+        if not candidate_id:
+            return self.embedding_service.index_parsed_resume(parsed)
+        return self.index_candidate(
+            candidate_id,
+            parsed.text,
+            parsed.skills,
+            parsed.languages,
+            parsed.experience_years
+        )
+
+    def remove_candidate(self, candidate_id: str) -> bool:
+        removed = self.embedding_service.remove_candidate(candidate_id)
+        with self._lock:
+            removed = self.lexical_index.delete(candidate_id) or removed
+            self._record_change()
+        if self.match_engine is not None:
+            self.match_engine.remove_candidate(candidate_id)
+        return removed
+
+    def candidate_ids(self) -> set:
+        """Every candidate present in either index"""
+        self.refresh()
+        with self._lock:
+            lexical = set(self.lexical_index.candidate_doc)
+        return lexical | set(self.embedding_service.index.candidate_to_id)
+
+    def indexed_skills(self) -> List[Tuple[str, Tuple[str, ...]]]:
+        """(candidate_id, skills) for every candidate in the lexical index"""
+        with self._lock:
+            return [
+                (candidate_id, self.lexical_index.skills[doc])
+                for candidate_id, doc in self.lexical_index.candidate_doc.items()
+            ]
+
+    def _record_change(self):
+        self._unsaved_changes += 1
+        if self.lexical_index_path and self.snapshot_writer and self._unsaved_changes >= self.save_interval:
+            self._save_lexical()
+
+    def _save_lexical(self):
+        store = self.embedding_service.store
+        if store is not None:
+            self.lexical_index.sequence = store.sequence
+        self.lexical_index.save(self.lexical_index_path)
+        self._unsaved_changes = 0
+
+    def save(self):
+        """Persist both indexes if they have unsaved changes"""
+        self.embedding_service.save_index()
+        if not self.lexical_index_path or not self.snapshot_writer:
+            return
+        self.refresh()
+        with self._lock:
+            if self._unsaved_changes:
+                self._save_lexical()
+
+    def set_snapshot_writer(self, enabled: bool):
+        """Choose whether this process writes index snapshots (one worker per host should)"""
+        self.snapshot_writer = enabled
+        self.embedding_service.snapshot_writer = enabled
+
+    # ------------------------------------------------------ multi-worker sync
+
+    def refresh(self):
+        """Apply index writes other worker processes made through the shared embedding store
+
+        Every write goes to the store's log, which is the single source of
+        truth; each worker replays it into its own lexical index and match
+        table. Cheap when nothing changed, so read paths call it first.
+        """
+        changed = self.embedding_service.sync_from_store()
+        if changed:
+            self._replay(changed)
+
+    def _catch_up(self):
+        """Replay store writes newer than the loaded lexical snapshot"""
+        store = self.embedding_service.store
+        if store is None:
+            return
+        changed = [
+            candidate_id for candidate_id, meta in store.meta.items()
+            if (meta.get('seq') or 0) > self.lexical_index.sequence
+        ]
+        changed.extend(
+            candidate_id for candidate_id in self.lexical_index.candidate_doc
+            if candidate_id not in store
+        )
+        if changed:
+            self._replay(changed)
+            print(f"Lexical index caught up with {len(changed)} store writes")
+
+    def _replay(self, candidate_ids: List[str]):
+        store = self.embedding_service.store
+        updates: List[Tuple[str, Optional[List[str]]]] = []
+        with self._lock:
+            for candidate_id in candidate_ids:
+                document = store.document(candidate_id) if candidate_id in store else None
+                if candidate_id not in store:
+                    self.lexical_index.delete(candidate_id)
+                    updates.append((candidate_id, None))
+                elif document:
+                    self.lexical_index.add(
+                        candidate_id,
+                        document['text'],
+                        document['skills'],
+                        document['languages'],
+                        document['experience_years']
+                    )
+                    updates.append((candidate_id, document['skills']))
+                self._record_change()
+        if self.match_engine is not None:
+            for candidate_id, skills in updates:
+                if skills is None:
+                    self.match_engine.remove_candidate(candidate_id)
+                else:
+                    self.match_engine.update_candidate(candidate_id, skills)
+
+    # ----------------------------------------------------------------- reads
+
+    def canonical_skills(self, skills: Iterable[str]) -> List[str]:
+        """Map skill names and aliases (e.g. "golang") to canonical display names"""
+        canonical = []
+        for skill in skills:
+            found = self.matcher.find_all(skill).get('skills')
+            canonical.extend(found if found else [skill])
+        return canonical
+
+    def _allowed_docs(
+        self,
+        candidate_ids: Optional[List[str]],
+        required_skills: Iterable[str],
+        languages: Iterable[str],
+        min_experience_years: Optional[int]
+    ) -> Optional[np.ndarray]:
+        docs = self.lexical_index.filter(
+            self.canonical_skills(required_skills),
+            languages,
+            min_experience_years
+        )
+        if candidate_ids:
+            candidate_doc = self.lexical_index.candidate_doc
+            # Callers may repeat ids; unique also sorts, as intersect1d's assume_unique needs
+            requested = np.unique(np.fromiter(
+                (candidate_doc[c] for c in candidate_ids if c in candidate_doc),
+                dtype=np.uint32
+            ))
+            docs = requested if docs is None else np.intersect1d(docs, requested, assume_unique=True)
+        return docs
+
+    def search(
+        self,
+        query: str,
+        candidate_ids: Optional[List[str]] = None,
+        top_k: int = 20,
+        required_skills: Iterable[str] = (),
+        languages: Iterable[str] = (),
+        min_experience_years: Optional[int] = None,
+        mode: str = "hybrid"
+    ) -> List[Dict]:
+        """Ranked candidates as {'candidate_id', 'score', 'reason'} dicts"""
+        results: List[Dict] = []
+        with metrics.SEARCH_SECONDS.time(mode=mode):
+            for _, results in self.search_stages(
+                query, candidate_ids, top_k, required_skills, languages, min_experience_years, mode
+            ):
+                pass
+        return results
+
+    def search_stages(
+        self,
+        query: str,
+        candidate_ids: Optional[List[str]] = None,
+        top_k: int = 20,
+        required_skills: Iterable[str] = (),
+        languages: Iterable[str] = (),
+        min_experience_years: Optional[int] = None,
+        mode: str = "hybrid"
+    ) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (stage, results) as each ranking stage completes; the last stage is 'final'
+
+        In hybrid mode the cheap BM25 ranking is yielded first, then the
+        vector ranking, then the fused result.
+        """
+        if mode not in ("hybrid", "lexical", "vector"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        self.refresh()
+
+        required_skills = list(required_skills)
+        languages = list(languages)
+        has_filters = bool(required_skills or languages or min_experience_years is not None)
+        query_skills = self.matcher.find_all(query).get('skills', [])
+        depth = top_k * 5
+
+        def shape(ranked: List[Tuple[str, float]]) -> List[Dict]:
+            return [
+                {
+                    'candidate_id': candidate_id,
+                    'score': score,
+                    'reason': self._reason(candidate_id, query, query_skills)
+                }
+                for candidate_id, score in ranked[:top_k]
+            ]
+
+        rankings = []
+        with self._lock, metrics.timer('lexical_search'):
+            allowed_docs = self._allowed_docs(
+                candidate_ids, required_skills, languages, min_experience_years
+            )
+            no_matches = has_filters and allowed_docs is not None and len(allowed_docs) == 0
+
+            if mode in ("hybrid", "lexical") and not no_matches:
+                rankings.append(self.lexical_index.search(
+                    query,
+                    depth,
+                    allowed_docs,
+                    extra_terms=[skill_term(skill) for skill in query_skills]
+                ))
+
+            # Vector search sees the same pruned pool when filters are set
+            vector_pool = candidate_ids
+            if has_filters:
+                vector_pool = self.lexical_index.candidate_ids(allowed_docs)
+
+        if no_matches:
+            yield 'final', []
+            return
+
+        if mode == "hybrid":
+            yield 'lexical', shape(rankings[0])
+
+        if mode in ("hybrid", "vector"):
+            vector_matches = self.embedding_service.search(query, vector_pool, depth)
+            rankings.append([(match['candidate_id'], match['score']) for match in vector_matches])
+            if mode == "hybrid":
+                yield 'vector', shape(rankings[1])
+
+        with metrics.timer('rank_fusion'):
+            ranked = rankings[0] if len(rankings) == 1 else reciprocal_rank_fusion(rankings, self.rrf_k)
+            results = shape(ranked)
+        yield 'final', results
+
+    def _reason(self, candidate_id: str, query: str, query_skills: List[str]) -> str:
+        matched = set(query_skills) & set(self.lexical_index.candidate_skills(candidate_id))
+        if matched:
+            return f"Matched skills: {', '.join(sorted(matched))}"
+        return f"Semantic match for: {query[:50]}"
+
+
+# Global instance
+_search_service = None
+
+
+def get_search_service(
+    embedding_service: EmbeddingService,
+    matcher: KeywordMatcher,
+    **options
+) -> SearchService:
+    """Get or create the search service instance"""
+    global _search_service
+    if _search_service is None:
+        _search_service = SearchService(embedding_service, matcher, **options)
+    return _search_service
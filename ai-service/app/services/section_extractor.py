@@ -0,0 +1,283 @@
+import re
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models.resume import CertificationEntry, EducationEntry
+
+
+# Heading text -> section; a heading is a short line holding nothing but one of these
+SECTION_HEADINGS = {
+    'education': 'education',
+    'academic background': 'education',
+    'academics': 'education',
+    'qualifications': 'education',
+    'educational qualifications': 'education',
+    'academic qualifications': 'education',
+    'experience': 'experience',
+    'work experience': 'experience',
+    'professional experience': 'experience',
+    'employment': 'experience',
+    'employment history': 'experience',
+    'work history': 'experience',
+    'career history': 'experience',
+    'certifications': 'certifications',
+    'certification': 'certifications',
+    'certificates': 'certifications',
+    'licenses and certifications': 'certifications',
+    'licenses & certifications': 'certifications',
+    'summary': 'other',
+    'professional summary': 'other',
+    'profile': 'other',
+    'objective': 'other',
+    'skills': 'other',
+    'technical skills': 'other',
+    'projects': 'other',
+    'languages': 'other',
+    'achievements': 'other',
+    'awards': 'other',
+    'interests': 'other',
+    'references': 'other',
+}
+
+# Matched against "\n" + lowercased text: the leading newline is a literal the
+# regex engine can skip ahead to, several times faster than a ^ anchor
+_HEADING = (
+    r'\n[ \t#*\-=_]*(' + '|'.join(re.escape(heading) for heading in sorted(SECTION_HEADINGS, key=len, reverse=True))
+    + r')(?:[ \t]*(?:&|and)[ \t]*[a-z ]{1,20})?[ \t:*\-=_]*(?=\n|$)'
+)
+HEADING_RE = re.compile(_HEADING)
+# For the rare text whose length changes when lowercased (e.g. "İ"), so offsets would shift
+HEADING_ANYCASE_RE = re.compile(_HEADING, re.IGNORECASE)
+
+# Degree words in any case; abbreviations only as written (so "as", "be" and "me" don't match)
+DEGREE_RE = re.compile(
+    r'\b(?:(?i:bachelor|master|doctorate|doctoral|associate|diploma)'
+    r'|B\.?\s?(?:S|A|E|Sc|Tech|Eng)\b\.?|M\.?\s?(?:S|A|E|Sc|Tech|Eng)\b\.?|MBA|Ph\.?\s?D\b\.?|A\.?\s?S\b\.?)'
+    r'(?!\s*(?i:office|excel|word|sql|teams|access|project|azure|windows))'
+)
+# Capitalised words after "in"/"of", e.g. "B.Tech in Computer Science" or "Master of Arts"
+FIELD_RE = re.compile(r'\b(in|of)\s+([A-Z][\w&/\-]*(?:\s+(?:and|&|[A-Z][\w&/\-]*))*)')
+INSTITUTION_RE = re.compile(
+    r'\b(?:university|college|institute|school|academy|polytechnic|iit|nit)\b',
+    re.IGNORECASE
+)
+SEGMENT_SPLIT_RE = re.compile(r'\s*(?:[,|;(]|\s[-–—]\s)\s*')
+
+YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+
+_MONTH = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+_POINT = r'(?:' + _MONTH + r'\s*|(\d{1,2})\s*[/.]\s*)?((?:19|20)\d{2})'
+DATE_RANGE_RE = re.compile(
+    _POINT + r'\s*(?:-|–|—|to|until|till)\s*(?:' + _POINT + r'|(present|current|now|today|date))',
+    re.IGNORECASE
+)
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1
+)}
+
+# "5 years of experience", "3+ years in", "Experience: 4 years"; run over lowercased text.
+# The number is looked up just before each "years" hit: a pattern starting with
+# \d would be tried at every position of the document.
+STATED_YEARS_RE = re.compile(r'years?[ \t]+(?:of[ \t]+experience|in\b)')
+STATED_COUNT_RE = re.compile(r'(?<!\d)(\d{1,2})\+?[ \t]*$')
+STATED_LABEL_RE = re.compile(r'experience[ \t]*:[ \t]*(\d{1,2})\+?[ \t]*years?')
+
+MAX_EXPERIENCE_YEARS = 50
+MAX_EDUCATION = 3
+MAX_CERTIFICATIONS = 5
+
+
+class SectionExtractor:
+    """Education, certifications and experience from one pass over a resume
+
+    One multiline scan finds the section headings (Education, Experience,
+    Certifications, ...) and splits the text into section bodies. Degree
+    patterns then run only over the Education section, certification
+    entries come from the Certifications section plus keyword hits elsewhere,
+    and experience is the union of the date ranges in the Experience section
+    measured against today's date. Resumes without headings fall back to
+    the whole text.
+    """
+
+    def extract(
+        self,
+        text: str,
+        cert_offsets: Iterable[int] = (),
+        today: Optional[date] = None
+    ) -> Dict:
+        """{'education', 'certifications', 'experience_years'}
+
+        cert_offsets are character offsets of certification keywords (from the
+        keyword matcher), so lines that mention a certification outside the
+        Certifications section are kept too.
+        """
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            headings = HEADING_RE.finditer("\n" + lowered)
+        else:
+            headings = HEADING_ANYCASE_RE.finditer("\n" + text)
+
+        # (section, start, end) of each body; text before the first heading is the header.
+        # Offsets into "\n" + text are one past the same offsets into text.
+        bodies: List[Tuple[str, int, int]] = []
+        section, start = 'header', 0
+        for heading in headings:
+            bodies.append((section, start, heading.start()))
+            section, start = SECTION_HEADINGS[heading.group(1).lower()], heading.end() - 1
+        bodies.append((section, start, len(text)))
+
+        return {
+            'education': self._education(self._section_text(text, bodies, 'education')),
+            'certifications': self._certifications(text, bodies, cert_offsets),
+            'experience_years': self._experience(text, lowered, bodies, today or date.today()),
+        }
+
+    @staticmethod
+    def _section_text(text: str, bodies: List[Tuple[str, int, int]], section: str) -> str:
+        """Bodies of every section of a kind; without one, the whole text minus headings"""
+        spans = [(start, end) for kind, start, end in bodies if kind == section]
+        if not spans:
+            spans = [(start, end) for _, start, end in bodies]
+        return '\n'.join(text[start:end] for start, end in spans)
+
+    # ------------------------------------------------------------- education
+
+    def _education(self, body: str) -> List[EducationEntry]:
+        lines = [line.strip() for line in body.split('\n') if line.strip()]
+        entries = []
+        for position, line in enumerate(lines):
+            if not DEGREE_RE.search(line):
+                continue
+
+            segments = [segment for segment in SEGMENT_SPLIT_RE.split(line) if segment]
+            institution = next(
+                (segment for segment in segments[1:] if INSTITUTION_RE.search(segment)), ''
+            )
+            following = lines[position + 1] if position + 1 < len(lines) else ''
+            if not institution and following and not DEGREE_RE.search(following):
+                institution = SEGMENT_SPLIT_RE.split(following)[0]
+            institution = YEAR_RE.sub('', institution).strip(' -–—,()')
+
+            # Prefer the subject after "in" ("Master of Science in Physics" -> Physics)
+            fields = {keyword: field for keyword, field in reversed(FIELD_RE.findall(segments[0]))}
+            years = YEAR_RE.findall(line) or YEAR_RE.findall(following)
+            entries.append((
+                segments[0] if institution and segments[0] != institution else line,
+                institution,
+                fields.get('in') or fields.get('of'),
+                # A range like "2016 - 2020" ends in the graduation year
+                int(max(years)) if years else None,
+            ))
+            if len(entries) == MAX_EDUCATION:
+                break
+        return entries
+
+    # -------------------------------------------------------- certifications
+
+    def _certifications(
+        self,
+        text: str,
+        bodies: List[Tuple[str, int, int]],
+        cert_offsets: Iterable[int]
+    ) -> List[CertificationEntry]:
+        lines = [
+            line for kind, start, end in bodies if kind == 'certifications'
+            for line in text[start:end].split('\n')
+        ]
+
+        # Keyword hits outside the section, one entry per line; headings are not bodies
+        body_starts = [start for _, start, _ in bodies]
+        seen = set()
+        for offset in cert_offsets:
+            kind, start, end = bodies[bisect_right(body_starts, offset) - 1]
+            if kind == 'certifications' or not start <= offset < end:
+                continue
+            line_start = text.rfind('\n', 0, offset) + 1
+            if line_start in seen:
+                continue
+            seen.add(line_start)
+            line_end = text.find('\n', offset)
+            lines.append(text[line_start:] if line_end == -1 else text[line_start:line_end])
+
+        entries = []
+        for line in lines:
+            name = line.strip().lstrip('-*•· ').strip()
+            if not name:
+                continue
+            years = YEAR_RE.findall(name)
+            entries.append((name, int(years[-1]) if years else None))
+            if len(entries) == MAX_CERTIFICATIONS:
+                break
+        return entries
+
+    # ------------------------------------------------------------ experience
+
+    def _experience(self, text: str, lowered: str, bodies: List[Tuple[str, int, int]], today: date) -> int:
+        # An explicit statement wins over anything inferred from dates
+        stated = self._stated_years(lowered)
+        if stated:
+            return stated
+
+        if any(kind == 'experience' for kind, _, _ in bodies):
+            body = self._section_text(text, bodies, 'experience')
+        else:
+            body = '\n'.join(text[start:end] for kind, start, end in bodies if kind != 'education')
+
+        months = self._range_months(body, today)
+        if months:
+            return min(months // 12, MAX_EXPERIENCE_YEARS)
+
+        # No ranges: span from the earliest year mentioned to now
+        years = [int(year) for year in YEAR_RE.findall(body)]
+        years = [year for year in years if year <= today.year]
+        if len(years) >= 2:
+            return min(today.year - min(years), MAX_EXPERIENCE_YEARS)
+        return 0
+
+    @staticmethod
+    def _stated_years(lowered: str) -> int:
+        """Largest explicitly stated number of years of experience, or 0"""
+        stated = [int(years) for years in STATED_LABEL_RE.findall(lowered)]
+        for match in STATED_YEARS_RE.finditer(lowered):
+            count = STATED_COUNT_RE.search(lowered, max(0, match.start() - 8), match.start())
+            if count:
+                stated.append(int(count.group(1)))
+        return max((years for years in stated if years <= MAX_EXPERIENCE_YEARS), default=0)
+
+    def _range_months(self, body: str, today: date) -> int:
+        """Months covered by the union of the date ranges in body"""
+        now = today.year * 12 + today.month - 1
+        spans: List[Tuple[int, int]] = []
+        for match in DATE_RANGE_RE.finditer(body):
+            start_month, start_number, start_year, end_month, end_number, end_year, ongoing = match.groups()
+            start = int(start_year) * 12 + self._month(start_month, start_number)
+            if ongoing:
+                end = now
+            else:
+                end = int(end_year) * 12 + self._month(end_month, end_number)
+            end = min(end, now)
+            if start < end:
+                spans.append((start, end))
+
+        total = 0
+        current_start = current_end = None
+        for start, end in sorted(spans):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    total += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            total += current_end - current_start
+        return total
+
+    @staticmethod
+    def _month(name: Optional[str], number: Optional[str]) -> int:
+        """Zero-based month of a date point; January when the date gives only a year"""
+        if name:
+            return MONTHS[name[:3].lower()] - 1
+        if number and 1 <= int(number) <= 12:
+            return int(number) - 1
+        return 0
@@ -1,56 +1,194 @@
-from groq import Groq
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import json
+from app.core import metrics
+from app.services.llm_client import LLMClient, MicroBatcher, get_llm_client
 
 
 class SummaryGenerator:
     """Service for generating candidate summaries using GROQ"""
 
-    def __init__(self, api_key: str, model: str = "llama-3.3-70b-versatile"):
-        self.client = Groq(api_key=api_key)
+    def __init__(
+        self,
+        api_key: Optional[str],
+        model: str = "llama-3.3-70b-versatile",
+        llm_client: Optional[LLMClient] = None,
+        batch_size: int = 8,
+        batch_window: float = 0.05
+    ):
+        self.llm = llm_client or get_llm_client(api_key, model)
         self.model = model
+        self.batcher = MicroBatcher(self.generate_summaries_async, batch_size, batch_window)
 
-    def generate_summary(
-        self, 
-        resume_text: str, 
-        skills: List[str], 
+    def _build_messages(
+        self,
+        resume_text: str,
+        skills: List[str],
         experience_years: int
-    ) -> str:
-        """Generate a concise recruiter-friendly summary using GROQ"""
-        
+    ) -> List[Dict]:
+        """Prompt for a single candidate summary"""
         # Prepare context for GROQ
         context = f"""
 Resume Text: {resume_text[:2000]}
 Identified Skills: {', '.join(skills[:10])}
 Experience: {experience_years} years
 """
-        
+        return [{
+            "role": "system",
+            "content": "You are a professional recruiter assistant. Generate a concise 2-3 sentence summary of the candidate's profile for recruiters. Focus on key strengths, experience level, and core competencies. Be professional and factual."
+        }, {
+            "role": "user",
+            "content": context
+        }]
+
+    def _clean_summary(self, summary: str) -> str:
+        """Ensure summary is concise (max 250 chars)"""
+        summary = summary.strip()
+        if len(summary) > 250:
+            summary = summary[:247] + "..."
+        return summary
+
+    @metrics.timed('summary')
+    def generate_summary(
+        self, 
+        resume_text: str, 
+        skills: List[str], 
+        experience_years: int
+    ) -> str:
+        """Generate a concise recruiter-friendly summary using GROQ"""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{
-                    "role": "system",
-                    "content": "You are a professional recruiter assistant. Generate a concise 2-3 sentence summary of the candidate's profile for recruiters. Focus on key strengths, experience level, and core competencies. Be professional and factual."
-                }, {
-                    "role": "user",
-                    "content": context
-                }],
-                temperature=0.3,
-                max_tokens=150
+            content = self.llm.complete(
+                self._build_messages(resume_text, skills, experience_years),
+                max_tokens=150,
+                temperature=0.3
             )
-            
-            summary = response.choices[0].message.content.strip()
-            
-            # Ensure summary is concise (max 250 chars)
-            if len(summary) > 250:
-                summary = summary[:247] + "..."
-            
-            return summary
+            return self._clean_summary(content)
             
         except Exception as e:
             print(f"Error generating summary with GROQ: {e}")
             # Fallback to simple summary
             return self._generate_simple_summary(skills, experience_years)
+
+    @metrics.timed('summary')
+    async def generate_summary_async(
+        self,
+        resume_text: str,
+        skills: List[str],
+        experience_years: int
+    ) -> str:
+        """Generate a summary with the async GROQ client"""
+        try:
+            content = await self.llm.acomplete(
+                self._build_messages(resume_text, skills, experience_years),
+                max_tokens=150,
+                temperature=0.3
+            )
+            return self._clean_summary(content)
+
+        except Exception as e:
+            print(f"Error generating summary with GROQ: {e}")
+            # Fallback to simple summary
+            return self._generate_simple_summary(skills, experience_years)
     
+    async def stream_summary(
+        self,
+        resume_text: str,
+        skills: List[str],
+        experience_years: int,
+        max_length: int = 250
+    ) -> AsyncIterator[str]:
+        """Yield summary text as GROQ generates it, falling back to a simple summary
+
+        At most max_length characters are sent: text past max_length - 3 is
+        held back until the stream shows whether it fits, else "..." ends it.
+        """
+        limit = max_length - 3
+        sent = 0
+        held = ""
+        try:
+            async for delta in self.llm.astream(
+                self._build_messages(resume_text, skills, experience_years),
+                max_tokens=150,
+                temperature=0.3
+            ):
+                if not sent and not held:
+                    delta = delta.lstrip()
+                if sent < limit:
+                    head, delta = delta[:limit - sent], delta[limit - sent:]
+                    if head:
+                        sent += len(head)
+                        yield head
+                held += delta
+                if sent + len(held) > max_length:
+                    yield "..."
+                    return
+            if held:
+                yield held
+        except Exception as e:
+            print(f"Error streaming summary with GROQ: {e}")
+            # Nothing sent yet: the client still gets a usable summary
+            if not sent:
+                yield self._generate_simple_summary(skills, experience_years)
+
+    @metrics.timed('summary_batch')
+    async def generate_summaries_async(
+        self,
+        candidates: List[Tuple[str, List[str], int]]
+    ) -> List[str]:
+        """Summarise several candidates in one JSON-mode GROQ call
+
+        candidates: (resume_text, skills, experience_years) tuples. Any summary the
+        model does not return falls back to the simple summary for that candidate.
+        """
+        if not candidates:
+            return []
+        if len(candidates) == 1:
+            return [await self.generate_summary_async(*candidates[0])]
+
+        blocks = []
+        for number, (resume_text, skills, experience_years) in enumerate(candidates, start=1):
+            blocks.append(
+                f"Candidate {number}:\n"
+                f"Resume Text: {resume_text[:1500]}\n"
+                f"Identified Skills: {', '.join(skills[:10])}\n"
+                f"Experience: {experience_years} years"
+            )
+
+        summaries: List[str] = []
+        try:
+            content = await self.llm.acomplete(
+                [{
+                    "role": "system",
+                    "content": "You are a professional recruiter assistant. For each numbered candidate, write a concise 2-3 sentence summary of their profile for recruiters, focusing on key strengths, experience level, and core competencies. Return ONLY a JSON object of the form {\"summaries\": [\"...\", ...]} with one summary per candidate, in order."
+                }, {
+                    "role": "user",
+                    "content": "\n\n".join(blocks)
+                }],
+                max_tokens=150 * len(candidates),
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            summaries = [
+                self._clean_summary(str(summary))
+                for summary in json.loads(content).get('summaries', [])
+            ]
+        except Exception as e:
+            print(f"Error generating batch summary with GROQ: {e}")
+
+        return [
+            summaries[i] if i < len(summaries) and summaries[i]
+            else self._generate_simple_summary(skills, experience_years)
+            for i, (_, skills, experience_years) in enumerate(candidates)
+        ]
+
+    async def summarize_batched(
+        self,
+        resume_text: str,
+        skills: List[str],
+        experience_years: int
+    ) -> str:
+        """Summarise one candidate, sharing a GROQ call with other concurrent requests"""
+        return await self.batcher.submit((resume_text, skills, experience_years))
+
     def _generate_simple_summary(self, skills: List[str], experience_years: int) -> str:
         """Fallback simple summary generation"""
         top_skills = skills[:3] if skills else []
@@ -69,6 +207,13 @@ Experience: {experience_years} years
         return summary
 
 
-def get_summary_generator(api_key: str, model: str = "llama-3.3-70b-versatile"):
-    """Get summary generator instance"""
-    return SummaryGenerator(api_key, model)
+# Global instance
+_summary_generator = None
+
+
+def get_summary_generator(api_key: Optional[str], model: str = "llama-3.3-70b-versatile", **options):
+    """Get or create the summary generator instance"""
+    global _summary_generator
+    if _summary_generator is None:
+        _summary_generator = SummaryGenerator(api_key, model, **options)
+    return _summary_generator
@@ -0,0 +1,469 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.concurrency import get_http_client, stage
+from app.services.summary_generator import SummaryGenerator
+
+
+# Lower runs first: recruiter-viewed candidates, then uploads, then bulk imports
+PRIORITIES = {'interactive': 0, 'normal': 1, 'bulk': 2}
+PRIORITY_NAMES = {level: name for name, level in PRIORITIES.items()}
+
+PENDING = ('queued', 'running')
+
+# The prompt reads no more of the resume than this (see SummaryGenerator._build_messages)
+PROMPT_TEXT_LENGTH = 2000
+PROMPT_SKILLS = 10
+
+_COLUMNS = (
+    "job_id, priority, status, resume_text, skills, experience_years, candidate_id,"
+    " summary, error, attempts, created_at, updated_at"
+)
+
+
+class SummaryQueue:
+    """Persistent queue of LLM summary jobs in a local SQLite file
+
+    A job is keyed on the hash of its prompt inputs and the model, so the
+    same resume submitted twice (or by /parse-resume and /generate-summary)
+    is summarised once. Jobs run in priority order, then oldest first;
+    resubmitting a queued job at a higher priority promotes it.
+
+    Every job carries the rule-based summary from the moment it is queued,
+    replaced by the LLM summary once a worker finishes it. Workers claim
+    jobs in a write transaction, so the prefork workers of app.serve can
+    share one file; a claim is a lease, and jobs of a worker that died are
+    picked up again when it expires. Failed LLM calls are retried with
+    backoff up to max_attempts, then the job ends as 'failed' with the
+    rule-based summary. Webhook callbacks are sent when a job finishes and
+    kept until delivered, so a restart resends the ones it missed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        summary_generator: SummaryGenerator,
+        workers: int = 2,
+        batch_size: int = 8,
+        max_attempts: int = 3,
+        retry_backoff: float = 30.0,
+        lease_seconds: float = 120.0,
+        poll_interval: float = 1.0,
+        retention_days: int = 30
+    ):
+        self.path = path
+        self.summary_generator = summary_generator
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retention_days = retention_days
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.deduplicated = 0
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._deliveries: Set[asyncio.Task] = set()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summary_jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " priority INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " resume_text TEXT NOT NULL,"
+            " skills TEXT NOT NULL,"
+            " experience_years INTEGER NOT NULL,"
+            " candidate_id TEXT,"
+            " summary TEXT NOT NULL,"
+            " error TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            # queued: not before this time; running: lease expiry
+            " run_after REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_summary_jobs_ready ON summary_jobs(status, priority, created_at)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summary_callbacks ("
+            " job_id TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " PRIMARY KEY (job_id, url))"
+        )
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that other processes wait on (busy timeout) rather than interleave with"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def make_key(resume_text: str, skills: List[str], experience_years: int, model: str) -> str:
+        """Job id for a summary's prompt inputs under a model"""
+        payload = json.dumps([model, resume_text[:PROMPT_TEXT_LENGTH], skills[:PROMPT_SKILLS], experience_years])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _fallback(self, skills: List[str], experience_years: int) -> str:
+        return self.summary_generator._generate_simple_summary(skills, experience_years)
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Dict:
+        return {
+            'job_id': row['job_id'],
+            'status': row['status'],
+            'priority': PRIORITY_NAMES.get(row['priority'], 'normal'),
+            'summary': row['summary'],
+            'error': row['error'],
+            'attempts': row['attempts'],
+            'candidate_id': row['candidate_id'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+
+    # ---------------------------------------------------------------- jobs
+
+    def submit(
+        self,
+        resume_text: str,
+        skills: List[str],
+        experience_years: int,
+        priority: str = 'normal',
+        candidate_id: Optional[str] = None,
+        callback_url: Optional[str] = None
+    ) -> Dict:
+        """Queue a summary, or return the existing job for the same inputs
+
+        A finished job is returned as is and registers no callback: the
+        caller already has the final summary.
+        """
+        level = PRIORITIES.get(priority)
+        if level is None:
+            raise ValueError(f"Unknown summary priority: {priority}")
+        job_id = self.make_key(resume_text, skills, experience_years, self.summary_generator.model)
+        now = time.time()
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM summary_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    f"INSERT INTO summary_jobs ({_COLUMNS}, run_after) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, NULL, 0, ?, ?, ?)",
+                    (
+                        job_id, level, resume_text[:PROMPT_TEXT_LENGTH], json.dumps(skills[:PROMPT_SKILLS]),
+                        experience_years, candidate_id, self._fallback(skills, experience_years),
+                        now, now, now
+                    )
+                )
+            else:
+                self.deduplicated += 1
+                if row['status'] == 'queued' and level < row['priority']:
+                    conn.execute(
+                        "UPDATE summary_jobs SET priority = ?, updated_at = ? WHERE job_id = ?",
+                        (level, now, job_id)
+                    )
+            if callback_url and (row is None or row['status'] in PENDING):
+                conn.execute(
+                    "INSERT OR IGNORE INTO summary_callbacks (job_id, url) VALUES (?, ?)",
+                    (job_id, callback_url)
+                )
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM summary_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+
+        self._wake()
+        return self._job(row)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM summary_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row) if row is not None else None
+
+    def finished_summary(self, resume_text: str, skills: List[str], experience_years: int) -> Optional[str]:
+        """LLM summary of a completed job for these inputs, if there is one"""
+        job = self.get(self.make_key(resume_text, skills, experience_years, self.summary_generator.model))
+        return job['summary'] if job is not None and job['status'] == 'done' else None
+
+    def set_priority(self, job_id: str, priority: str) -> Optional[Dict]:
+        """Change a queued job's priority, e.g. when a recruiter opens the candidate"""
+        level = PRIORITIES.get(priority)
+        if level is None:
+            raise ValueError(f"Unknown summary priority: {priority}")
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE summary_jobs SET priority = ?, updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                (level, time.time(), job_id)
+            )
+        self._wake()
+        return self.get(job_id)
+
+    def record(self, resume_text: str, skills: List[str], experience_years: int, summary: str):
+        """Store a summary generated outside the queue, finishing any job for the same inputs"""
+        job_id = self.make_key(resume_text, skills, experience_years, self.summary_generator.model)
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT INTO summary_jobs ({_COLUMNS}, run_after) VALUES (?, ?, 'done', ?, ?, ?, NULL, ?, NULL, 0, ?, ?, ?)"
+                " ON CONFLICT(job_id) DO UPDATE SET status = 'done', summary = excluded.summary,"
+                " error = NULL, updated_at = excluded.updated_at",
+                (
+                    job_id, PRIORITIES['normal'], resume_text[:PROMPT_TEXT_LENGTH],
+                    json.dumps(skills[:PROMPT_SKILLS]), experience_years, summary, now, now, now
+                )
+            )
+        self._deliver_callbacks([job_id])
+
+    def claim(self, limit: int) -> List[Dict]:
+        """Lease up to limit runnable jobs, highest priority first"""
+        now = time.time()
+        with self._transaction() as conn:
+            # Leases of workers that died mid-job
+            conn.execute(
+                "UPDATE summary_jobs SET status = 'queued' WHERE status = 'running' AND run_after <= ?",
+                (now,)
+            )
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM summary_jobs WHERE status = 'queued' AND run_after <= ?"
+                " ORDER BY priority, created_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE summary_jobs SET status = 'running', attempts = attempts + 1,"
+                " run_after = ?, updated_at = ? WHERE job_id = ?",
+                [(now + self.lease_seconds, now, row['job_id']) for row in rows]
+            )
+        return [
+            {
+                'job_id': row['job_id'],
+                'resume_text': row['resume_text'],
+                'skills': json.loads(row['skills']),
+                'experience_years': row['experience_years'],
+                'attempts': row['attempts'] + 1,
+            }
+            for row in rows
+        ]
+
+    def _finish(self, job: Dict, summary: Optional[str], error: Optional[str] = None, retry: bool = True):
+        """Store an LLM summary, or on error requeue the job with backoff until its attempts run out"""
+        now = time.time()
+        with self._transaction() as conn:
+            if summary is not None:
+                conn.execute(
+                    "UPDATE summary_jobs SET status = 'done', summary = ?, error = NULL, updated_at = ?"
+                    " WHERE job_id = ? AND status = 'running'",
+                    (summary, now, job['job_id'])
+                )
+                self.completed += 1
+            elif retry and job['attempts'] < self.max_attempts:
+                conn.execute(
+                    "UPDATE summary_jobs SET status = 'queued', error = ?, run_after = ?, updated_at = ?"
+                    " WHERE job_id = ? AND status = 'running'",
+                    (error, now + self.retry_backoff * 2 ** (job['attempts'] - 1), now, job['job_id'])
+                )
+                self.retried += 1
+                return
+            else:
+                conn.execute(
+                    "UPDATE summary_jobs SET status = 'failed', error = ?, updated_at = ?"
+                    " WHERE job_id = ? AND status = 'running'",
+                    (error, now, job['job_id'])
+                )
+                self.failed += 1
+        self._deliver_callbacks([job['job_id']])
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete finished jobs not touched for max_age_seconds"""
+        with self._transaction() as conn:
+            cutoff = time.time() - max_age_seconds
+            conn.execute(
+                "DELETE FROM summary_callbacks WHERE job_id IN ("
+                " SELECT job_id FROM summary_jobs WHERE status IN ('done', 'failed') AND updated_at < ?)",
+                (cutoff,)
+            )
+            return conn.execute(
+                "DELETE FROM summary_jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (cutoff,)
+            ).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Jobs by status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM summary_jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def stats(self) -> Dict:
+        return {
+            "jobs": self.counts(),
+            "workers": self.workers if self._tasks else 0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "deduplicated": self.deduplicated,
+        }
+
+    # ------------------------------------------------------------- workers
+
+    def _wake(self):
+        # Safe from any thread: routes call submit() from the threadpool
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self):
+        """Start the worker tasks on the running event loop and resend undelivered callbacks"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._resume()))
+
+    async def stop(self):
+        tasks = self._tasks + list(self._deliveries)
+        self._tasks = []
+        self._loop = None
+        # wait_for() can swallow a cancel that lands as the wakeup fires, so workers also check this
+        self._stopping = True
+        for task in tasks:
+            task.cancel()
+        # A job cancelled mid-call keeps its lease and runs again once it expires
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _resume(self):
+        """Prune old jobs and resend callbacks of jobs that finished before a restart"""
+        loop = asyncio.get_running_loop()
+        if self.retention_days:
+            await loop.run_in_executor(None, self.prune, self.retention_days * 86400)
+        self._deliver_callbacks(await loop.run_in_executor(None, self._undelivered))
+
+    def _undelivered(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT c.job_id FROM summary_callbacks c JOIN summary_jobs j USING (job_id)"
+                " WHERE j.status IN ('done', 'failed')"
+            )]
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            jobs = await loop.run_in_executor(None, self.claim, self.batch_size)
+            if not jobs:
+                # Jobs queued by other processes are only seen by polling
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                results = await self._run(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Summary jobs {[job['job_id'] for job in jobs]} failed: {e}")
+                results = [(job, None, str(e), True) for job in jobs]
+            await loop.run_in_executor(None, self._finish_all, results)
+
+    async def _run(self, jobs: List[Dict]) -> List[Tuple]:
+        """(job, summary, error, retry) for each job"""
+        generator = self.summary_generator
+        if not generator.llm.configured:
+            # Retrying cannot help; the rule-based summary stays
+            return [(job, None, "GROQ_API_KEY is not configured", False) for job in jobs]
+
+        async with stage('summary'):
+            summaries = await generator.generate_summaries_async([
+                (job['resume_text'], job['skills'], job['experience_years']) for job in jobs
+            ])
+        results = []
+        for job, summary in zip(jobs, summaries):
+            # The generator falls back to the rule-based summary when the LLM call fails
+            if summary == self._fallback(job['skills'], job['experience_years']):
+                results.append((job, None, "LLM returned no summary", True))
+            else:
+                results.append((job, summary, None, True))
+        return results
+
+    def _finish_all(self, results: List[Tuple]):
+        for job, summary, error, retry in results:
+            self._finish(job, summary, error, retry)
+
+    # ------------------------------------------------------------ webhooks
+
+    def _deliver_callbacks(self, job_ids: List[str]):
+        """Schedule webhook delivery on the worker loop; callable from any thread"""
+        loop = self._loop
+        if loop is None or not job_ids:
+            # Not started (e.g. a script); start() resends them later
+            return
+        loop.call_soon_threadsafe(self._schedule_deliveries, job_ids)
+
+    def _schedule_deliveries(self, job_ids: List[str]):
+        for job_id in job_ids:
+            task = asyncio.create_task(self._deliver(job_id))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    def _callback_urls(self, job_id: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT url FROM summary_callbacks WHERE job_id = ?", (job_id,)
+            )]
+
+    def _drop_callback(self, job_id: str, url: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM summary_callbacks WHERE job_id = ? AND url = ?", (job_id, url)
+            )
+
+    async def _deliver(self, job_id: str):
+        """POST the finished job to each callback URL, dropping the URL once delivered or given up"""
+        loop = asyncio.get_running_loop()
+        urls = await loop.run_in_executor(None, self._callback_urls, job_id)
+        job = await loop.run_in_executor(None, self.get, job_id) if urls else None
+        if not urls or job is None:
+            return
+
+        client = get_http_client()
+        for url in urls:
+            for attempt in range(self.max_attempts):
+                try:
+                    response = await client.post(url, json=job)
+                    response.raise_for_status()
+                    break
+                except Exception as e:
+                    print(f"Summary webhook to {url} for job {job_id} failed (attempt {attempt + 1}): {e}")
+                    if attempt + 1 < self.max_attempts:
+                        await asyncio.sleep(min(self.retry_backoff, 2 ** attempt))
+            await loop.run_in_executor(None, self._drop_callback, job_id, url)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,620 @@
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.quantization import SCORE_BLOCK, Quantizer, create_quantizer, describe
+from app.services.scoring import dense_scores, top_k_indices, top_k_rows
+
+
+# Exact float32 rows for (candidate_ids, row keys), NaN rows for any it no longer holds
+RowSource = Callable[[List[str], List[str]], np.ndarray]
+
+
+def row_keys(embedding_id: str, count: int) -> List[str]:
+    """Keys of a document's rows: the embedding_id, then one per extra chunk row"""
+    return [embedding_id] + [f"{embedding_id}#{chunk}" for chunk in range(1, count)]
+
+
+class FlatIndex:
+    """Exact cosine search over a contiguous float32 matrix keyed by embedding_id
+
+    A candidate may own several rows (a pooled vector followed by its chunk
+    vectors, see chunker.pool_chunks). Searches score every row and rank each
+    candidate by its best row (max-sim); the first row is the candidate's
+    vector wherever one is needed.
+
+    With a quantizer, rows are also kept as compact codes: searches score the
+    codes first and rescore the best rescore x top_k rows exactly. Given a
+    row_source (the embedding store), the float32 rows are not held here at
+    all, which is where the memory saving comes from.
+    """
+
+    kind = "flat"
+
+    # Rows a quantizer is trained on; it is retrained as the index grows up to this size
+    QUANTIZER_SAMPLE = 8192
+
+    def __init__(
+        self,
+        dimension: int,
+        initial_capacity: int = 1024,
+        quantizer: Optional[Quantizer] = None,
+        row_source: Optional[RowSource] = None,
+        rescore: int = 8
+    ):
+        self.dimension = dimension
+        self.quantizer = quantizer
+        self.row_source = row_source if quantizer is not None else None
+        self.rescore = max(1, rescore)
+        self.capacity = 0
+        # Exact rows, unless quantized with the floats held by row_source
+        self.vectors: Optional[np.ndarray] = None
+        # Quantizer codes, (code_size, capacity); valid once the quantizer is trained
+        self.codes: Optional[np.ndarray] = None
+        self.quantized_size = 0
+        self.embedding_ids: List[str] = []
+        self.candidate_ids: List[str] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.candidate_to_id: Dict[str, str] = {}
+        # Row count of multi-row documents by embedding_id; absent means one row
+        self.row_counts: Dict[str, int] = {}
+        # Most rows any document has had, so a top-k over rows of this many
+        # times k always holds k distinct candidates
+        self.max_rows = 1
+        self._allocate(initial_capacity)
+
+    def __len__(self) -> int:
+        return len(self.embedding_ids)
+
+    def candidate_count(self) -> int:
+        return len(self.candidate_to_id)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the row arrays"""
+        return sum(array.nbytes for array in (self.vectors, self.codes) if array is not None)
+
+    def _allocate(self, capacity: int):
+        """Resize the row arrays to capacity, keeping the first len(self) rows"""
+        size = min(len(self), capacity)
+        if self.row_source is None:
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            if self.vectors is not None:
+                vectors[:size] = self.vectors[:size]
+            self.vectors = vectors
+        if self.quantizer is not None:
+            codes = np.zeros((self.quantizer.code_size, capacity), dtype=np.uint8)
+            if self.codes is not None:
+                codes[:, :size] = self.codes[:, :size]
+            self.codes = codes
+        self.capacity = capacity
+
+    def _ensure_capacity(self, size: int):
+        """Grow the backing arrays geometrically"""
+        if size <= self.capacity:
+            return
+        self._allocate(max(size, self.capacity * 2))
+
+    def upsert(self, candidate_id: str, embedding_id: str, vector: np.ndarray):
+        """Add or replace the vector, or (n, dimension) rows, for a candidate"""
+        vectors = np.asarray(vector, dtype=np.float32).reshape(-1, self.dimension)
+        keys = row_keys(embedding_id, len(vectors))
+
+        previous = self.candidate_to_id.get(candidate_id)
+        if previous is not None and previous != embedding_id:
+            self._remove_document(previous)
+
+        if embedding_id in self.id_to_row:
+            old_candidate = self.candidate_ids[self.id_to_row[embedding_id]]
+            if self.row_counts.get(embedding_id, 1) != len(keys):
+                self._remove_document(embedding_id)
+            elif old_candidate != candidate_id:
+                # Same content under a new candidate: move ownership
+                if self.candidate_to_id.get(old_candidate) == embedding_id:
+                    del self.candidate_to_id[old_candidate]
+
+        if len(keys) > 1:
+            self.row_counts[embedding_id] = len(keys)
+            self.max_rows = max(self.max_rows, len(keys))
+        for key, row_vector in zip(keys, vectors):
+            row = self.id_to_row.get(key)
+            if row is None:
+                row = len(self)
+                self._ensure_capacity(row + 1)
+                self.embedding_ids.append(key)
+                self.candidate_ids.append(candidate_id)
+                self.id_to_row[key] = row
+            else:
+                self.candidate_ids[row] = candidate_id
+            if self.vectors is not None:
+                self.vectors[row] = row_vector
+            self._on_row_written(row, row_vector)
+        self.candidate_to_id[candidate_id] = embedding_id
+
+    def delete(self, candidate_id: str) -> bool:
+        """Remove a candidate's vectors; returns False if it was not indexed"""
+        embedding_id = self.candidate_to_id.get(candidate_id)
+        if embedding_id is None:
+            return False
+        self._remove_document(embedding_id)
+        return True
+
+    def _remove_document(self, embedding_id: str):
+        """Remove every row of a document"""
+        for key in row_keys(embedding_id, self.row_counts.pop(embedding_id, 1)):
+            self._remove_row(self.id_to_row[key])
+
+    def _remove_row(self, row: int):
+        """Remove a row by swapping the last row into its place"""
+        last = len(self) - 1
+        embedding_id = self.embedding_ids[row]
+        candidate_id = self.candidate_ids[row]
+
+        if row != last:
+            if self.vectors is not None:
+                self.vectors[row] = self.vectors[last]
+            self.embedding_ids[row] = self.embedding_ids[last]
+            self.candidate_ids[row] = self.candidate_ids[last]
+            self.id_to_row[self.embedding_ids[row]] = row
+            self._on_row_moved(last, row)
+
+        self.embedding_ids.pop()
+        self.candidate_ids.pop()
+        del self.id_to_row[embedding_id]
+        if self.candidate_to_id.get(candidate_id) == embedding_id:
+            del self.candidate_to_id[candidate_id]
+
+    def _on_row_written(self, row: int, vector: np.ndarray):
+        """Keep per-row structures (codes; IVF assignments in the subclass) in step"""
+        if self.quantizer is None:
+            return
+        if (
+            self.quantizer.min_train_size
+            and self.quantized_size < self.QUANTIZER_SAMPLE
+            and len(self) >= max(self.quantizer.min_train_size, 4 * self.quantized_size)
+        ):
+            # First training, or the index has grown well past a small training set
+            self.train_quantizer()
+        elif self.quantizer.trained:
+            self.codes[:, row] = self.quantizer.encode(vector)[:, 0]
+
+    def _on_row_moved(self, source: int, target: int):
+        if self.codes is not None:
+            self.codes[:, target] = self.codes[:, source]
+
+    def _quantized(self) -> bool:
+        return self.quantizer is not None and self.quantizer.trained
+
+    def train_quantizer(self, seed: int = 0):
+        """Fit the quantizer to a sample of the current rows and re-encode every row"""
+        size = len(self)
+        if self.quantizer is None or size == 0:
+            return
+        rng = np.random.default_rng(seed)
+        if size <= self.QUANTIZER_SAMPLE:
+            sample = np.arange(size)
+        else:
+            sample = np.sort(rng.choice(size, self.QUANTIZER_SAMPLE, replace=False))
+        self.quantizer.train(self._exact(sample), seed=seed)
+        for start in range(0, size, SCORE_BLOCK):
+            rows = slice(start, min(size, start + SCORE_BLOCK))
+            self.codes[:, rows] = self.quantizer.encode(self._exact(rows))
+        self.quantized_size = size
+
+    def _exact(self, rows) -> np.ndarray:
+        """Float32 rows (an index array or a slice), from the row source when they are not held here"""
+        if self.vectors is not None:
+            return self.vectors[rows]
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(len(self)))
+        rows = np.asarray(rows, dtype=np.int64)
+        exact = np.asarray(self.row_source(
+            [self.candidate_ids[row] for row in rows.tolist()],
+            [self.embedding_ids[row] for row in rows.tolist()]
+        ), dtype=np.float32).reshape(len(rows), self.dimension)
+        missing = np.isnan(exact[:, 0]) if len(exact) else np.zeros(0, dtype=bool)
+        if missing.any():
+            # Rewritten in the source since this index last synced: use the codes
+            exact[missing] = (
+                self.quantizer.decode(self.codes[:, rows[missing]]) if self._quantized() else 0.0
+            )
+        return exact
+
+    def _first_pass(self, queries: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """(queries, rows) scores: approximate from the codes when quantized, else exact"""
+        size = len(self)
+        if self._quantized():
+            codes = self.codes[:, :size] if rows is None else self.codes[:, rows]
+            return self.quantizer.scores(codes, queries)
+        return dense_scores(self._exact(slice(0, size) if rows is None else rows), queries)
+
+    def _ranked(
+        self,
+        query: np.ndarray,
+        rows: Optional[np.ndarray],
+        scores: np.ndarray,
+        fetch: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Row numbers and scores of the best fetch rows, best first; code scores are rescored exactly"""
+        if not self._quantized():
+            order = top_k_indices(scores, fetch)
+            return (order if rows is None else rows[order]), scores[order]
+        shortlist = top_k_indices(scores, fetch * self.rescore)
+        if rows is not None:
+            shortlist = rows[shortlist]
+        exact = self._exact(shortlist) @ query
+        order = top_k_indices(exact, fetch)
+        return shortlist[order], exact[order]
+
+    def _candidate_rows(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Rows to score for a query; None means all rows"""
+        return None
+
+    def _allowed_rows(self, candidate_ids: Iterable[str]) -> np.ndarray:
+        """Sorted rows (pooled and chunk) held for the given candidates"""
+        return np.array(sorted({
+            self.id_to_row[key]
+            for candidate_id in candidate_ids
+            if candidate_id in self.candidate_to_id
+            for key in row_keys(
+                self.candidate_to_id[candidate_id],
+                self.row_counts.get(self.candidate_to_id[candidate_id], 1)
+            )
+        }), dtype=np.int64)
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = 20,
+        candidate_ids: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Return (candidate_id, cosine score) pairs, best first"""
+        size = len(self)
+        if size == 0 or top_k <= 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32).reshape(self.dimension)
+        if candidate_ids:
+            # Score the allowed rows directly rather than only those in probed IVF clusters
+            rows = self._allowed_rows(candidate_ids)
+            if len(rows) == 0:
+                return []
+        else:
+            rows = self._candidate_rows(query)
+        scores = self._first_pass(query, rows)[0]
+
+        # Rows come max_rows per candidate at most, so this many hold top_k distinct candidates
+        fetch = min(len(scores), top_k * self.max_rows)
+
+        while True:
+            ranked_rows, ranked_scores = self._ranked(query, rows, scores, fetch)
+            results = []
+            seen = set()
+            for row, score in zip(ranked_rows.tolist(), ranked_scores.tolist()):
+                candidate_id = self.candidate_ids[row]
+                # A candidate's first row in score order is its best (max-sim)
+                if candidate_id in seen:
+                    continue
+                seen.add(candidate_id)
+                results.append((candidate_id, score))
+                if len(results) == top_k:
+                    return results
+            if fetch >= len(scores):
+                return results
+            fetch = min(len(scores), fetch * 4)
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 20,
+        candidate_ids: Optional[Iterable[str]] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """Exact top-k for many query vectors with one matrix product (no IVF probing)"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dimension)
+        size = len(self)
+        if size == 0 or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        rows = None
+        if candidate_ids:
+            rows = self._allowed_rows(candidate_ids)
+            if len(rows) == 0:
+                return [[] for _ in range(len(queries))]
+        first_pass = self._first_pass(queries, rows)
+        fetch = top_k * self.max_rows
+        if self._quantized():
+            indices, _ = top_k_rows(first_pass, fetch * self.rescore)
+            if rows is not None:
+                indices = rows[indices]
+            # Rescore every query's shortlist exactly, fetching each row once
+            unique, inverse = np.unique(indices, return_inverse=True)
+            exact = np.take_along_axis(
+                dense_scores(self._exact(unique), queries), inverse.reshape(indices.shape), axis=1
+            )
+            order, scores = top_k_rows(exact, fetch)
+            indices = np.take_along_axis(indices, order, axis=1)
+        else:
+            indices, scores = top_k_rows(first_pass, fetch)
+            if rows is not None:
+                indices = rows[indices]
+        results = []
+        for row_indices, row_scores in zip(indices.tolist(), scores.tolist()):
+            matches = []
+            seen = set()
+            for row, score in zip(row_indices, row_scores):
+                candidate_id = self.candidate_ids[row]
+                if candidate_id not in seen:
+                    seen.add(candidate_id)
+                    matches.append((candidate_id, float(score)))
+                    if len(matches) == top_k:
+                        break
+            results.append(matches)
+        return results
+
+    def candidate_vectors(self, candidate_ids: List[str]) -> np.ndarray:
+        """First row of each candidate, in order; zero rows for unindexed ones"""
+        matrix = np.zeros((len(candidate_ids), self.dimension), dtype=np.float32)
+        positions = []
+        rows = []
+        for position, candidate_id in enumerate(candidate_ids):
+            embedding_id = self.candidate_to_id.get(candidate_id)
+            if embedding_id is not None:
+                positions.append(position)
+                rows.append(self.id_to_row[embedding_id])
+        if rows:
+            matrix[positions] = self._exact(np.array(rows, dtype=np.int64))
+        return matrix
+
+    def _meta(self) -> Dict:
+        return {
+            'kind': self.kind,
+            'dimension': self.dimension,
+            'embedding_ids': self.embedding_ids,
+            'candidate_ids': self.candidate_ids,
+            'vectors': self.vectors is not None,
+            'quantized_size': self.quantized_size,
+            **describe(self.quantizer),
+        }
+
+    def save(self, path: str):
+        """Persist the index to a directory"""
+        os.makedirs(path, exist_ok=True)
+        vectors_path = os.path.join(path, "vectors.npy")
+        if self.vectors is not None:
+            _atomic_save_npy(vectors_path, self.vectors[:len(self)])
+        if self._quantized():
+            self.quantizer.save(path)
+            _atomic_save_npy(os.path.join(path, "codes.npy"), self.codes[:, :len(self)])
+        self._save_extra(path)
+        _atomic_write_json(os.path.join(path, "meta.json"), self._meta())
+        if self.vectors is None and os.path.exists(vectors_path):
+            # Left from an uncompressed snapshot; the row source holds the floats now
+            os.remove(vectors_path)
+
+    def _save_extra(self, path: str):
+        """Hook for subclasses with additional arrays"""
+
+    def _load_extra(self, path: str, meta: Dict):
+        """Hook for subclasses with additional arrays"""
+
+    def _restore(self, path: str, meta: Dict):
+        self.embedding_ids = list(meta['embedding_ids'])
+        self.candidate_ids = list(meta['candidate_ids'])
+        self.id_to_row = {embedding_id: row for row, embedding_id in enumerate(self.embedding_ids)}
+        self.candidate_to_id = {}
+        self.row_counts = {}
+        for candidate_id, key in zip(self.candidate_ids, self.embedding_ids):
+            embedding_id, _, chunk = key.partition('#')
+            if chunk:
+                self.row_counts[embedding_id] = max(self.row_counts.get(embedding_id, 1), int(chunk) + 1)
+            else:
+                self.candidate_to_id[candidate_id] = embedding_id
+        self.max_rows = max(self.row_counts.values(), default=1)
+        size = len(self.embedding_ids)
+        self.vectors = self.codes = None
+        self._allocate(max(size, 1024))
+
+        has_vectors = meta.get('vectors', True)
+        if self.vectors is not None:
+            if not has_vectors:
+                raise Exception("snapshot holds quantized codes only")
+            self.vectors[:size] = np.load(os.path.join(path, "vectors.npy"))
+
+        if self.quantizer is not None:
+            loaded = False
+            codes_path = os.path.join(path, "codes.npy")
+            if _saved_quantization(meta) == describe(self.quantizer) and os.path.exists(codes_path):
+                self.quantizer.load(path)
+                if self.quantizer.trained:
+                    self.codes[:, :size] = np.load(codes_path)
+                    self.quantized_size = meta.get('quantized_size', size)
+                    loaded = True
+            if size and not loaded and size >= self.quantizer.min_train_size:
+                if self.vectors is None:
+                    raise Exception("snapshot has no codes for the configured quantization")
+                self.train_quantizer()
+        self._load_extra(path, meta)
+
+
+class IVFIndex(FlatIndex):
+    """Inverted-file approximate index: k-means coarse quantizer over the flat matrix"""
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        dimension: int,
+        nlist: int = 0,
+        nprobe: int = 8,
+        initial_capacity: int = 1024,
+        quantizer: Optional[Quantizer] = None,
+        row_source: Optional[RowSource] = None,
+        rescore: int = 8
+    ):
+        super().__init__(dimension, initial_capacity, quantizer, row_source, rescore)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(initial_capacity, dtype=np.int32)
+        self.trained_size = 0
+
+    # Below this size an exact scan is already fast enough
+    MIN_TRAIN_SIZE = 2048
+
+    def _ensure_capacity(self, size: int):
+        super()._ensure_capacity(size)
+        if self.assignments.shape[0] < self.capacity:
+            grown = np.zeros(self.capacity, dtype=np.int32)
+            grown[:self.assignments.shape[0]] = self.assignments
+            self.assignments = grown
+
+    def _on_row_written(self, row: int, vector: np.ndarray):
+        super()._on_row_written(row, vector)
+        if self.centroids is None:
+            if len(self) >= self.MIN_TRAIN_SIZE:
+                self.train()
+            return
+        if len(self) >= 4 * self.trained_size:
+            self.train()
+            return
+        self.assignments[row] = int(np.argmax(self.centroids @ vector))
+
+    def _on_row_moved(self, source: int, target: int):
+        super()._on_row_moved(source, target)
+        self.assignments[target] = self.assignments[source]
+
+    def train(self, iterations: int = 10, seed: int = 0):
+        """Cluster current vectors with spherical k-means and reassign every row"""
+        size = len(self)
+        if size == 0:
+            return
+        nlist = self.nlist or max(1, int(np.sqrt(size)))
+        nlist = min(nlist, size)
+
+        rng = np.random.default_rng(seed)
+        if size <= nlist * 256:
+            sample = self._exact(slice(0, size))
+        else:
+            sample = self._exact(rng.choice(size, nlist * 256, replace=False))
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            sums[~empty] /= norms[~empty]
+            sums[empty] = centroids[empty]
+            centroids = sums
+
+        self.centroids = centroids.astype(np.float32)
+        for start in range(0, size, SCORE_BLOCK):
+            rows = slice(start, min(size, start + SCORE_BLOCK))
+            self.assignments[rows] = np.argmax(self._exact(rows) @ self.centroids.T, axis=1)
+        self.trained_size = size
+
+    def _candidate_rows(self, query: np.ndarray) -> Optional[np.ndarray]:
+        if self.centroids is None:
+            return None
+        nprobe = min(self.nprobe, len(self.centroids))
+        probe = top_k_indices(self.centroids @ query, nprobe)
+        return np.flatnonzero(np.isin(self.assignments[:len(self)], probe))
+
+    def _meta(self) -> Dict:
+        meta = super()._meta()
+        meta.update({
+            'nlist': self.nlist,
+            'nprobe': self.nprobe,
+            'trained_size': self.trained_size,
+        })
+        return meta
+
+    def _save_extra(self, path: str):
+        if self.centroids is not None:
+            _atomic_save_npy(os.path.join(path, "centroids.npy"), self.centroids)
+            _atomic_save_npy(os.path.join(path, "assignments.npy"), self.assignments[:len(self)])
+
+    def _load_extra(self, path: str, meta: Dict):
+        self.trained_size = meta.get('trained_size', 0)
+        self.assignments = np.zeros(self.capacity, dtype=np.int32)
+        centroids_path = os.path.join(path, "centroids.npy")
+        if self.trained_size and os.path.exists(centroids_path):
+            self.centroids = np.load(centroids_path)
+            assignments = np.load(os.path.join(path, "assignments.npy"))
+            self.assignments[:len(assignments)] = assignments
+
+
+def _saved_quantization(meta: Dict) -> Dict:
+    """describe() of the quantizer a snapshot was saved with"""
+    saved = {'quantization': meta.get('quantization', Quantizer.kind)}
+    if 'code_size' in meta:
+        saved['code_size'] = meta['code_size']
+    return saved
+
+
+def _atomic_save_npy(path: str, array: np.ndarray):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _atomic_write_json(path: str, data: Dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def create_index(
+    kind: str,
+    dimension: int,
+    nlist: int = 0,
+    nprobe: int = 8,
+    quantization: str = "none",
+    pq_subvectors: int = 0,
+    rescore: int = 8,
+    row_source: Optional[RowSource] = None
+) -> FlatIndex:
+    """Create an empty index of the given kind, optionally quantized (none | int8 | pq)"""
+    quantizer = create_quantizer(quantization, dimension, pq_subvectors)
+    if kind == FlatIndex.kind:
+        return FlatIndex(dimension, quantizer=quantizer, row_source=row_source, rescore=rescore)
+    if kind == IVFIndex.kind:
+        return IVFIndex(
+            dimension, nlist=nlist, nprobe=nprobe,
+            quantizer=quantizer, row_source=row_source, rescore=rescore
+        )
+    raise ValueError(f"Unknown vector index type: {kind}")
+
+
+def load_index(
+    path: str,
+    kind: str,
+    dimension: int,
+    nlist: int = 0,
+    nprobe: int = 8,
+    **quantization_options
+) -> FlatIndex:
+    """Load a persisted index, or create an empty one if none exists or it is incompatible"""
+    index = create_index(kind, dimension, nlist, nprobe, **quantization_options)
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return index
+
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('dimension') != dimension:
+            print(f"Ignoring vector index at {path}: dimension {meta.get('dimension')} != {dimension}")
+            return index
+        index._restore(path, meta)
+        if kind == IVFIndex.kind and meta.get('kind') != IVFIndex.kind:
+            index.train()
+    except Exception as e:
+        print(f"Error loading vector index from {path}: {e}")
+        return create_index(kind, dimension, nlist, nprobe, **quantization_options)
+
+    return index
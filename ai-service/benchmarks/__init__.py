@@ -0,0 +1,12 @@
+"""Reproducible performance benchmarks for the AI service
+
+Run from the ai-service directory:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 1000 10000 100000 --documents 60 --llm-latency 0.2
+
+Resumes, candidates and queries are generated from fixed seeds and the GROQ
+client is replaced by a deterministic fake, so two runs on the same commit
+do the same work. Results are written as JSON (see --output) to compare
+across commits.
+"""
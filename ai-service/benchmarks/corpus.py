@@ -0,0 +1,184 @@
+import io
+import os
+import random
+from typing import Dict, List, Tuple
+
+from docx import Document
+
+from app.services.resume_parser import ResumeParser
+
+
+SKILLS = sorted({skill for skills in ResumeParser.SKILL_PATTERNS.values() for skill in skills})
+
+FIRST_NAMES = [
+    "Aarav", "Maya", "Liam", "Priya", "Noah", "Sofia", "Ethan", "Ananya", "Lucas", "Zara",
+    "Omar", "Chloe", "Ravi", "Emma", "Kenji", "Isla", "Mateo", "Leah", "Arjun", "Nina",
+]
+LAST_NAMES = [
+    "Sharma", "Garcia", "Chen", "Okafor", "Novak", "Silva", "Kumar", "Murphy", "Tanaka", "Haddad",
+]
+TITLES = [
+    "Software Engineer", "Backend Developer", "Data Scientist", "DevOps Engineer",
+    "Frontend Developer", "Machine Learning Engineer", "Full Stack Developer", "QA Engineer",
+]
+COMPANIES = [
+    "Northwind", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Hooli", "Acme Corp", "Vandelay",
+]
+VERBS = [
+    "Built", "Designed", "Maintained", "Migrated", "Optimised", "Led", "Automated", "Scaled",
+]
+OBJECTS = [
+    "a payments API", "the reporting pipeline", "customer dashboards", "the search service",
+    "CI/CD workflows", "a recommendation model", "internal tooling", "data ingestion jobs",
+]
+OUTCOMES = [
+    "cutting latency by 40%", "serving two million requests a day", "reducing cloud spend",
+    "for a team of twelve engineers", "with zero downtime", "improving conversion by 8%",
+]
+
+# Number of jobs per resume by size class; each job adds a handful of bullet lines
+SIZE_JOBS = {"small": 2, "medium": 6, "large": 20}
+
+
+def resume_lines(rng: random.Random, size: str) -> List[str]:
+    """Plain-text lines of one synthetic resume"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(4, 12))
+    years = rng.randint(1, 15)
+
+    lines = [
+        name,
+        f"{rng.choice(TITLES)} | {name.split()[0].lower()}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {years} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
+    ]
+    end_year = 2024
+    for _ in range(SIZE_JOBS[size]):
+        start_year = end_year - rng.randint(1, 3)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start_year} - {end_year})")
+        for _ in range(rng.randint(3, 5)):
+            lines.append(
+                f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)}, {rng.choice(OUTCOMES)}"
+            )
+        lines.append("")
+        end_year = start_year
+
+    lines += [
+        "EDUCATION",
+        f"B.Tech in Computer Science, {rng.choice(COMPANIES)} University ({end_year - 4} - {end_year})",
+        "",
+        "LANGUAGES",
+        ", ".join(rng.sample(ResumeParser.LANGUAGES, rng.randint(1, 3))),
+    ]
+    if rng.random() < 0.5:
+        lines += ["", "CERTIFICATIONS", f"{rng.choice(['AWS', 'Azure', 'Kubernetes'])} Certified Professional"]
+    return lines
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(lines: List[str], lines_per_page: int = 48) -> bytes:
+    """Minimal single-font PDF with one text object per page"""
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+    objects: List[bytes] = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    # Object numbers: 1 font, then a content/page pair per page, then pages tree and catalog
+    pages_id = 2 + 2 * len(pages)
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 11 Tf 50 750 Td 14 TL " + " ".join(
+            f"({_pdf_escape(line)}) '" for line in page_lines
+        ) + " ET"
+        data = stream.encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        objects.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 1 0 R >> >> /Contents %d 0 R >>" % (pages_id, len(objects))
+        )
+        page_ids.append(len(objects))
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    ))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, len(objects), xref
+    )
+    return bytes(out)
+
+
+def build_docx(lines: List[str]) -> bytes:
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def write_corpus(directory: str, count: int, seed: int = 42) -> List[Dict]:
+    """Write count resumes, alternating PDF and DOCX and cycling sizes
+
+    Returns one {'filename', 'format', 'size', 'bytes'} record per file.
+    The same seed always produces the same resume text.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    sizes = list(SIZE_JOBS)
+    files = []
+    for number in range(count):
+        size = sizes[number % len(sizes)]
+        kind = "pdf" if number % 2 == 0 else "docx"
+        lines = resume_lines(rng, size)
+        content = build_pdf(lines) if kind == "pdf" else build_docx(lines)
+        filename = f"resume_{number:05d}_{size}.{kind}"
+        with open(os.path.join(directory, filename), "wb") as f:
+            f.write(content)
+        files.append({"filename": filename, "format": kind, "size": size, "bytes": len(content)})
+    return files
+
+
+def candidate_profiles(count: int, seed: int = 7) -> List[Tuple[str, str, List[str], List[str], int]]:
+    """Short (candidate_id, text, skills, languages, experience_years) records for index benchmarks"""
+    rng = random.Random(seed)
+    profiles = []
+    for number in range(count):
+        skills = rng.sample(SKILLS, rng.randint(3, 10))
+        years = rng.randint(0, 20)
+        text = (
+            f"{rng.choice(TITLES)} with {years} years of experience. "
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {skills[0]}, {rng.choice(OUTCOMES)}. "
+            f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)}."
+        )
+        languages = rng.sample(ResumeParser.LANGUAGES, rng.randint(1, 2))
+        profiles.append((f"cand-{number:06d}", text, skills, languages, years))
+    return profiles
+
+
+def search_queries(count: int, seed: int = 11) -> List[Tuple[str, List[str]]]:
+    """(query, skills named in it) pairs; queries are distinct so the query cache never serves a repeat"""
+    rng = random.Random(seed)
+    queries = []
+    seen = set()
+    while len(queries) < count:
+        skills = rng.sample(SKILLS, rng.randint(1, 3))
+        query = f"{rng.choice(TITLES)} with {' and '.join(skills)}"
+        if query not in seen:
+            seen.add(query)
+            queries.append((query, skills))
+    return queries
@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from app.services.llm_client import LLMClient
+
+
+SUMMARY_TEMPLATES = [
+    "Experienced engineer with a strong record of shipping reliable production systems. "
+    "Combines solid fundamentals with hands-on delivery across the stack.",
+    "Pragmatic developer focused on performance and maintainability. "
+    "Comfortable owning features end to end and mentoring teammates.",
+    "Versatile technologist with depth in data and backend work. "
+    "Brings measurable impact and clear communication to every project.",
+]
+
+
+def _summary(prompt: str) -> str:
+    digest = hashlib.md5(prompt.encode("utf-8")).digest()
+    return SUMMARY_TEMPLATES[digest[0] % len(SUMMARY_TEMPLATES)]
+
+
+def _respond(kwargs: Dict) -> SimpleNamespace:
+    """Deterministic completion for a chat.completions.create call"""
+    messages: List[Dict] = kwargs["messages"]
+    prompt = "\n".join(message.get("content", "") for message in messages)
+    if (kwargs.get("response_format") or {}).get("type") == "json_object":
+        candidates = re.findall(r"^Candidate (\d+):", prompt, re.MULTILINE)
+        content = json.dumps({
+            "summaries": [_summary(prompt + number) for number in candidates] or [_summary(prompt)]
+        })
+    else:
+        content = _summary(prompt)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4),
+    )
+
+
+class _FakeStream:
+    """Async iterator of content deltas, one word per chunk"""
+
+    def __init__(self, content: str, latency: float):
+        self.words = re.findall(r"\S+\s*", content)
+        self.delay = latency / max(len(self.words), 1)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.words:
+            raise StopAsyncIteration
+        await asyncio.sleep(self.delay)
+        delta = SimpleNamespace(content=self.words.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        self.words = []
+
+
+class _Completions:
+    def __init__(self, latency: float, is_async: bool):
+        self.latency = latency
+        self.is_async = is_async
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.is_async:
+            return self._create_async(kwargs)
+        time.sleep(self.latency)
+        return _respond(kwargs)
+
+    async def _create_async(self, kwargs: Dict):
+        response = _respond(kwargs)
+        if kwargs.get("stream"):
+            return _FakeStream(response.choices[0].message.content, self.latency)
+        await asyncio.sleep(self.latency)
+        return response
+
+
+class FakeGroq:
+    """Stand-in for the Groq and AsyncGroq clients with a fixed per-call latency
+
+    Implements only what LLMClient uses: chat.completions.create (plain,
+    JSON-mode and streaming) and with_options. Responses depend only on the
+    prompt, so runs are repeatable.
+    """
+
+    def __init__(self, latency: float = 0.2, is_async: bool = False):
+        self.chat = SimpleNamespace(completions=_Completions(latency, is_async))
+
+    def with_options(self, **options) -> "FakeGroq":
+        return self
+
+    @property
+    def calls(self) -> int:
+        return self.chat.completions.calls
+
+
+def fake_llm_client(latency: float) -> LLMClient:
+    """LLMClient wired to fake clients, with rate limits too high to ever wait"""
+    return LLMClient(
+        api_key=None,
+        requests_per_minute=10 ** 9,
+        tokens_per_minute=10 ** 12,
+        client=FakeGroq(latency),
+        async_client=FakeGroq(latency, is_async=True)
+    )
@@ -0,0 +1,447 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.corpus import candidate_profiles, search_queries, write_corpus
+from benchmarks.fake_llm import fake_llm_client
+
+from app.core.config import settings
+from app.services.embedding_backends import get_embedding_backend
+from app.services.embedding_service import EmbeddingService
+from app.services.resume_parser import ResumeParser
+from app.services.search_service import SearchService
+from app.services.summary_generator import SummaryGenerator
+from app.services.summary_queue import PENDING, SummaryQueue
+from app.services.vector_index import create_index
+
+
+# Operations re-run under tracemalloc to measure a stage's peak allocation
+MEMORY_SAMPLE = 50
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MiB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return _max_rss_mb()
+
+
+def _max_rss_mb() -> float:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return max_rss / 2 ** 20 if sys.platform == "darwin" else max_rss / 2 ** 10
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def _report(operations: int, elapsed: float, latencies: Sequence[float], peak_bytes: int, **extra) -> Dict:
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (0.0, 0.0, 0.0)
+    return {
+        "operations": operations,
+        "seconds": round(elapsed, 4),
+        "throughput_per_s": round(operations / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "mean": round(float(latencies_ms.mean()), 3) if len(latencies_ms) else 0.0,
+            "max": round(float(latencies_ms.max()), 3) if len(latencies_ms) else 0.0,
+        },
+        "peak_traced_mb": round(peak_bytes / 2 ** 20, 3),
+        "rss_mb": round(_rss_mb(), 1),
+        "max_rss_mb": round(_max_rss_mb(), 1),
+        **extra,
+    }
+
+
+def _peak_bytes(fn: Callable, items: Sequence) -> int:
+    """Peak Python/NumPy allocation while running fn over a sample of items"""
+    tracemalloc.start()
+    try:
+        for item in items[:MEMORY_SAMPLE]:
+            fn(item)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn: Callable, items: Sequence, **extra) -> Dict:
+    """Time fn over every item, then re-run a sample under tracemalloc for peak memory
+
+    Timings are taken without tracing, which would otherwise slow allocation-heavy code severalfold.
+    """
+    if items:
+        fn(items[0])  # warm-up: lazy imports, first-call caches
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        begin = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+    return _report(len(items), elapsed, latencies, _peak_bytes(fn, items), **extra)
+
+
+def measure_async(coroutine_fn: Callable, items: Sequence, concurrency: int) -> Dict:
+    """Run coroutine_fn over items with bounded concurrency; latency is per item"""
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+
+        async def one(item):
+            async with semaphore:
+                begin = time.perf_counter()
+                await coroutine_fn(item)
+                latencies.append(time.perf_counter() - begin)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*[one(item) for item in items])
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return elapsed, latencies, peak
+
+    # I/O-bound on the fake's sleep, so tracing does not distort these timings
+    elapsed, latencies, peak = asyncio.run(run_all())
+    return _report(len(items), elapsed, latencies, peak, concurrency=concurrency)
+
+
+# ------------------------------------------------------------------ stages
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_parse(corpus_dir: str, files: List[Dict]) -> Tuple[Dict[str, Dict], List[str]]:
+    """End-to-end ResumeParser.parse_resume (HTTP download, extraction, analysis)
+
+    Also returns the extracted texts, which feed the embed and summary stages.
+    """
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(_QuietHandler, directory=corpus_dir)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    parser = ResumeParser()
+    try:
+        def parse(record):
+            return parser.parse_resume(f"{base_url}/{record['filename']}", record['filename'])
+
+        results = {"parse": measure(parse, files, files=len(files))}
+        for kind in ("pdf", "docx"):
+            subset = [record for record in files if record['format'] == kind]
+            if subset:
+                results[f"parse_{kind}"] = measure(
+                    parse, subset, mean_file_kb=round(np.mean([r['bytes'] for r in subset]) / 1024, 1)
+                )
+        texts = [parse(record).text for record in files]
+        return results, texts
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _embedding_service(llm_client) -> EmbeddingService:
+    """In-memory embedding service on the configured backend"""
+    return EmbeddingService(
+        api_key=settings.groq_api_key,
+        backend=settings.embedding_backend,
+        dimension=settings.embedding_dimension,
+        backend_model_name=settings.embedding_model_name,
+        index_type="flat",
+        llm_client=llm_client,
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        max_text_length=settings.max_text_length,
+    )
+
+
+def bench_embed(llm_client, texts: List[str], batch_size: int = 64) -> Dict[str, Dict]:
+    service = _embedding_service(llm_client)
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    batched = measure(service.generate_embeddings, batches, batch_size=batch_size, backend=service.backend.name)
+    batched["texts_per_s"] = round(len(texts) / batched["seconds"], 2) if batched["seconds"] else None
+    # Whole resumes split into chunks, every chunk of a batch embedded together
+    chunked = measure(service.embed_documents, batches, batch_size=batch_size, backend=service.backend.name)
+    chunked["texts_per_s"] = round(len(texts) / chunked["seconds"], 2) if chunked["seconds"] else None
+    chunked["chunks_per_text"] = round(
+        sum(len(service.chunker.split(text)) for text in texts) / len(texts), 2
+    ) if texts else None
+    return {
+        "embed": measure(service.generate_embedding, texts, backend=service.backend.name),
+        "embed_batch": batched,
+        "embed_chunked": chunked,
+    }
+
+
+def bench_search(llm_client, sizes: List[int], query_count: int) -> Dict[str, Dict]:
+    results = {}
+    queries = search_queries(query_count)
+
+    for size in sizes:
+        embedding_service = _embedding_service(llm_client)
+        search_service = SearchService(
+            embedding_service, ResumeParser.MATCHER, rrf_k=settings.rrf_k
+        )
+        profiles = candidate_profiles(size)
+
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        for start in range(0, size, 1024):
+            chunk = profiles[start:start + 1024]
+            vectors = embedding_service.embed_documents([
+                SearchService.embedding_text(text, skills) for _, text, skills, _, _ in chunk
+            ])
+            for (candidate_id, text, skills, languages, years), vector in zip(chunk, vectors):
+                search_service.index_candidate(candidate_id, text, skills, languages, years, vector=vector)
+        build_seconds = time.perf_counter() - started
+        results[f"index_build_{size}"] = {
+            "candidates": size,
+            "seconds": round(build_seconds, 3),
+            "throughput_per_s": round(size / build_seconds, 1),
+            "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+            "max_rss_mb": round(_max_rss_mb(), 1),
+        }
+
+        for mode in ("hybrid", "lexical", "vector"):
+            results[f"search_{mode}_{size}"] = measure(
+                lambda item: search_service.search(item[0], top_k=20, mode=mode),
+                queries, candidates=size,
+            )
+        # Hybrid search restricted to candidates holding the query's first skill
+        results[f"search_filtered_{size}"] = measure(
+            lambda item: search_service.search(item[0], top_k=20, required_skills=item[1][:1]),
+            queries, candidates=size,
+        )
+        print(f"  search at {size} candidates done ({build_seconds:.1f}s to build)")
+        del search_service, embedding_service
+    return results
+
+
+def bench_quantization(sizes: List[int], query_count: int, top_k: int = 10) -> Dict[str, Dict]:
+    """Vector search over float32, int8 and PQ indexes: latency, row memory and recall@k against float32
+
+    The quantized indexes rescore from a shared float32 matrix standing in for
+    the embedding store's memory map, so their memory is codes only.
+    """
+    results = {}
+    backend = get_embedding_backend(
+        settings.embedding_backend, settings.embedding_dimension, settings.embedding_model_name
+    )
+    queries = list(backend.embed([query for query, _ in search_queries(query_count)]))
+
+    for size in sizes:
+        profiles = candidate_profiles(size)
+        matrix = np.vstack([
+            backend.embed([SearchService.embedding_text(text, skills) for _, text, skills, _, _ in profiles[start:start + 1024]])
+            for start in range(0, size, 1024)
+        ])
+        # Embedding ids are "<position>", so the stand-in store is a plain row lookup
+        row_source = lambda candidate_ids, keys: matrix[[int(key) for key in keys]]
+
+        exact = create_index("flat", backend.dimension)
+        for position, (candidate_id, *_) in enumerate(profiles):
+            exact.upsert(candidate_id, str(position), matrix[position])
+        truth = [{candidate_id for candidate_id, _ in exact.search(query, top_k)} for query in queries]
+        float_mb = exact.memory_bytes() / 2 ** 20
+        results[f"vector_float32_{size}"] = measure(
+            lambda query: exact.search(query, top_k), queries,
+            candidates=size, index_mb=round(float_mb, 2), recall_at_k=1.0, top_k=top_k,
+        )
+        del exact
+
+        for quantization in ("int8", "pq"):
+            started = time.perf_counter()
+            index = create_index(
+                "flat", backend.dimension,
+                quantization=quantization,
+                pq_subvectors=settings.pq_subvectors,
+                rescore=settings.quantization_rescore,
+                row_source=row_source,
+            )
+            for position, (candidate_id, *_) in enumerate(profiles):
+                index.upsert(candidate_id, str(position), matrix[position])
+            build_seconds = time.perf_counter() - started
+            found = [{candidate_id for candidate_id, _ in index.search(query, top_k)} for query in queries]
+            recall = float(np.mean([len(hits & expected) / max(1, len(expected)) for hits, expected in zip(found, truth)]))
+            index_mb = index.memory_bytes() / 2 ** 20
+            results[f"vector_{quantization}_{size}"] = measure(
+                lambda query: index.search(query, top_k), queries,
+                candidates=size,
+                index_mb=round(index_mb, 2),
+                compression=round(float_mb / index_mb, 1),
+                recall_at_k=round(recall, 4),
+                top_k=top_k,
+                rescore=settings.quantization_rescore,
+                build_seconds=round(build_seconds, 2),
+            )
+            del index
+        print(f"  quantization at {size} candidates done")
+    return results
+
+
+def bench_summary(llm_client, texts: List[str], concurrency: int) -> Dict[str, Dict]:
+    generator = SummaryGenerator(settings.groq_api_key, llm_client=llm_client)
+    parser = ResumeParser()
+    inputs = []
+    for text in texts:
+        parsed = parser.analyze_text(text)
+        inputs.append((text, parsed.skills, parsed.experience_years))
+
+    return {
+        "summary": measure(lambda item: generator.generate_summary(*item), inputs),
+        "summary_async": measure_async(
+            lambda item: generator.generate_summary_async(*item), inputs, concurrency
+        ),
+        "summary_batched": measure_async(
+            lambda item: generator.summarize_batched(*item), inputs, concurrency
+        ),
+        "summary_queued": bench_summary_queue(generator, inputs),
+    }
+
+
+def bench_summary_queue(generator: SummaryGenerator, inputs: List[Tuple]) -> Dict:
+    """Submit latency (all /parse-resume now waits for), then the time the workers take to drain the queue"""
+    with tempfile.TemporaryDirectory() as directory:
+        queue = SummaryQueue(
+            os.path.join(directory, "summary_jobs.sqlite3"),
+            generator,
+            workers=settings.summary_workers,
+            batch_size=settings.summary_batch_size,
+            poll_interval=0.01
+        )
+        result = measure(lambda item: queue.submit(*item), inputs)
+
+        async def drain() -> float:
+            started = time.perf_counter()
+            queue.start()
+            while any(queue.counts().get(status) for status in PENDING):
+                await asyncio.sleep(0.005)
+            elapsed = time.perf_counter() - started
+            await queue.stop()
+            return elapsed
+
+        result["drain_seconds"] = round(asyncio.run(drain()), 4)
+        result["jobs_done"] = queue.counts().get('done', 0)
+        result["workers"] = queue.workers
+        queue.close()
+    return result
+
+
+# -------------------------------------------------------------------- main
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark parse, embed, search, quantization and summary")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="candidate pool sizes for the search benchmark")
+    parser.add_argument("--documents", type=int, default=60, help="synthetic resumes to parse")
+    parser.add_argument("--queries", type=int, default=200, help="search queries per pool size and mode")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake GROQ latency per call, seconds")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent async summary requests")
+    parser.add_argument("--seed", type=int, default=42, help="corpus seed")
+    parser.add_argument("--stages", nargs="+", default=["parse", "embed", "search", "quantization", "summary"],
+                        choices=["parse", "embed", "search", "quantization", "summary"],
+                        help="stages to run (default: all)")
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    commit = _git_commit()
+    timestamp = datetime.now(timezone.utc)
+    llm_client = fake_llm_client(args.llm_latency)
+    results: Dict[str, Dict] = {}
+
+    with tempfile.TemporaryDirectory(prefix="talentvault-bench-") as corpus_dir:
+        files = write_corpus(corpus_dir, args.documents, args.seed)
+        print(f"Generated {len(files)} resumes in {corpus_dir}")
+
+        texts: List[str] = []
+        if {"parse", "embed", "summary"} & set(args.stages):
+            parse_results, texts = bench_parse(corpus_dir, files)
+            if "parse" in args.stages:
+                results.update(parse_results)
+                print("  parse done")
+
+    if "embed" in args.stages:
+        results.update(bench_embed(llm_client, texts))
+        print("  embed done")
+    if "search" in args.stages:
+        results.update(bench_search(llm_client, args.sizes, args.queries))
+    if "quantization" in args.stages:
+        results.update(bench_quantization(args.sizes, args.queries))
+    if "summary" in args.stages:
+        results.update(bench_summary(llm_client, texts, args.concurrency))
+        print("  summary done")
+
+    report = {
+        "commit": commit,
+        "timestamp": timestamp.isoformat(),
+        "config": {
+            **vars(args),
+            "embedding_backend": settings.embedding_backend,
+            "embedding_dimension": settings.embedding_dimension,
+            "metrics_enabled": settings.metrics_enabled,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results",
+        f"{timestamp:%Y%m%dT%H%M%SZ}-{(commit or 'nocommit')[:10]}.json"
+    )
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    width = max(len(name) for name in results) if results else 0
+    for name, result in results.items():
+        latency = result.get("latency_ms")
+        if latency:
+            print(f"{name:<{width}}  {result['throughput_per_s']:>10}/s  "
+                  f"p50 {latency['p50']:>9.3f}ms  p95 {latency['p95']:>9.3f}ms  p99 {latency['p99']:>9.3f}ms  "
+                  f"peak {result['peak_traced_mb']:>8.2f}MB")
+        else:
+            print(f"{name:<{width}}  {result['throughput_per_s']:>10}/s  build {result['seconds']}s  "
+                  f"rss +{result['rss_growth_mb']}MB")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -79,6 +79,26 @@ export const candidateController = {
     }
   },
 
+  /**
+   * Get best-matching job roles for a candidate (Recruiter only)
+   */
+  async getCandidateMatches(req, res, next) {
+    try {
+      const { id } = req.params;
+      const topK = Math.min(parseInt(req.query.limit, 10) || 3, 50);
+
+      const matches = await candidateService.getCandidateMatches(id, topK);
+
+      res.status(200).json({
+        success: true,
+        count: matches.length,
+        data: matches,
+      });
+    } catch (error) {
+      next(error);
+    }
+  },
+
   /**
    * Update candidate status (Recruiter only)
    */
@@ -131,6 +151,23 @@ export const candidateController = {
     }
   },
 
+  /**
+   * Re-sync the AI search indexes with stored AI insights (Recruiter only)
+   */
+  async reindexCandidates(req, res, next) {
+    try {
+      const result = await candidateService.reindexCandidates(Boolean(req.body?.force));
+
+      res.status(202).json({
+        success: true,
+        message: 'Reindex started',
+        data: result,
+      });
+    } catch (error) {
+      next(error);
+    }
+  },
+
   /**
    * Get candidate statistics (Recruiter only)
    */
@@ -36,6 +36,26 @@ export const jobRoleController = {
     }
   },
 
+  /**
+   * Get ranked candidate matches for a job role (Recruiter only)
+   */
+  async getJobRoleMatches(req, res, next) {
+    try {
+      const { id } = req.params;
+      const topK = Math.min(parseInt(req.query.limit, 10) || 20, 500);
+
+      const matches = await jobRoleService.getJobRoleMatches(id, topK);
+
+      res.status(200).json({
+        success: true,
+        count: matches.length,
+        data: matches,
+      });
+    } catch (error) {
+      next(error);
+    }
+  },
+
   /**
    * Create new job role (Recruiter only)
    */
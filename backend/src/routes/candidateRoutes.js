@@ -41,6 +41,13 @@ router.get('/', authMiddleware, candidateController.getAllCandidates);
  */
 router.get('/statistics', authMiddleware, candidateController.getStatistics);
 
+/**
+ * @route   POST /api/v1/candidates/reindex
+ * @desc    Re-sync AI search indexes from stored AI insights
+ * @access  Private (Recruiter)
+ */
+router.post('/reindex', authMiddleware, candidateController.reindexCandidates);
+
 /**
  * @route   GET /api/v1/candidates/:id
  * @desc    Get candidate by ID
@@ -48,6 +55,13 @@ router.get('/statistics', authMiddleware, candidateController.getStatistics);
  */
 router.get('/:id', authMiddleware, candidateController.getCandidateById);
 
+/**
+ * @route   GET /api/v1/candidates/:id/matches
+ * @desc    Get best-matching job roles for a candidate
+ * @access  Private (Recruiter)
+ */
+router.get('/:id/matches', authMiddleware, candidateController.getCandidateMatches);
+
 /**
  * @route   PUT /api/v1/candidates/:id/status
  * @desc    Update candidate status
@@ -27,6 +27,13 @@ router.get('/categories', jobRoleController.getCategories);
  */
 router.get('/:id', jobRoleController.getJobRoleById);
 
+/**
+ * @route   GET /api/v1/job-roles/:id/matches
+ * @desc    Get ranked candidate matches for a job role
+ * @access  Private (Recruiter)
+ */
+router.get('/:id/matches', authMiddleware, jobRoleController.getJobRoleMatches);
+
 /**
  * @route   POST /api/v1/job-roles
  * @desc    Create new job role
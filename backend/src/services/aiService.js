@@ -74,6 +74,118 @@ export const aiService = {
     }
   },
 
+  /**
+   * Status of a queued summary job; summary is the AI summary once status is done
+   */
+  async getSummaryJob(jobId) {
+    try {
+      const response = await aiServiceClient.get(`/summary/${jobId}`);
+      return response.data;
+    } catch (error) {
+      console.error('AI Service - Summary Job Error:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to fetch summary job');
+    }
+  },
+
+  /**
+   * Queue candidate insert/update/delete events for background re-indexing
+   */
+  async sendIndexEvents(events) {
+    try {
+      const response = await aiServiceClient.post('/index/events', { events });
+      return response.data;
+    } catch (error) {
+      console.error('AI Service - Index Events Error:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to queue index events');
+    }
+  },
+
+  /**
+   * Re-sync the AI search indexes from a candidate snapshot, or one page of it;
+   * the last page lists the ids of every candidate in the snapshot
+   */
+  async rebuildIndex(candidates, force = false, last = true, snapshotIds = []) {
+    try {
+      const response = await aiServiceClient.post('/index/rebuild', {
+        candidates,
+        force,
+        last,
+        snapshot_ids: snapshotIds,
+      });
+      return response.data;
+    } catch (error) {
+      console.error('AI Service - Rebuild Index Error:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to rebuild index');
+    }
+  },
+
+  /**
+   * Queue depth and rebuild state of the AI service's background indexer
+   */
+  async getIndexStatus() {
+    try {
+      const response = await aiServiceClient.get('/index/status');
+      return response.data;
+    } catch (error) {
+      console.error('AI Service - Index Status Error:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to fetch index status');
+    }
+  },
+
+  /**
+   * Send job roles to the AI service so their candidate matches are precomputed
+   */
+  async syncJobRoles(roles) {
+    try {
+      const response = await aiServiceClient.post('/match/roles', {
+        roles: roles.map((role) => ({
+          id: role.id,
+          role_name: role.role_name,
+          category: role.category || null,
+          requirements: role.requirements || null,
+          description: role.description || null,
+        })),
+      });
+      return response.data;
+    } catch (error) {
+      console.error('AI Service - Sync Job Roles Error:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to sync job roles');
+    }
+  },
+
+  /**
+   * Ranked candidate shortlist for a job role
+   */
+  async matchJobRole(roleId, topK = 20, minScore = 0) {
+    try {
+      const response = await aiServiceClient.post('/match/job-role', {
+        role_id: roleId,
+        top_k: topK,
+        min_score: minScore,
+      });
+      return response.data.matches;
+    } catch (error) {
+      console.error('AI Service - Match Job Role Error:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to match job role');
+    }
+  },
+
+  /**
+   * Best-matching job roles for a candidate
+   */
+  async matchCandidate(candidateId, topK = 3) {
+    try {
+      const response = await aiServiceClient.post('/match/candidate', {
+        candidate_id: candidateId,
+        top_k: topK,
+      });
+      return response.data.matches;
+    } catch (error) {
+      console.error('AI Service - Match Candidate Error:', error.response?.data || error.message);
+      throw new Error(error.response?.data?.detail || 'Failed to match candidate');
+    }
+  },
+
   /**
    * Health check for AI service
    */
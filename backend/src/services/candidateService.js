@@ -2,6 +2,9 @@ import supabaseAdmin from '../config/supabase.js';
 import { config } from '../config/index.js';
 import { aiService } from './aiService.js';
 
+// ai_insights rows sent to the AI service per index rebuild request
+const REINDEX_PAGE_SIZE = 200;
+
 export const candidateService = {
   /**
    * Upload resume to Supabase Storage
@@ -114,6 +117,25 @@ export const candidateService = {
 
       if (error) {
         console.error('Failed to store AI insights:', error);
+        return;
+      }
+
+      // The AI summary was queued; replace the rule-based summary once it is ready
+      if (aiResult.summary_job_id) {
+        this.awaitSummaryJob(candidateId, aiResult.summary_job_id)
+          .catch(err => console.error('AI Summary Error:', err));
+      }
+
+      // Queue the candidate for search indexing with the same fields a reindex sends
+      if (aiResult.extracted_text) {
+        await aiService.sendIndexEvents([{
+          op: 'upsert',
+          candidate_id: candidateId,
+          text: aiResult.extracted_text,
+          skills: aiResult.skills || [],
+          languages: aiResult.languages || [],
+          experience_years: aiResult.experience_years || 0,
+        }]);
       }
     } catch (error) {
       console.error('AI processing error:', error);
@@ -121,6 +143,36 @@ export const candidateService = {
     }
   },
 
+  /**
+   * Poll a queued AI summary job and store its summary in the candidate's AI insights
+   */
+  async awaitSummaryJob(candidateId, jobId, pollInterval = 5000, maxPolls = 360) {
+    for (let poll = 0; poll < maxPolls; poll++) {
+      await new Promise(resolve => setTimeout(resolve, pollInterval));
+      const job = await aiService.getSummaryJob(jobId);
+
+      if (job.status === 'failed') {
+        // The rule-based summary stays in place
+        console.error(`Summary job ${jobId} failed:`, job.error);
+        return;
+      }
+
+      if (job.status === 'done') {
+        const { error } = await supabaseAdmin
+          .from('ai_insights')
+          .update({ summary: job.summary })
+          .eq('candidate_id', candidateId);
+
+        if (error) {
+          console.error('Failed to store AI summary:', error);
+        }
+        return;
+      }
+    }
+
+    console.error(`Summary job ${jobId} did not finish after ${maxPolls} polls`);
+  },
+
   /**
    * Get all candidates with AI insights
    */
@@ -171,6 +223,14 @@ export const candidateService = {
     return data;
   },
 
+  /**
+   * Get the best-matching job roles for a candidate
+   */
+  async getCandidateMatches(candidateId, topK = 3) {
+    const candidate = await this.getCandidateById(candidateId);
+    return aiService.matchCandidate(candidate.id, topK);
+  },
+
   /**
    * Update candidate status
    */
@@ -248,6 +308,73 @@ export const candidateService = {
     }
   },
 
+  /**
+   * Send every candidate's AI insights to the AI service for a full index re-sync
+   *
+   * The snapshot goes in pages, one rebuild at a time. The first page is sent
+   * before returning, so a rebuild that is already running is reported.
+   */
+  async reindexCandidates(force = false) {
+    const first = await this.fetchReindexPage(0);
+    const snapshotIds = first.candidates.map(candidate => candidate.candidate_id);
+    const result = await aiService.rebuildIndex(first.candidates, force, first.last, first.last ? snapshotIds : []);
+
+    if (!first.last) {
+      this.sendReindexPages(force, snapshotIds)
+        .catch(err => console.error('Reindex Error:', err));
+    }
+
+    return result;
+  },
+
+  /**
+   * Send the remaining reindex pages, waiting for each page's rebuild to finish
+   */
+  async sendReindexPages(force, snapshotIds, pollInterval = 1000) {
+    for (let page = 1; ; page++) {
+      const { candidates, last } = await this.fetchReindexPage(page);
+      snapshotIds.push(...candidates.map(candidate => candidate.candidate_id));
+
+      while ((await aiService.getIndexStatus()).rebuilding) {
+        await new Promise(resolve => setTimeout(resolve, pollInterval));
+      }
+      await aiService.rebuildIndex(candidates, force, last, last ? snapshotIds : []);
+
+      if (last) {
+        return;
+      }
+    }
+  },
+
+  /**
+   * One page of indexable AI insights, in the shape of AI service index events
+   */
+  async fetchReindexPage(page) {
+    const from = page * REINDEX_PAGE_SIZE;
+    const { data, error } = await supabaseAdmin
+      .from('ai_insights')
+      .select('candidate_id, extracted_text, skills, languages, experience_years')
+      .order('candidate_id')
+      .range(from, from + REINDEX_PAGE_SIZE - 1);
+
+    if (error) {
+      throw new Error('Failed to fetch AI insights');
+    }
+
+    return {
+      candidates: data
+        .filter(row => row.extracted_text)
+        .map(row => ({
+          candidate_id: row.candidate_id,
+          text: row.extracted_text,
+          skills: row.skills || [],
+          languages: row.languages || [],
+          experience_years: row.experience_years || 0,
+        })),
+      last: data.length < REINDEX_PAGE_SIZE,
+    };
+  },
+
   /**
    * Get candidate statistics
    */
@@ -1,4 +1,5 @@
 import supabaseAdmin from '../config/supabase.js';
+import { aiService } from './aiService.js';
 
 export const jobRoleService = {
   /**
@@ -54,9 +55,27 @@ export const jobRoleService = {
       throw new Error('Failed to create job role');
     }
 
+    // Matching is best-effort; the role exists even if the AI service is down
+    aiService.syncJobRoles([data]).catch(() => {});
+
     return data;
   },
 
+  /**
+   * Get precomputed candidate matches for a job role
+   */
+  async getJobRoleMatches(roleId, topK = 20) {
+    const role = await this.getJobRoleById(roleId);
+
+    try {
+      return await aiService.matchJobRole(role.id, topK);
+    } catch (error) {
+      // The AI service may not know the role yet (e.g. after a restart); sync and retry once
+      await aiService.syncJobRoles([role]);
+      return aiService.matchJobRole(role.id, topK);
+    }
+  },
+
   /**
    * Get job role categories
    */